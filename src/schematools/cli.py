@@ -10,6 +10,7 @@ import operator
 import os
 import sys
 from collections import defaultdict
+from contextlib import ExitStack, closing
 from functools import reduce
 from importlib.metadata import version
 from pathlib import Path
@@ -41,6 +42,9 @@ from schematools.exceptions import (
     SchemaObjectNotFound,
 )
 from schematools.exports import export_tables
+from schematools.importer.base import ImportStats
+from schematools.importer.metrics import JSONLinesSink, PrometheusTextfileSink
+from schematools.importer.ndjson import NDJSONImporter
 from schematools.loaders import (
     FileSystemSchemaLoader,
     get_profile_loader,
@@ -221,6 +225,149 @@ def import_() -> None:
     """Subcommand to import data."""
 
 
+@import_.command("ndjson")
+@option_db_url
+@option_schema_url
+@argument_dataset_id
+@click.argument("table_id")
+@click.argument("ndjson_path")
+@click.option(
+    "--mode",
+    type=click.Choice(["append", "truncate", "upsert", "swap"]),
+    default="append",
+    show_default=True,
+    help="Append new records, truncate the table first, update changed records,"
+    " or import into a new table that replaces the current table.",
+)
+@click.option("--batch-size", type=int, default=1000, show_default=True)
+@click.option("--workers", type=int, default=0, help="Number of processes that parse the file.")
+@click.option("--copy", "use_copy", is_flag=True, help="Write the records using COPY.")
+@click.option(
+    "--defer-indexes", is_flag=True, help="Create the indexes after the records are written."
+)
+@click.option(
+    "--validate", is_flag=True, help="Check and convert the values, and skip invalid records."
+)
+@click.option(
+    "--reject-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the invalid records to this NDJSON file (implies --validate).",
+)
+@click.option(
+    "--metrics-textfile",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the import metrics to this file, for the Prometheus textfile collector.",
+)
+@click.option(
+    "--metrics-jsonl",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Append the metrics of each batch and stage as JSON lines to this file.",
+)
+@click.option("--dry-run", is_flag=True, help="Only parse the file, don't write the records.")
+def import_ndjson(
+    db_url: str,
+    schema_url: str,
+    dataset_id: str,
+    table_id: str,
+    ndjson_path: str,
+    mode: str,
+    batch_size: int,
+    workers: int,
+    use_copy: bool,
+    defer_indexes: bool,
+    validate: bool,
+    reject_file: Path | None,
+    metrics_textfile: Path | None,
+    metrics_jsonl: Path | None,
+    dry_run: bool,
+) -> None:
+    """Import an NDJSON file into a table.
+
+    The NDJSON_PATH can be a (gzip, bzip2 or zstd compressed) file, or '-' to read stdin.
+    """
+    dataset_schema = _get_dataset_schema(dataset_id, schema_url, prefetch_related=True)
+    source = ndjson_path if ndjson_path == "-" else Path(ndjson_path)
+    validate = validate or reject_file is not None
+    with ExitStack() as stack:
+        metrics_sinks = []
+        if metrics_textfile is not None:
+            metrics_sinks.append(PrometheusTextfileSink(metrics_textfile))
+        if metrics_jsonl is not None:
+            metrics_sinks.append(stack.enter_context(closing(JSONLinesSink(metrics_jsonl))))
+
+        if dry_run:
+            importer = NDJSONImporter(dataset_schema, engine=None, metrics_sinks=metrics_sinks)
+            stats = importer.dry_run(source, table_id, workers=workers, validate=validate)
+        else:
+            importer = NDJSONImporter(
+                dataset_schema, _get_engine(db_url), metrics_sinks=metrics_sinks
+            )
+            stats = _import_ndjson(
+                importer,
+                source,
+                table_id,
+                mode=mode,
+                batch_size=batch_size,
+                workers=workers,
+                use_copy=use_copy,
+                defer_indexes=defer_indexes,
+                validate=validate,
+                reject_file=reject_file,
+            )
+    _echo_import_stats(stats)
+
+
+def _import_ndjson(
+    importer: NDJSONImporter,
+    source: Path | str,
+    table_id: str,
+    mode: str,
+    batch_size: int,
+    workers: int,
+    use_copy: bool,
+    defer_indexes: bool,
+    validate: bool,
+    reject_file: Path | None,
+) -> ImportStats:
+    """Run the import steps of the ``import ndjson`` command."""
+    importer.generate_db_objects(
+        table_id,
+        truncate=mode == "truncate",
+        ind_create_pk_lookup=mode != "upsert",
+        swap=mode == "swap",
+        defer_indexes=defer_indexes,
+    )
+    importer.load_file(
+        source,
+        batch_size=batch_size,
+        use_copy=use_copy,
+        upsert=mode == "upsert",
+        reject_file=reject_file,
+        workers=workers,
+        validate=validate,
+    )
+    stats = importer.stats
+
+    if mode == "swap":
+        importer.swap_tables()
+    elif defer_indexes:
+        importer.create_deferred_indexes()
+    return stats
+
+
+def _echo_import_stats(stats: ImportStats) -> None:
+    """Report the throughput of an import."""
+    click.echo(
+        f"\nImported {stats.num_records} records ({stats.num_rows} rows)"
+        f" in {stats.total_seconds:.1f}s: {stats.records_per_second:.0f} records/s"
+    )
+    click.echo(f"  parse: {stats.parse_seconds:.1f}s")
+    click.echo(f"  write: {stats.write_seconds:.1f}s")
+    click.echo(f"  duplicates skipped: {stats.num_duplicates}")
+    if stats.num_rejected:
+        click.echo(f"  invalid records rejected: {stats.num_rejected}")
+
+
 def create_export_context(
     engine: Engine,
     dataset: DatasetSchema,
@@ -230,6 +377,7 @@ def create_export_context(
     filetype: ExportFileType,
     version: str | None = None,
     size: int | None = None,
+    use_copy: bool = False,
 ) -> ExportContext:
     """Create an export context for the given dataset schema.
 
@@ -238,6 +386,8 @@ def create_export_context(
         dataset_schema: dataset schema to export.
         table_ids: only export tables with these ids. If empty, all tables are exported.
         scopes: only export tables with these scopes. If empty, all tables are exported.
+        use_copy: let the database write the csv, geojson and jsonl files using COPY TO STDOUT,
+            this is ignored for gpkg and parquet.
     """
     export = Export(
         name="cli_export",
@@ -254,6 +404,7 @@ def create_export_context(
         client=None,
         export=export,
         size=size,
+        use_copy=use_copy,
     )
 
 
@@ -275,7 +426,16 @@ def create_export_context(
     "-f",
     type=str,
     default="csv",
-    help="Filetype for the export, valid options: csv, gpkg, geojson, jsonl.",
+    help="Filetype for the export, valid options: csv, gpkg, geojson, jsonl, parquet.",
+)
+@click.option(
+    "--use-copy",
+    is_flag=True,
+    default=False,
+    help=(
+        "Let the database write the csv, geojson and jsonl files using COPY TO STDOUT "
+        "(gpkg and parquet files are written as usual)."
+    ),
 )
 def export(
     db_url: str,
@@ -286,6 +446,7 @@ def export(
     scopes: list[str],
     size: int,
     filetype: ExportFileType,
+    use_copy: bool,
 ) -> None:
     """Command to export data."""
     engine = _get_engine(db_url)
@@ -300,6 +461,7 @@ def export(
             filetype=filetype,
             version=None,
             size=size,
+            use_copy=use_copy,
         )
         failures = export_tables(context)
     for failure in failures:
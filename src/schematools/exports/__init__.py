@@ -1,21 +1,39 @@
 from __future__ import annotations
 
+import dataclasses
 import gc
 import logging
+import multiprocessing
 import os
 import re
+import threading
 import zipfile
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from pathlib import Path
+from typing import Any, BinaryIO
 
-from sqlalchemy import Engine
+from sqlalchemy import Engine, QueuePool, create_engine
 
-from schematools.exports.base import BaseExporter
+from schematools.exports.base import BaseExporter, ExportPlanCache
 from schematools.exports.csv import CsvExporter
 from schematools.exports.geojson import GeoJsonExporter
 from schematools.exports.geopackage import GeopackageExporter
 from schematools.exports.jsonlines import JsonLinesExporter
+from schematools.exports.parquet import ParquetExporter
+from schematools.exports.streaming import StreamPipe
 from schematools.loaders import CachedSchemaLoader, get_schema_loader
 from schematools.types import (
+    BlobClient,
+    DatasetTableSchema,
     ExportContext,
     ExportFileType,
     ExportTableFailure,
@@ -29,9 +47,22 @@ FILETYPE_TO_EXPORTER: dict[ExportFileType, type[BaseExporter]] = {
     "gpkg": GeopackageExporter,
     "jsonl": JsonLinesExporter,
     "geojson": GeoJsonExporter,
+    "parquet": ParquetExporter,
 }
 
-STORAGE_FOLDER = {"gpkg": "geopackage", "jsonl": "jsonlines", "csv": "csv", "geojson": "geojson"}
+#: The blob metadata that holds the fingerprint of the exported data.
+FINGERPRINT_METADATA_KEY = "fingerprint"
+
+#: The kinds of pools that :class:`ExportScheduler` can run the exports on.
+EXECUTOR_TYPES = ("thread", "process")
+
+STORAGE_FOLDER = {
+    "gpkg": "geopackage",
+    "jsonl": "jsonlines",
+    "csv": "csv",
+    "geojson": "geojson",
+    "parquet": "parquet",
+}
 
 
 def sanitize(input_string):
@@ -63,27 +94,86 @@ def zip_files(context: ExportContext) -> Path:
 
 
 def upload_to_storage(path: Path, context: ExportContext, metadata: dict[str, str]):
-    container_name = "bulk-data" if context.export.is_public else "bulk-data-fp-mdw"
-    if not context.client:
-        raise RuntimeError("Storage client is required for uploading files.")
-    container_client = context.client.get_container_client(container_name)
     with path.open("rb") as zf:
-        blob_client = container_client.get_blob_client(
-            f"{STORAGE_FOLDER[context.export.filetype]}/{context.export.filename}"
-        )
-        blob_client.upload_blob(
-            zf,
-            overwrite=True,
-            metadata={**metadata, "table_ids": " ".join(context.export.table_ids)},
-        )
-        logger.info(
-            "Uploaded %s to storage container %s.", context.export.filename, container_name
-        )
+        _upload_blob(zf, context, metadata)
     path.unlink()  # remove the zip file after uploading
     logger.info("Removed local file %s.", context.export.filename)
     gc.collect()
 
 
+def stream_to_storage(
+    exporter: BaseExporter, context: ExportContext, metadata: dict[str, str]
+) -> list[ExportTableFailure]:
+    """Export the tables into a zip file that is uploaded while it is written.
+
+    No local files are written. When a table fails, the upload is aborted,
+    so the previously published file is kept.
+    Returns a list of structured failures (empty on success).
+    """
+    pipe = StreamPipe()
+    failures: list[ExportTableFailure] = []
+
+    def _write_zip():
+        try:
+            with zipfile.ZipFile(pipe.writer, "w", compression=zipfile.ZIP_DEFLATED) as zipf:
+                for table in exporter.tables:
+                    if failure := exporter.stream_table(zipf, table):
+                        failures.append(failure)
+                        pipe.abort(RuntimeError(str(failure)))
+                        return
+            pipe.writer.close()
+        except BrokenPipeError:
+            pass  # the upload failed
+        except Exception as exc:  # noqa: BLE001
+            pipe.abort(exc)
+
+    writer = threading.Thread(target=_write_zip, name=f"export-{context.export.name}")
+    writer.start()
+    try:
+        _upload_blob(pipe, context, metadata)
+    except Exception:
+        if not failures:
+            raise
+    finally:
+        pipe.close()
+        writer.join()
+    return failures
+
+
+def _upload_blob(data: BinaryIO, context: ExportContext, metadata: dict[str, str]):
+    blob_client = _get_blob_client(context)
+    blob_client.upload_blob(
+        data,
+        overwrite=True,
+        metadata={**metadata, "table_ids": " ".join(context.export.table_ids)},
+    )
+    logger.info(
+        "Uploaded %s to storage container %s.", context.export.filename, _container_name(context)
+    )
+
+
+def published_fingerprint(context: ExportContext) -> str | None:
+    """The fingerprint of the uploaded export (see :meth:`BaseExporter.fingerprint`)."""
+    try:
+        properties = _get_blob_client(context).get_blob_properties()
+    except Exception:  # noqa: BLE001
+        return None  # e.g. a new export, that doesn't exist in the storage yet.
+    return (properties.metadata or {}).get(FINGERPRINT_METADATA_KEY)
+
+
+def _container_name(context: ExportContext) -> str:
+    return "bulk-data" if context.export.is_public else "bulk-data-fp-mdw"
+
+
+def _get_blob_client(context: ExportContext) -> BlobClient:
+    if not context.client:
+        raise RuntimeError("Storage client is required for uploading files.")
+    container_client = context.client.get_container_client(_container_name(context))
+    return container_client.get_blob_client(
+        f"{STORAGE_FOLDER[context.export.filetype]}/{context.export.filename}"
+    )
+
+
 def remove_files(file_paths: list[Path]):
     for file_path in file_paths:
         if file_path.exists():
@@ -92,25 +182,57 @@ def remove_files(file_paths: list[Path]):
     gc.collect()
 
 
+def create_export_engine(db_url: str, max_db_queries: int, **kwargs: Any) -> Engine:
+    """Create an engine with a connection for each concurrent query of :func:`export`."""
+    return create_engine(
+        db_url, pool_size=max_db_queries, max_overflow=0, pool_pre_ping=True, **kwargs
+    )
+
+
 def export(
     engine: Engine,
     storage_client: StorageClient,
     output_path: str = "tmp",
     *,
+    workers: int = 1,
+    executor: str = "thread",
+    max_db_queries: int | None = None,
+    use_copy: bool = False,
+    stream: bool = False,
+    incremental: bool = False,
+    slice_size: int | None = None,
     loader: CachedSchemaLoader | None = None,  # For testing purposes.
     cleanup: bool = True,  # For testing purposes.
 ) -> list[ExportTableFailure]:
-    """Exports all defined exports from the database to the configured storage."""
+    """Exports all defined exports from the database to the configured storage.
+
+    The tables are exported concurrently by ``workers`` threads or processes
+    (see :class:`ExportScheduler`), at most ``max_db_queries`` at the same time.
+    The failures are returned in the order of the datasets, exports and tables.
+    With ``use_copy``, the database writes the csv, geojson and jsonl files using
+    ``COPY TO STDOUT``, the geopackage and parquet files are written as before.
+    With ``stream``, the zip files are uploaded while these are written,
+    instead of writing local files first (see :func:`stream_to_storage`).
+    With ``incremental``, the exports with unchanged data are skipped.
+    With ``slice_size``, the tables are exported in slices of this number of rows,
+    which are divided over the workers. A failed slice is retried by itself, and
+    the slices that are left on disk after a failure are reused by the next run.
+    """
     loader = loader or get_schema_loader()
     path = Path(output_path)
     path.mkdir(parents=True, exist_ok=True)
-    all_failures: list[ExportTableFailure] = []
+    scheduler = ExportScheduler(
+        workers=workers,
+        executor=executor,
+        max_db_queries=max_db_queries,
+        stream=stream,
+        incremental=incremental,
+        cleanup=cleanup,
+    )
     for dataset_name, dataset in loader.get_all_datasets().items():
-        logger.info("Exporting dataset %s.", dataset_name)
         dataset_metadata: dict[str, str] = {
             k: sanitize(v) for k, v in dataset.data.items() if isinstance(v, str)
         }
-        file_paths: list[Path] = []
         for version in dataset.versions.values():
             for export in version.exports:
                 context = ExportContext(
@@ -119,25 +241,325 @@ def export(
                     folder=path,
                     export=export,
                     client=storage_client,
+                    use_copy=use_copy,
+                    slice_size=slice_size,
                 )
-                logger.info("Exporting %s", export)
-                failures = export_tables(context)
-                file_paths.extend(context.export.table_paths(context.folder))
-                file_paths.append(context.folder / context.export.filename_without_zip)
-                if failures:
-                    all_failures.extend(failures)
-                    logger.error(
-                        "Export %s had %s table export failures; skipping publish.",
-                        export,
-                        len(failures),
-                    )
-                    continue
-
-                zip_path = zip_files(context)
-                upload_to_storage(zip_path, context, dataset_metadata)
-
-        if cleanup:
-            remove_files(file_paths)
-            gc.collect()
-
-    return all_failures
+                scheduler.add(dataset_name, context, dataset_metadata)
+
+    return scheduler.run()
+
+
+@dataclasses.dataclass
+class _ExportJob:
+    """The progress of a single export in the :class:`ExportScheduler`."""
+
+    dataset_name: str
+    context: ExportContext
+    exporter: BaseExporter
+    metadata: dict[str, str]
+    #: The failures per table position (None for exported tables).
+    results: dict[int, ExportTableFailure | None] = dataclasses.field(default_factory=dict)
+
+    #: Whether the export is streamed into the storage by a single task.
+    stream: bool = False
+
+    @property
+    def per_table(self) -> bool:
+        return (
+            not self.stream and self.exporter.exports_per_table and bool(self.exporter.tables)
+        )
+
+    @property
+    def num_tasks(self) -> int:
+        return len(self.exporter.tables) if self.per_table else 1
+
+    @property
+    def failures(self) -> list[ExportTableFailure]:
+        return [failure for _, failure in sorted(self.results.items()) if failure is not None]
+
+    @property
+    def file_paths(self) -> list[Path]:
+        export = self.context.export
+        return [
+            *export.table_paths(self.context.folder),
+            self.context.folder / export.filename_without_zip,
+        ]
+
+
+class ExportScheduler:
+    """Runs the exports of many datasets concurrently, on a pool of threads or processes.
+
+    Each table is exported by a separate task, unless the exporter writes a single file
+    (e.g. geopackage). Once all tables of an export are written, the zip and upload
+    of that export is done by another task. The files of a dataset are removed when
+    all its exports are finished, and at most ``2 * workers`` table tasks are queued,
+    so the disk usage stays bounded.
+
+    With ``stream``, an export is written into the zip file while it is uploaded,
+    by a single task (see :func:`stream_to_storage`). The exporters that need local files
+    (e.g. geopackage) still use the separate tasks.
+
+    With ``incremental``, an export is skipped when the fingerprint of its data
+    (see :meth:`BaseExporter.fingerprint`) is the same as that of the uploaded file.
+    The fingerprint is stored in the metadata of the uploaded file.
+
+    The exporters share an :class:`ExportPlanCache`, so the tables of a dataset
+    and the columns of a table are only determined once, not for every export.
+
+    The ``max_db_queries`` limits how many tables are queried at the same time,
+    so the other workers can zip and upload in the meantime. With threads, the pool
+    of the engine needs a connection for each query (see :func:`create_export_engine`).
+    The processes are forked, so the exporters don't need to be pickled. Each process
+    opens its own database connections.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        executor: str = "thread",
+        max_db_queries: int | None = None,
+        stream: bool = False,
+        incremental: bool = False,
+        cleanup: bool = True,
+    ):
+        if executor not in EXECUTOR_TYPES:
+            raise ValueError(
+                f"Invalid executor '{executor}', choose from: {', '.join(EXECUTOR_TYPES)}"
+            )
+        self.workers = max(1, workers)
+        self.executor = executor
+        self.max_db_queries = max(1, max_db_queries or self.workers)
+        self.stream = stream
+        self.incremental = incremental
+        self.cleanup = cleanup
+        self.plans = ExportPlanCache()
+        self.jobs: list[_ExportJob] = []
+
+    def add(self, dataset_name: str, context: ExportContext, metadata: dict[str, str]) -> None:
+        """Add an export, the exporter is already created here as this isn't thread-safe.
+
+        With ``incremental``, the export is not added when its data is unchanged.
+        When the fingerprint can't be determined, the export is added without it.
+        """
+        exporter = FILETYPE_TO_EXPORTER[context.export.filetype](context, plans=self.plans)
+        fingerprint = None
+        if self.incremental:
+            try:
+                fingerprint = exporter.fingerprint()
+            except Exception:  # noqa: BLE001
+                logger.warning(
+                    "Can't determine the fingerprint of %s.", context.export, exc_info=True
+                )
+        if fingerprint is not None:
+            if fingerprint == published_fingerprint(context):
+                logger.info("Export %s is unchanged; skipping.", context.export)
+                return
+            metadata = {**metadata, FINGERPRINT_METADATA_KEY: fingerprint}
+
+        stream = self.stream and exporter.streamable
+        self.jobs.append(_ExportJob(dataset_name, context, exporter, metadata, stream=stream))
+
+    def run(self) -> list[ExportTableFailure]:
+        """Run all exports, and give the failures in the order the exports were added."""
+        if self.executor == "process":
+            mp_context = multiprocessing.get_context("fork")
+            self._db_queries = mp_context.BoundedSemaphore(self.max_db_queries)
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=(self,),
+            )
+        else:
+            self._db_queries = threading.BoundedSemaphore(self.max_db_queries)
+            self._check_pool_size()
+            pool = ThreadPoolExecutor(max_workers=self.workers)
+
+        remaining_jobs = Counter(job.dataset_name for job in self.jobs)
+        self._remaining_tasks = {index: job.num_tasks for index, job in enumerate(self.jobs)}
+        self._num_slices: dict[tuple[int, int], int] = {}
+        self._remaining_slices: dict[tuple[int, int], int] = {}
+        self._slice_failures: dict[tuple[int, int], dict[int, ExportTableFailure]] = {}
+        tasks = iter(self._iter_table_tasks())
+        pending: dict[Future, tuple[str, int, Any]] = {}
+        try:
+            while True:
+                # Keep the queue short, so the files are published and removed early.
+                while len(pending) < self.workers * 2 and (task := next(tasks, None)):
+                    pending[self._submit(pool, *task)] = task
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    action, job_index, arg = pending.pop(future)
+                    job = self.jobs[job_index]
+                    if action == "publish":
+                        future.result()  # raises upload errors
+                    elif action == "slice":
+                        if merge_task := self._slice_done(job_index, arg, future.result()):
+                            pending[self._submit(pool, *merge_task)] = merge_task
+                    elif action in ("table", "merge"):
+                        table_index = arg[0] if action == "merge" else arg
+                        job.results[table_index] = future.result()
+                        self._remaining_tasks[job_index] -= 1
+                    else:  # export or stream
+                        job.results.update(enumerate(future.result()))
+                        self._remaining_tasks[job_index] -= 1
+
+                    if action != "publish":
+                        if self._remaining_tasks[job_index] > 0:
+                            continue
+                        if failures := job.failures:
+                            logger.error(
+                                "Export %s had %s table export failures; skipping publish.",
+                                job.context.export,
+                                len(failures),
+                            )
+                        elif action != "stream":
+                            task = ("publish", job_index, 0)
+                            pending[self._submit(pool, *task)] = task
+                            continue
+
+                    remaining_jobs[job.dataset_name] -= 1
+                    if remaining_jobs[job.dataset_name] == 0:
+                        self._finish_dataset(job.dataset_name)
+        finally:
+            # Stop quickly when an export failed unexpectedly.
+            pool.shutdown(cancel_futures=True)
+
+        return [failure for job in self.jobs for failure in job.failures]
+
+    def _iter_table_tasks(self) -> Iterator[tuple[str, int, Any]]:
+        dataset_name = None
+        for job_index, job in enumerate(self.jobs):
+            if job.dataset_name != dataset_name:
+                dataset_name = job.dataset_name
+                logger.info("Exporting dataset %s.", dataset_name)
+            logger.info("Exporting %s", job.context.export)
+            if job.stream:
+                yield "stream", job_index, 0
+            elif job.per_table:
+                for table_index, table in enumerate(job.exporter.tables):
+                    yield from self._iter_slice_tasks(job_index, table_index, table)
+            else:
+                yield "export", job_index, 0
+
+    def _iter_slice_tasks(
+        self, job_index: int, table_index: int, table: DatasetTableSchema
+    ) -> Iterator[tuple[str, int, Any]]:
+        """Split the table in slices, so these are exported by different workers."""
+        exporter = self.jobs[job_index].exporter
+        slices = None
+        if exporter.slice_size:
+            try:
+                with self._db_queries:
+                    slices = exporter.table_slices(table)
+            except Exception:  # noqa: BLE001
+                # The table task plans the slices again, and reports the failure.
+                logger.warning("Can't split %s in slices.", table.id, exc_info=True)
+        if slices is None:
+            yield "table", job_index, table_index
+            return
+
+        # The table task is replaced by the slice tasks and the merge task.
+        self._remaining_tasks[job_index] += len(slices)
+        self._num_slices[(job_index, table_index)] = len(slices)
+        self._remaining_slices[(job_index, table_index)] = len(slices)
+        for slice_index, (lower, upper) in enumerate(slices):
+            yield "slice", job_index, (table_index, slice_index, lower, upper)
+
+    def _slice_done(
+        self, job_index: int, arg: tuple, failure: ExportTableFailure | None
+    ) -> tuple[str, int, Any] | None:
+        """Register an exported slice, and give the merge task when all slices are done."""
+        table_index, slice_index = arg[:2]
+        key = (job_index, table_index)
+        if failure is not None:
+            self._slice_failures.setdefault(key, {})[slice_index] = failure
+        self._remaining_tasks[job_index] -= 1
+        self._remaining_slices[key] -= 1
+        if self._remaining_slices[key] > 0:
+            return None
+
+        if failures := self._slice_failures.get(key):
+            # Report the first failed slice, the merge task is not needed.
+            self.jobs[job_index].results[table_index] = failures[min(failures)]
+            self._remaining_tasks[job_index] -= 1
+            return None
+        return "merge", job_index, (table_index, self._num_slices[key])
+
+    def _submit(self, pool: Executor, action: str, job_index: int, arg: Any) -> Future:
+        if self.executor == "process":
+            return pool.submit(_run_worker_task, action, job_index, arg)
+        return pool.submit(self.run_task, action, job_index, arg)
+
+    def run_task(self, action: str, job_index: int, arg: Any) -> Any:
+        """Run a single task, in a thread or worker process.
+
+        The ``arg`` is the table position, or a tuple for the slice and merge tasks.
+        """
+        job = self.jobs[job_index]
+        exporter = job.exporter
+        if action == "publish":
+            zip_path = zip_files(job.context)
+            upload_to_storage(zip_path, job.context, job.metadata)
+            return None
+        if action == "merge":
+            table_index, num_slices = arg
+            exporter.merge_slices(exporter.tables[table_index], num_slices)
+            return None
+
+        with self._db_queries:
+            if action == "slice":
+                table_index, slice_index, lower, upper = arg
+                return exporter.export_slice(
+                    exporter.tables[table_index], slice_index, lower, upper
+                )
+            if action == "stream":
+                return stream_to_storage(exporter, job.context, job.metadata)
+            if action == "table":
+                return exporter.export_table(exporter.tables[arg])
+            return exporter.export_tables()
+
+    def _finish_dataset(self, dataset_name: str) -> None:
+        if self.cleanup:
+            remove_files(
+                [
+                    path
+                    for job in self.jobs
+                    if job.dataset_name == dataset_name
+                    for path in job.file_paths
+                ]
+            )
+
+    def _check_pool_size(self) -> None:
+        """Tell when the threads have to wait for a database connection."""
+        for engine in {id(job.exporter.engine): job.exporter.engine for job in self.jobs}.values():
+            pool = engine.pool
+            if (
+                isinstance(pool, QueuePool)
+                and pool.size() + pool._max_overflow < self.max_db_queries
+            ):
+                logger.warning(
+                    "The connection pool of %s is smaller than max_db_queries=%d.",
+                    engine.url,
+                    self.max_db_queries,
+                )
+
+
+#: The scheduler of a worker process, see :func:`_init_worker`.
+_worker_scheduler: ExportScheduler | None = None
+
+
+def _init_worker(scheduler: ExportScheduler) -> None:
+    """Initialize a forked worker process."""
+    global _worker_scheduler
+    _worker_scheduler = scheduler
+    for job in scheduler.jobs:
+        # The pooled connections of the parent process can't be shared.
+        job.exporter.engine.dispose(close=False)
+
+
+def _run_worker_task(action: str, job_index: int, arg: Any) -> Any:
+    return _worker_scheduler.run_task(action, job_index, arg)
@@ -1,18 +1,44 @@
 from __future__ import annotations
 
+import codecs
+import hashlib
+import io
 import logging
+import shutil
+import threading
 import time
+import zipfile
 from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 from datetime import datetime
-from typing import IO
+from pathlib import Path
+from typing import IO, Any
 
-from sqlalchemy import Column, MetaData, Table
+import orjson
+from psycopg import ClientCursor, sql
+from sqlalchemy import (
+    JSON,
+    Column,
+    Float,
+    MetaData,
+    Numeric,
+    Table,
+    Text,
+    and_,
+    cast,
+    func,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.sql import Select
 from sqlalchemy.sql.elements import ColumnElement
 
 from schematools.factories import tables_factory
 from schematools.types import (
     _PUBLIC_SCOPE,
     DatasetFieldSchema,
+    DatasetSchema,
     DatasetTableSchema,
     ExportContext,
     ExportTableFailure,
@@ -23,14 +49,96 @@ metadata = MetaData()
 
 logger = logging.getLogger(__name__)
 
+# The state of an ordinary table, see BaseExporter.fingerprint().
+TABLE_STATE_QUERY = text(
+    "SELECT c.relkind, c.relfilenode, s.n_tup_ins, s.n_tup_upd, s.n_tup_del"
+    " FROM pg_class c LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid"
+    " WHERE c.oid = to_regclass(:name)"
+)
+
+#: The lower and upper identifier values of a slice of a table, None for an open end.
+SliceBounds = tuple[list[Any] | None, list[Any] | None]
+
+# Let COPY write the values unchanged, using a quote and delimiter that don't occur in JSON.
+RAW_COPY_OPTIONS = "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'"
+
+
+def json_column(column: ColumnElement, is_json: bool = False) -> ColumnElement:
+    """Give the column as the JSON exporters write it, when the database builds the JSON.
+
+    Values that are already JSON text (e.g. from ST_AsGeoJSON) are embedded as JSON,
+    and decimals are written as strings, like the ``_default()`` of the orjson exporters.
+    """
+    if is_json:
+        return cast(column, JSON)
+    if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+        return cast(column, Text)
+    return column
+
+
+@dataclass(frozen=True)
+class TablePlan:
+    """What an exporter selects from a table, see :class:`ExportPlanCache`."""
+
+    #: The fields that are exported, after the scope checks and flattening.
+    fields: list[DatasetFieldSchema]
+    #: The columns of these fields (when available), with the processors applied.
+    columns: list[Column]
+
+
+class ExportPlanCache:
+    """The SQLAlchemy tables and the table plans, shared by the exporters of a run.
+
+    Without this, each exporter creates the tables of the whole dataset,
+    and checks the scopes of all fields of a table each time it is exported.
+    The tables are cached per dataset version, and the plans per dataset version,
+    scopes, exporter class and table.
+    """
+
+    def __init__(self):
+        self._tables: dict[tuple[str, str], dict[str, Table]] = {}
+        self._plans: dict[tuple, TablePlan] = {}
+        self._lock = threading.Lock()
+
+    def get_tables(self, dataset: DatasetSchema, version: str) -> dict[str, Table]:
+        """The SQLAlchemy tables of the dataset version."""
+        key = (dataset.id, version)
+        with self._lock:
+            if (sa_tables := self._tables.get(key)) is None:
+                sa_tables = self._tables[key] = tables_factory(dataset, metadata, version=version)
+        return sa_tables
+
+    def get_table_plan(self, exporter: BaseExporter, table: DatasetTableSchema) -> TablePlan:
+        """The fields and columns that the exporter selects from the table."""
+        key = (
+            exporter.dataset_schema.id,
+            exporter.export.version,
+            frozenset(exporter.scopes),
+            type(exporter),
+            table.id,
+        )
+        with self._lock:
+            if (plan := self._plans.get(key)) is None:
+                plan = self._plans[key] = exporter._build_table_plan(table)
+        return plan
+
 
 class BaseExporter:
     """Baseclass for exporting tables rows."""
 
     extension = ""
     processors: Iterable[Callable] = ()
+    #: Whether :meth:`write_rows` receives a binary file handle.
+    binary = False
+    #: Whether each table is written to a separate file by :meth:`export_table`,
+    #: so the tables can be exported concurrently.
+    exports_per_table = True
+    #: Whether the tables can be written into a zip stream by :meth:`stream_table`.
+    streamable = True
+    #: Whether the files of the slices of a table can be merged by :meth:`merge_slices`.
+    sliceable = True
 
-    def __init__(self, context: ExportContext):
+    def __init__(self, context: ExportContext, plans: ExportPlanCache | None = None):
         """Constructor.
 
         Args:
@@ -42,6 +150,10 @@ class BaseExporter:
             client: Storage client to upload the produced files.
             size: To produce a subset of the rows, mainly for testing.
             temporal_date: To produce a subset of the rows based on the temporal dimension.
+            use_copy: Let the database write the file, when the exporter supports this.
+            slice_size: Export the tables in slices of this number of rows,
+                so a failed export can continue with the failed slice.
+        plans: The cache of tables and table plans to share with other exporters.
         """
         self.engine = context.engine
         self.dataset_schema = context.dataset
@@ -49,13 +161,14 @@ class BaseExporter:
         self.scopes = context.export.scopes
         self.size = context.size
         self.temporal_date = context.temporal_date or datetime.now().astimezone()
+        self.use_copy = context.use_copy
+        self.slice_size = context.slice_size
 
         self.base_dir = context.folder
         self.base_dir.mkdir(exist_ok=True)
         self.tables = context.export.tables
-        self.sa_tables = tables_factory(
-            self.dataset_schema, metadata, version=context.export.version
-        )
+        self.plans = plans or ExportPlanCache()
+        self.sa_tables = self.plans.get_tables(self.dataset_schema, context.export.version)
 
     def _get_fields(self, table: DatasetTableSchema):
         dataset = self.dataset_schema
@@ -89,6 +202,16 @@ class BaseExporter:
             except AttributeError:
                 pass  # skip unavailable columns
 
+    def get_table_plan(self, table: DatasetTableSchema) -> TablePlan:
+        """The fields and columns to export, these are only determined once per table."""
+        return self.plans.get_table_plan(self, table)
+
+    def _build_table_plan(self, table: DatasetTableSchema) -> TablePlan:
+        return TablePlan(
+            fields=list(self._get_fields(table)),
+            columns=list(self._get_columns(self.sa_tables[table.id], table)),
+        )
+
     def _get_temporal_clause(
         self, sa_table: Table, table: DatasetTableSchema
     ) -> ColumnElement[bool] | None:
@@ -105,6 +228,31 @@ class BaseExporter:
             )
         return None
 
+    def fingerprint(self) -> str | None:
+        """A digest of the export definition and the data of its tables.
+
+        The data is represented by the file node of each table, which changes on a TRUNCATE
+        or when the table is replaced, and the number of inserted, updated and deleted rows
+        from the database statistics. These are cheap to query, but the statistics are
+        updated with a small delay, and a reset of the statistics only leads to an extra export.
+        Temporal tables are exported for the current date, so the date is part of the digest.
+        Returns None when this can't be determined, e.g. for views.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{self.export.filename}:{self.size}:{self.use_copy}".encode())
+        with self.engine.connect() as connection:
+            for table in self.tables:
+                sa_table = self.sa_tables[table.id]
+                name = connection.dialect.identifier_preparer.format_table(sa_table)
+                state = connection.execute(TABLE_STATE_QUERY, {"name": name}).one_or_none()
+                if state is None or state.relkind != "r":
+                    return None
+                digest.update(table.json().encode())
+                digest.update(repr(tuple(state)).encode())
+                if table.is_temporal:
+                    digest.update(self.temporal_date.date().isoformat().encode())
+        return digest.hexdigest()
+
     def export_tables(
         self,
         *,
@@ -115,63 +263,267 @@ class BaseExporter:
 
         Returns a list of structured failures (empty on success).
         """
-        failures: list[ExportTableFailure] = []
         for table in self.tables:
-            path = self.base_dir / self.export.table_filename(table.id)
-            if path.exists() and path.stat().st_size > 0:
-                logger.warning("File %s already exists. It will be skipped.", path.name)
-                continue
+            failure = self.export_table(
+                table, max_attempts=max_attempts, delay_seconds=delay_seconds
+            )
+            if failure is not None:
+                return [failure]
+        return []
 
-            srid = table.crs.split(":")[1] if table.crs else None
-            if table.has_geometry_fields and srid is None:
-                failures.append(
-                    ExportTableFailure(
-                        filename=self.export.filename_without_zip,
-                        table_id=table.id,
-                        error_type="ValueError",
-                        error_message="Table has geo fields, but srid is None.",
-                    )
+    def export_table(
+        self,
+        table: DatasetTableSchema,
+        *,
+        max_attempts: int = 3,
+        delay_seconds: int = 1,
+    ) -> ExportTableFailure | None:
+        """Export a single table to its own file, retrying the query when it fails.
+
+        Returns the structured failure, or None on success.
+        """
+        path = self.base_dir / self.export.table_filename(table.id)
+        if path.exists() and path.stat().st_size > 0:
+            logger.warning("File %s already exists. It will be skipped.", path.name)
+            return None
+
+        try:
+            columns, temporal_clause, srid = self._get_write_args(table)
+        except ValueError as exc:
+            return self._get_failure(table, exc)
+        if not columns:
+            return None
+        try:
+            slices = self.table_slices(table)
+        except Exception as exc:  # noqa: BLE001
+            return self._get_failure(table, exc)
+        if slices is not None:
+            for index, (lower, upper) in enumerate(slices):
+                failure = self.export_slice(
+                    table,
+                    index,
+                    lower,
+                    upper,
+                    max_attempts=max_attempts,
+                    delay_seconds=delay_seconds,
                 )
-                break
+                if failure is not None:
+                    return failure
+            self.merge_slices(table, len(slices))
+            return None
+        logger.info("Exporting %s.", path.name)
 
-            sa_table = self.sa_tables[table.id]
-            columns = list(self._get_columns(sa_table, table))
-            if not columns:
-                continue
-            temporal_clause = self._get_temporal_clause(sa_table, table)
-            logger.info("Exporting %s.", path.name)
-
-            last_exc: Exception | None = None
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    with path.open("w", encoding="utf8") as file_handle:
-                        self.write_rows(
-                            file_handle,
-                            table,
-                            columns,
-                            temporal_clause,
-                            srid,
-                        )
-                    last_exc = None
-                    break
-                except Exception as exc:  # noqa: BLE001
-                    last_exc = exc
-                    if attempt < max_attempts:
-                        time.sleep(delay_seconds)
-
-            if last_exc is not None:
-                failures.append(
-                    ExportTableFailure(
-                        filename=self.export.filename_without_zip,
-                        table_id=table.id,
-                        error_type=type(last_exc).__name__,
-                        error_message=str(last_exc),
+        last_exc: Exception | None = None
+        for attempt in range(1, max_attempts + 1):
+            try:
+                file_handle = path.open("wb") if self.binary else path.open("w", encoding="utf8")
+                with file_handle:
+                    self.write_rows(
+                        file_handle,
+                        table,
+                        columns,
+                        temporal_clause,
+                        srid,
                     )
+                return None
+            except Exception as exc:  # noqa: BLE001
+                last_exc = exc
+                if attempt < max_attempts:
+                    time.sleep(delay_seconds)
+
+        path.unlink()  # remove incomplete file
+        return self._get_failure(table, last_exc)
+
+    def table_slices(self, table: DatasetTableSchema) -> list[SliceBounds] | None:
+        """Split the table in slices of ``slice_size`` rows, ordered by the identifier.
+
+        The bounds of the slices are stored in a checkpoint file next to the table file,
+        so an interrupted export continues with the same slices. The slices together
+        always cover all rows, also when the data changed in the meantime.
+        Returns None when the table can't be exported in slices.
+        """
+        if not self.slice_size or not self.sliceable or self.size is not None:
+            return None
+        path = self.base_dir / self.export.table_filename(table.id)
+        if path.exists() and path.stat().st_size > 0:
+            return None  # skipped by export_table()
+        try:
+            columns = self._get_write_args(table)[0]
+        except ValueError:
+            return None  # reported by export_table()
+        if not columns:
+            return None
+        checkpoint_path = self._get_slice_path(table, "slices.json")
+        if checkpoint_path.exists():
+            return [tuple(bounds) for bounds in orjson.loads(checkpoint_path.read_bytes())]
+
+        sa_table = self.sa_tables[table.id]
+        keys = self._get_key_columns(sa_table, table)
+        if keys is None:
+            return None
+        numbered = select(*keys, func.row_number().over(order_by=keys).label("slice_row"))
+        if (temporal_clause := self._get_temporal_clause(sa_table, table)) is not None:
+            numbered = numbered.where(temporal_clause)
+        numbered = numbered.subquery()
+        query = (
+            select(*(numbered.c[key.name] for key in keys))
+            .where(numbered.c.slice_row % self.slice_size == 0)
+            .order_by(numbered.c.slice_row)
+        )
+        with self.engine.connect() as connection:
+            bounds = [list(row) for row in connection.execute(query)]
+
+        slices = list(zip([None, *bounds], [*bounds, None], strict=True))
+        checkpoint_path.write_bytes(orjson.dumps(slices))
+        return slices
+
+    def export_slice(
+        self,
+        table: DatasetTableSchema,
+        index: int,
+        lower: list[Any] | None,
+        upper: list[Any] | None,
+        *,
+        max_attempts: int = 3,
+        delay_seconds: int = 1,
+    ) -> ExportTableFailure | None:
+        """Export a slice of the table to a separate file, retrying the query when it fails.
+
+        A slice that was exported before is skipped, so only the failed slices are retried.
+        Returns the structured failure, or None on success.
+        """
+        part_path = self._get_slice_path(table, f"part{index:05d}")
+        if part_path.exists():
+            return None
+        try:
+            columns, temporal_clause, srid = self._get_write_args(table)
+        except ValueError as exc:
+            return self._get_failure(table, exc)
+
+        sa_table = self.sa_tables[table.id]
+        keys = tuple_(*self._get_key_columns(sa_table, table))
+        clauses = [] if temporal_clause is None else [temporal_clause]
+        if lower is not None:
+            clauses.append(keys > tuple_(*lower))
+        if upper is not None:
+            clauses.append(keys <= tuple_(*upper))
+        logger.info("Exporting slice %d of %s.", index, part_path.stem)
+
+        tmp_path = part_path.with_name(f"{part_path.name}.tmp")
+        last_exc: Exception | None = None
+        for attempt in range(1, max_attempts + 1):
+            try:
+                file_handle = (
+                    tmp_path.open("wb") if self.binary else tmp_path.open("w", encoding="utf8")
                 )
-                path.unlink()  # remove incomplete file
-                break
+                with file_handle:
+                    self.write_rows(
+                        file_handle,
+                        table,
+                        columns,
+                        and_(*clauses) if clauses else None,
+                        srid,
+                    )
+                tmp_path.replace(part_path)
+                return None
+            except Exception as exc:  # noqa: BLE001
+                last_exc = exc
+                if attempt < max_attempts:
+                    time.sleep(delay_seconds)
+
+        tmp_path.unlink(missing_ok=True)  # remove incomplete file
+        return self._get_failure(table, last_exc)
+
+    def merge_slices(self, table: DatasetTableSchema, num_slices: int) -> None:
+        """Combine the files of the slices into the table file, and remove these."""
+        path = self.base_dir / self.export.table_filename(table.id)
+        part_paths = [self._get_slice_path(table, f"part{i:05d}") for i in range(num_slices)]
+        tmp_path = path.with_name(f"{path.name}.merging")
+        with tmp_path.open("wb") as output:
+            self.merge_parts(part_paths, output)
+        tmp_path.replace(path)
+        for part_path in part_paths:
+            part_path.unlink()
+        self._get_slice_path(table, "slices.json").unlink()
+
+    def merge_parts(self, part_paths: list[Path], output: IO[bytes]) -> None:
+        """Write the files of the slices as a single file, these are concatenated by default."""
+        for part_path in part_paths:
+            with part_path.open("rb") as part:
+                shutil.copyfileobj(part, output)
+
+    def _get_slice_path(self, table: DatasetTableSchema, suffix: str) -> Path:
+        return self.base_dir / f"{self.export.table_filename(table.id)}.{suffix}"
+
+    def _get_key_columns(self, sa_table: Table, table: DatasetTableSchema) -> list[Column] | None:
+        try:
+            return [getattr(sa_table.c, field.db_name) for field in table.identifier_fields]
+        except AttributeError:
+            return None  # e.g. relation fields that are stored in other columns
+
+    def stream_table(
+        self, zip_file: zipfile.ZipFile, table: DatasetTableSchema
+    ) -> ExportTableFailure | None:
+        """Export a single table into a new entry of the zip file.
+
+        As the written data can't be taken back, the query is not retried.
+        Returns the structured failure, or None on success.
+        """
+        try:
+            columns, temporal_clause, srid = self._get_write_args(table)
+            if not columns:
+                return None
+            filename = self.export.table_filename(table.id)
+            logger.info("Exporting %s.", filename)
+            with zip_file.open(filename, "w", force_zip64=True) as entry:
+                file_handle = entry if self.binary else io.TextIOWrapper(entry, encoding="utf8")
+                with file_handle:
+                    self.write_rows(file_handle, table, columns, temporal_clause, srid)
+        except Exception as exc:  # noqa: BLE001
+            return self._get_failure(table, exc)
+        return None
+
+    def _get_write_args(
+        self, table: DatasetTableSchema
+    ) -> tuple[list[Column], ColumnElement[bool] | None, str | None]:
+        srid = table.crs.split(":")[1] if table.crs else None
+        if table.has_geometry_fields and srid is None:
+            raise ValueError("Table has geo fields, but srid is None.")
+
+        columns = self.get_table_plan(table).columns
+        return columns, self._get_temporal_clause(self.sa_tables[table.id], table), srid
 
-        return failures
+    def _get_failure(self, table: DatasetTableSchema, exc: Exception) -> ExportTableFailure:
+        return ExportTableFailure(
+            filename=self.export.filename_without_zip,
+            table_id=table.id,
+            error_type=type(exc).__name__,
+            error_message=str(exc),
+        )
+
+    def copy_query(
+        self, file_handle: IO[str], query: Select, options: str = RAW_COPY_OPTIONS
+    ) -> None:
+        """Let the database write the rows, using ``COPY (SELECT ...) TO STDOUT``.
+
+        The output of the database is streamed into the file as-is.
+        By default, the query should give a single column of text lines, e.g. JSON.
+        """
+        with self.engine.connect() as connection:
+            compiled = query.compile(connection)
+            statement = sql.SQL("COPY ({query}) TO STDOUT WITH ({options})").format(
+                query=sql.SQL(str(compiled)), options=sql.SQL(options)
+            )
+            # COPY doesn't accept server-side parameters, so bind these at the client.
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            raw_connection = connection.connection.driver_connection
+            with (
+                ClientCursor(raw_connection) as cursor,
+                cursor.copy(statement, compiled.params) as copy,
+            ):
+                for data in copy:
+                    file_handle.write(decoder.decode(data))
+            file_handle.write(decoder.decode(b"", final=True))
 
     def write_rows(  # noqa: D102
         self,
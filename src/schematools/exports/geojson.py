@@ -2,19 +2,23 @@ from __future__ import annotations
 
 from collections.abc import Iterable
 from decimal import Decimal
+from pathlib import Path
 from typing import IO, Any
 
 import orjson
-from sqlalchemy import Column, MetaData, select
+from sqlalchemy import Column, MetaData, case, func, select, true
 from sqlalchemy.sql.elements import ColumnElement
 
-from schematools.exports.base import BaseExporter
+from schematools.exports.base import BaseExporter, json_column
 from schematools.exports.modifiers import geo_modifier_geojson, id_modifier
 from schematools.naming import toCamelCase
 from schematools.types import DatasetTableSchema
 
 metadata = MetaData()
 
+FEATURE_COLLECTION_START = '{"type": "FeatureCollection", "features": ['
+FEATURE_COLLECTION_END = "]}"
+
 
 def _default(obj: Any) -> str:
     if isinstance(obj, Decimal):
@@ -39,6 +43,10 @@ class GeoJsonExporter(BaseExporter):
         temporal_clause: ColumnElement[bool] | None,
         srid: str | None,
     ):
+        if self.use_copy:
+            self._copy_rows(file_handle, table, columns, temporal_clause)
+            return
+
         query = select(*columns)
         if temporal_clause is not None:
             query = query.where(temporal_clause)
@@ -47,7 +55,7 @@ class GeoJsonExporter(BaseExporter):
 
         try:
             # Write header
-            file_handle.write('{"type": "FeatureCollection", "features": [')
+            file_handle.write(FEATURE_COLLECTION_START)
 
             first_feature = True
             with (
@@ -95,7 +103,89 @@ class GeoJsonExporter(BaseExporter):
                         except OSError:
                             raise  # Re-raise file writing errors
 
-            file_handle.write("]}")
+            file_handle.write(FEATURE_COLLECTION_END)
+        except OSError as e:
+            raise OSError(f"Failed to write GeoJSON file: {e!s}") from e
+
+    def merge_parts(self, part_paths: list[Path], output: IO[bytes]) -> None:
+        """Combine the features of the feature collections of the slices."""
+        start = FEATURE_COLLECTION_START.encode()
+        end = FEATURE_COLLECTION_END.encode()
+        output.write(start)
+        has_features = False
+        for part_path in part_paths:
+            num_bytes = part_path.stat().st_size - len(start) - len(end)
+            if num_bytes <= 0:
+                continue  # no features
+            if has_features:
+                output.write(b",")
+            with part_path.open("rb") as part:
+                part.seek(len(start))
+                while num_bytes > 0 and (data := part.read(min(num_bytes, 1024 * 1024))):
+                    output.write(data)
+                    num_bytes -= len(data)
+            has_features = True
+        output.write(end)
+
+    def _copy_rows(
+        self,
+        file_handle: IO[str],
+        table: DatasetTableSchema,
+        columns: Iterable[Column],
+        temporal_clause: ColumnElement[bool] | None,
+    ):
+        """Let the database build the features, and stream these using COPY TO STDOUT.
+
+        Like :meth:`write_rows`, the geometry fields are left out of the properties,
+        and rows without a geometry are skipped. Each feature is written on its own line.
+        """
+        geo_names = {field.db_name for field in table.fields if field.is_geo}
+        columns = list(columns)
+        geo_columns = [column for column in columns if column.name in geo_names]
+        property_names = [toCamelCase(c.name) for c in columns if c.name not in geo_names]
+        if not geo_columns:
+            # There are no features without a geometry.
+            file_handle.write(FEATURE_COLLECTION_START + FEATURE_COLLECTION_END)
+            return
+
+        query = select(
+            *(
+                json_column(column).label(toCamelCase(column.name))
+                for column in columns
+                if column.name not in geo_names
+            ),
+            # The last geometry is used, just like write_rows() does.
+            func.coalesce(*reversed(geo_columns)).label("_geometry"),
+        )
+        if temporal_clause is not None:
+            query = query.where(temporal_clause)
+        if self.size is not None:
+            query = query.limit(self.size)
+
+        feature = query.subquery("feature")
+        properties = select(*(feature.c[name] for name in property_names)).lateral("properties")
+        features = (
+            select(
+                func.concat(
+                    case((func.row_number().over() > 1, ","), else_=""),
+                    func.json_build_object(
+                        "type",
+                        "Feature",
+                        "properties",
+                        func.to_json(properties.table_valued()),
+                        "geometry",
+                        json_column(feature.c["_geometry"], is_json=True),
+                    ),
+                )
+            )
+            .select_from(feature.join(properties, true()))
+            .where(feature.c["_geometry"].is_not(None))
+        )
+
+        try:
+            file_handle.write(FEATURE_COLLECTION_START)
+            self.copy_query(file_handle, features)
+            file_handle.write(FEATURE_COLLECTION_END)
         except OSError as e:
             raise OSError(f"Failed to write GeoJSON file: {e!s}") from e
 
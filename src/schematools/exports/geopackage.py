@@ -14,6 +14,9 @@ logger = logging.getLogger(__name__)
 
 class GeopackageExporter(BaseExporter):
     extension = "gpkg"
+    # The tables are merged into a single file afterwards.
+    exports_per_table = False
+    streamable = False
 
     def export_tables(
         self,
@@ -46,7 +49,7 @@ class GeopackageExporter(BaseExporter):
             logger.info("Exporting %s.", filename)
             field_names = sql.SQL(",").join(
                 sql.Identifier(field.db_name)
-                for field in self._get_fields(table)
+                for field in self.get_table_plan(table).fields
                 if field.db_name != "schema"
             )
             if not next(field_names.__iter__(), None):
@@ -6,11 +6,11 @@ from typing import IO, Any
 
 import jsonlines
 import orjson
-from sqlalchemy import Column, MetaData, select
+from sqlalchemy import Column, MetaData, func, select
 from sqlalchemy.sql import Select
 from sqlalchemy.sql.elements import ColumnElement
 
-from schematools.exports.base import BaseExporter
+from schematools.exports.base import BaseExporter, json_column
 from schematools.exports.modifiers import geo_modifier_geojson, id_modifier
 from schematools.naming import toCamelCase
 from schematools.types import DatasetTableSchema
@@ -58,6 +58,10 @@ class JsonLinesExporter(BaseExporter):  # noqa: D101
         temporal_clause: ColumnElement[bool] | None,
         srid: str | None,
     ):
+        if self.use_copy:
+            self._copy_rows(file_handle, table, columns, temporal_clause)
+            return
+
         writer = jsonlines.Writer(file_handle, dumps=_dumps)  # ty:ignore[unknown-argument]
         row_modifier = self._get_row_modifier(table)
         query: Select = select(*columns)
@@ -71,3 +75,28 @@ class JsonLinesExporter(BaseExporter):  # noqa: D101
             for partition in result.mappings().partitions():
                 for r in partition:
                     writer.write({toCamelCase(k): row_modifier[k](v) for k, v in r.items()})
+
+    def _copy_rows(
+        self,
+        file_handle: IO[str],
+        table: DatasetTableSchema,
+        columns: Iterable[Column],
+        temporal_clause: ColumnElement[bool] | None,
+    ):
+        """Let the database build the JSON lines, and stream these using COPY TO STDOUT."""
+        json_names = {
+            field.db_name for field in table.fields if field.is_geo or field.is_nested_object
+        }
+        query: Select = select(
+            *(
+                json_column(column, column.name in json_names).label(toCamelCase(column.name))
+                for column in columns
+            )
+        )
+        if temporal_clause is not None:
+            query = query.where(temporal_clause)
+        if self.size is not None:
+            query = query.limit(self.size)
+
+        line = query.subquery("line")
+        self.copy_query(file_handle, select(func.to_json(line.table_valued())))
@@ -18,6 +18,12 @@ def geo_modifier_geojson(field: DatasetFieldSchema, column):
     return func.ST_AsGeoJSON(func.ST_Transform(column, 4326)).label(field.db_name)
 
 
+def geo_modifier_wkb(field: DatasetFieldSchema, column):
+    if not field.is_geo:
+        return column
+    return gfunc.ST_AsBinary(column).label(field.db_name)
+
+
 def id_modifier(field: DatasetFieldSchema, column):
     # We need an extra check for old relation definitions
     # that are defined as plain strings in the amsterdam schema
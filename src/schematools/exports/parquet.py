@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from decimal import Decimal
+from typing import IO, Any
+
+import orjson
+from sqlalchemy import Column, MetaData, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from schematools import SRID_3D
+from schematools.exports.base import BaseExporter
+from schematools.exports.modifiers import geo_modifier_wkb, id_modifier
+from schematools.naming import toCamelCase
+from schematools.types import DatasetFieldSchema, DatasetTableSchema
+
+metadata = MetaData()
+
+# Each batch of rows is written as a row group of the parquet file.
+BATCH_SIZE = 100_000
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "Exporting parquet files requires the 'pyarrow' package, "
+            "install it with: pip install amsterdam-schema-tools[parquet]"
+        ) from None
+    return pa, pq
+
+
+def _arrow_type(pa, field: DatasetFieldSchema):
+    """The Arrow type for the values of a field, like the database column of the factories."""
+    if field.is_geo:
+        return pa.binary()  # WKB
+    if field.format is not None:
+        return {
+            "date": pa.date32(),
+            "time": pa.time64("us"),
+            "date-time": pa.timestamp("us"),
+        }.get(field.format, pa.string())
+    if field.is_array:
+        return pa.list_(pa.string())
+    return {
+        "boolean": pa.bool_(),
+        "integer": pa.int64(),
+        "integer/autoincrement": pa.int64(),
+        "number": pa.float64(),
+    }.get(field.type, pa.string())
+
+
+def _converter(field: DatasetFieldSchema) -> Callable[[Any], Any] | None:
+    """Convert the values that Arrow can't take as-is."""
+    if field.format == "json":
+        return lambda v: orjson.dumps(v).decode("utf-8") if v is not None else v
+    if field.type == "number" and not field.is_geo:
+        return lambda v: float(v) if isinstance(v, Decimal) else v
+    return None
+
+
+def _geo_metadata(fields: list[DatasetFieldSchema]) -> dict:
+    """The GeoParquet metadata for the geometry columns."""
+    columns = {}
+    for field in fields:
+        geometry_type = field.type.rsplit("/", 1)[-1].removesuffix(".json")
+        if field.srid in SRID_3D:
+            geometry_type += " Z"
+        columns[toCamelCase(field.db_name)] = {
+            "encoding": "WKB",
+            "geometry_types": [] if geometry_type.startswith("Geometry") else [geometry_type],
+            "crs": {"id": {"authority": "EPSG", "code": field.srid}} if field.srid else None,
+        }
+    return {"version": "1.1.0", "primary_column": next(iter(columns)), "columns": columns}
+
+
+class ParquetExporter(BaseExporter):
+    """Export the tables as (Geo)Parquet files, compressed with zstd.
+
+    The geometries are written as WKB, with the GeoParquet metadata in the file schema.
+    """
+
+    extension = "parquet"
+    binary = True
+    # The parquet writer needs a seekable file, and the files can't be concatenated.
+    streamable = False
+    sliceable = False
+
+    processors = (geo_modifier_wkb, id_modifier)
+
+    def write_rows(  # noqa: D102
+        self,
+        file_handle: IO[bytes],
+        table: DatasetTableSchema,
+        columns: Iterable[Column],
+        temporal_clause: ColumnElement[bool] | None,
+        srid: str | None,
+    ):
+        pa, pq = _import_pyarrow()
+        columns = list(columns)
+        fields_by_name = {field.db_name: field for field in self.get_table_plan(table).fields}
+        fields = [fields_by_name[column.name] for column in columns]
+        schema = pa.schema(
+            [
+                pa.field(toCamelCase(column.name), _arrow_type(pa, field))
+                for column, field in zip(columns, fields, strict=True)
+            ]
+        )
+        if geo_fields := [field for field in fields if field.is_geo]:
+            schema = schema.with_metadata({"geo": orjson.dumps(_geo_metadata(geo_fields))})
+        converters = [_converter(field) for field in fields]
+
+        query = select(*columns)
+        if temporal_clause is not None:
+            query = query.where(temporal_clause)
+        if self.size is not None:
+            query = query.limit(self.size)
+
+        with (
+            pq.ParquetWriter(file_handle, schema, compression="zstd") as writer,
+            self.engine.execution_options(
+                stream_results=True, max_row_buffer=BATCH_SIZE
+            ).connect() as connection,
+            connection.execute(query) as result,
+        ):
+            for partition in result.partitions(size=BATCH_SIZE):
+                values = list(zip(*partition, strict=True))
+                writer.write_batch(
+                    pa.record_batch(
+                        [
+                            pa.array(
+                                list(map(converter, column)) if converter else column,
+                                type=arrow_field.type,
+                            )
+                            for column, converter, arrow_field in zip(
+                                values, converters, schema, strict=True
+                            )
+                        ],
+                        schema=schema,
+                    )
+                )
@@ -0,0 +1,157 @@
+"""Stream the exports into the storage, without writing local files."""
+
+from __future__ import annotations
+
+import dataclasses
+import io
+import queue
+import shutil
+from pathlib import Path
+from typing import Any
+
+# The size of the chunks that are passed from the writer to the reader of the pipe.
+CHUNK_SIZE = 1024 * 1024
+
+_EOF = object()
+
+
+class StreamPipe(io.RawIOBase):
+    """A bounded in-memory pipe, to upload the data while another thread writes it.
+
+    The reader side is this (non-seekable) file object, which can be passed to
+    ``upload_blob()``. The writer side is :attr:`writer`, e.g. for a :class:`zipfile.ZipFile`.
+    At most ``max_chunks`` chunks are buffered, so the writer waits for a slow upload.
+    When the writer fails, it calls :meth:`abort` so the upload fails as well,
+    instead of publishing a truncated file.
+    """
+
+    def __init__(self, max_chunks: int = 8):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = b""
+        self._eof = False
+        self._reader_closed = False
+        self.writer = _PipeWriter(self)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._buffer and not self._eof:
+            item = self._queue.get()
+            if item is _EOF:
+                self._eof = True
+            elif isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            else:
+                self._buffer = item
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self) -> None:
+        """Close the reader side, a writer that is still busy gets a BrokenPipeError."""
+        self._reader_closed = True
+        super().close()
+
+    def abort(self, exc: BaseException) -> None:
+        """Let the reader raise the exception, instead of reading the end of the data."""
+        self._put(exc)
+
+    def _put(self, item: Any) -> None:
+        while True:
+            if self._reader_closed:
+                raise BrokenPipeError("The reader of the pipe is closed.")
+            try:
+                self._queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+
+class _PipeWriter:
+    """The writer side of the :class:`StreamPipe`, collects the data in chunks.
+
+    This has no ``tell()`` and ``seek()``, so :class:`zipfile.ZipFile` writes a streamed zip.
+    """
+
+    def __init__(self, pipe: StreamPipe):
+        self._pipe = pipe
+        self._chunk = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._chunk += data
+        if len(self._chunk) >= CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._chunk:
+            self._pipe._put(bytes(self._chunk))
+            self._chunk.clear()
+
+    def close(self) -> None:
+        """Tell the reader that all data is written."""
+        self.flush()
+        self._pipe._put(_EOF)
+
+
+@dataclasses.dataclass
+class LocalBlobProperties:
+    metadata: dict[str, str]
+
+
+class LocalStorageClient:
+    """A storage client that writes the uploaded blobs into a local folder.
+
+    This has the same interface as the Azure Blob Storage client that is used for the exports,
+    for testing the exports without a storage account.
+    The metadata of the blobs is kept in :attr:`metadata`.
+    """
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+        self.metadata: dict[str, dict[str, Any] | None] = {}
+
+    def get_container_client(self, container_name: str) -> LocalContainerClient:
+        return LocalContainerClient(self, container_name)
+
+
+class LocalContainerClient:
+    def __init__(self, storage_client: LocalStorageClient, name: str):
+        self.storage_client = storage_client
+        self.name = name
+
+    def get_blob_client(self, blob_name: str) -> LocalBlobClient:
+        return LocalBlobClient(self.storage_client, f"{self.name}/{blob_name}")
+
+
+class LocalBlobClient:
+    def __init__(self, storage_client: LocalStorageClient, name: str):
+        self.storage_client = storage_client
+        self.name = name
+
+    def upload_blob(
+        self, data: io.RawIOBase | io.BufferedIOBase, overwrite: bool, metadata: dict | None
+    ) -> None:
+        path = self.storage_client.root / self.name
+        if path.exists() and not overwrite:
+            raise FileExistsError(f"Blob {self.name} already exists.")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so a failed upload doesn't leave a partial blob.
+        tmp_path = path.with_name(f"{path.name}.uploading")
+        try:
+            with tmp_path.open("wb") as blob:
+                shutil.copyfileobj(data, blob, CHUNK_SIZE)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        tmp_path.replace(path)
+        self.storage_client.metadata[self.name] = metadata
+
+    def get_blob_properties(self) -> LocalBlobProperties:
+        if not (self.storage_client.root / self.name).exists():
+            raise FileNotFoundError(f"Blob {self.name} does not exist.")
+        return LocalBlobProperties(metadata=self.storage_client.metadata.get(self.name) or {})
@@ -1,27 +1,60 @@
 from __future__ import annotations
 
+import dataclasses
 import logging
+import operator
+import re
+import time
 from collections import defaultdict
-from collections.abc import Iterator
-from contextlib import closing
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, closing, contextmanager
 from functools import cached_property
 from itertools import islice
 from pathlib import Path
-from typing import Any, Final, TypeVar
+from typing import Any, BinaryIO, Final, TypeVar
 
 import click
 import jsonpath_rw
+import orjson
 from psycopg import sql
 from psycopg.errors import DuplicateSchema
-from sqlalchemy import Boolean, exc, inspect, select, text
+from psycopg.types.json import Json
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    cast,
+    column,
+    delete,
+    exc,
+    inspect,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy import table as lightweight_table
+from sqlalchemy.dialects.postgresql import JSONB, Insert, insert
 from sqlalchemy.dialects.postgresql.base import PGInspector
-from sqlalchemy.engine.base import Engine
+from sqlalchemy.engine.base import Connection, Engine
 from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.sql.ddl import CreateSchema
 from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.sql.schema import Index, MetaData, Table
 
-from schematools.factories import index_factory, tables_factory, views_factory
+from schematools import MAX_TABLE_NAME_LENGTH, TMP_TABLE_POSTFIX
+from schematools.factories import (
+    _format_index_name,
+    index_factory,
+    tables_factory,
+    views_factory,
+)
+from schematools.importer.dedup import (
+    DEDUP_BACKENDS,
+    DatabaseKeyIndex,
+    DigestKeyIndex,
+    MemoryKeyIndex,
+)
+from schematools.importer.metrics import BatchMetrics, ImportMetrics, MetricsSink
 from schematools.types import DatasetSchema, DatasetTableSchema
 
 metadata = MetaData()
@@ -54,6 +87,34 @@ IS_VERSIONED_DATASET_SQL: Final[TextClause] = text(
 
 T = TypeVar("T")
 
+#: The JSONPath syntax that :func:`compile_json_path` supports: fields and array indexes.
+SIMPLE_JSON_PATH = re.compile(r"\$(?:\.[A-Za-z_][A-Za-z0-9_]*|\[[0-9]+\])*")
+JSON_PATH_STEP = re.compile(r"\.([A-Za-z_][A-Za-z0-9_]*)|\[([0-9]+)\]")
+
+KeyIndex = MemoryKeyIndex | DigestKeyIndex | DatabaseKeyIndex | set
+
+#: Number of existing primary keys that are read at once into the duplicate lookup.
+PK_FETCH_SIZE = 50_000
+
+#: Field in the source records that marks a record as deleted, when importing with ``upsert``.
+TOMBSTONE_FIELD = "_deleted"
+
+#: Number of tables for which the indexes are created concurrently after an import.
+DEFAULT_INDEX_WORKERS = 4
+
+#: The indexes and sequences that belong to a table, these are renamed when the table is swapped.
+TABLE_DEPENDENCIES_SQL: Final[str] = """
+    SELECT c.relkind, c.relname FROM pg_class c
+    WHERE c.oid IN (
+        SELECT indexrelid FROM pg_index WHERE indrelid = %(table)s::regclass
+        UNION
+        SELECT objid FROM pg_depend
+            WHERE refobjid = %(table)s::regclass
+              AND classid = 'pg_class'::regclass
+              AND deptype IN ('a', 'i')  -- owned sequences of serial and identity columns
+    ) AND c.relkind IN ('i', 'S')
+"""
+
 
 def chunked(stream: Iterator[T], size: int) -> Iterator[list[T]]:
     """Read parts of the generator, pause each time after a chunk."""
@@ -73,28 +134,69 @@ class JsonPathException(Exception):
 class Provenance:
     """Handler for the 'provenance' of a single field.
     This can resolve a field from an alias or JSONPath syntax.
+
+    Simple JSONPath expressions (e.g. ``$.a.b[0].c``) are compiled into a plain getter
+    function, any other expression is resolved by jsonpath_rw.
     """
 
     def __init__(self, provenance: str):
         self.provenance: str = provenance
-        self._json_path: jsonpath_rw.Child | None = (
-            jsonpath_rw.parse(provenance) if provenance.startswith("$") else None
-        )
+        self._json_path: jsonpath_rw.Child | None = None
+        #: The function that reads the value from the source record.
+        #: It raises LookupError when the value doesn't exist.
+        self.getter: Callable[[Any], Any]
+        if not provenance.startswith("$"):
+            # Alias name lookup
+            self.getter = operator.itemgetter(provenance)
+        elif (getter := compile_json_path(provenance)) is not None:
+            self.getter = getter
+        else:
+            self._json_path = jsonpath_rw.parse(provenance)
+            self.getter = self._find_json_path
 
     def __repr__(self):
         return f"Provenance({self.provenance!r})"
 
     def resolve(self, source: dict) -> Any:
         """Resolve provenance entries, return the value."""
-        if self._json_path is not None:
-            # JSONPath lookup
-            matches = self._json_path.find(source)
-            if not matches:
-                raise LookupError(self.provenance)
-            return matches[0].value
-        else:
-            # Alias name lookup
-            return source[self.provenance]
+        return self.getter(source)
+
+    def _find_json_path(self, source: dict) -> Any:
+        """JSONPath lookup for expressions that can't be compiled."""
+        matches = self._json_path.find(source)
+        if not matches:
+            raise LookupError(self.provenance)
+        return matches[0].value
+
+
+def compile_json_path(json_path: str) -> Callable[[Any], Any] | None:
+    """Compile a simple JSONPath expression (e.g. ``$.a.b[0].c``) into a getter function.
+
+    This avoids the overhead of jsonpath_rw, which creates match objects
+    with their full path for every lookup. The getter raises LookupError
+    when the value doesn't exist, just like a JSONPath without matches.
+    Like jsonpath_rw, an array element is returned when it's falsy (e.g. ``0``, ``""``,
+    ``None`` or ``[]``); only an index beyond the end of the array has no value.
+    Returns None when the expression uses other JSONPath syntax.
+    """
+    if not SIMPLE_JSON_PATH.fullmatch(json_path):
+        return None
+
+    keys = tuple(
+        int(index) if index else name for name, index in JSON_PATH_STEP.findall(json_path)
+    )
+
+    def get_value(source: Any) -> Any:
+        value = source
+        try:
+            for key in keys:
+                value = value[key]
+        except (KeyError, IndexError, TypeError):
+            # TypeError happens for a field of a non-object, or index of a non-array.
+            raise LookupError(json_path) from None
+        return value
+
+    return get_value
 
 
 class Record(dict):
@@ -116,25 +218,271 @@ class Record(dict):
         return f"Record({data_repr}, source={self.source!r})"
 
 
+class RejectedRecord(dict):
+    """A source record that failed the validation while parsing.
+    This has no rows to write, but still counts as a processed source record.
+    The ``source`` is the parsed object, or the raw line when it isn't valid JSON.
+    """
+
+    def __init__(self, source: dict | str, reason: str):
+        super().__init__()
+        self.source = source
+        self.reason = reason
+
+    def __repr__(self):
+        return f"RejectedRecord({self.reason!r}, source={self.source!r})"
+
+
+def table_identifier(table: Table) -> sql.Identifier:
+    """Give the (schema qualified) identifier of a table, for raw SQL statements."""
+    if table.schema:
+        return sql.Identifier(table.schema, table.name)
+    return sql.Identifier(table.name)
+
+
+def staging_table_name(table_name: str) -> str:
+    """The name of the table that is imported into before it replaces ``table_name``."""
+    return table_name[: MAX_TABLE_NAME_LENGTH - len(TMP_TABLE_POSTFIX)] + TMP_TABLE_POSTFIX
+
+
+def copy_records(
+    conn: Connection,
+    table: Table,
+    records: list[Record],
+    skip_duplicates: bool = False,
+    upsert: bool = False,
+) -> int:
+    """Write the records into the table using ``COPY ... FROM STDIN``.
+
+    This avoids the per-row parameter binding of an ``executemany()`` INSERT.
+    Only the columns that occur in the records are part of the COPY statement,
+    so columns with a server-side default (e.g. the serial ``id`` of through tables)
+    are still filled by the database. Missing values in a single record become NULL,
+    just like the INSERT statement would do.
+
+    As COPY can't skip existing rows, ``skip_duplicates`` copies the records into
+    a temporary staging table first, which is inserted using ``ON CONFLICT DO NOTHING``.
+    Likewise, ``upsert`` inserts the staging table using ``ON CONFLICT DO UPDATE``
+    (see :func:`upsert_statement`). Returns the number of written rows.
+    """
+    keys = set().union(*records)
+    columns = [column for column in table.columns if column.name in keys]
+    names = [column.name for column in columns]
+    json_names = {column.name for column in columns if isinstance(column.type, JSON)}
+    column_list = sql.SQL(", ").join(map(sql.Identifier, names))
+    target = table_identifier(table)
+    staging = sql.Identifier("import_staging")
+    use_staging = skip_duplicates or upsert
+
+    if not conn.in_transaction():
+        # Make sure SQLAlchemy knows about the transaction, so a conn.commit() is not ignored.
+        conn.begin()
+
+    # The raw psycopg connection takes part in the same transaction as the SQLAlchemy one.
+    raw_connection = conn.connection.driver_connection
+    with raw_connection.cursor() as cursor:
+        if use_staging:
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS pg_temp.{}").format(staging))
+            cursor.execute(
+                sql.SQL("CREATE TEMP TABLE {} AS SELECT {} FROM {} WITH NO DATA").format(
+                    staging, column_list, target
+                )
+            )
+
+        copy_statement = sql.SQL("COPY {table} ({columns}) FROM STDIN").format(
+            table=staging if use_staging else target, columns=column_list
+        )
+        with cursor.copy(copy_statement) as copy:
+            for record in records:
+                row = [record.get(name) for name in names]
+                if json_names:
+                    # psycopg has no default adapter for dicts, tell it these are JSON values.
+                    row = [
+                        Json(value) if name in json_names and value is not None else value
+                        for name, value in zip(names, row, strict=True)
+                    ]
+                copy.write_row(row)
+
+        if not use_staging:
+            return len(records)
+
+        if upsert:
+            staging_table = lightweight_table(
+                "import_staging", *map(column, names), schema="pg_temp"
+            )
+            statement = upsert_statement(table, names).from_select(
+                names, select(*staging_table.columns)
+            )
+            return conn.execute(statement).rowcount
+
+        cursor.execute(
+            sql.SQL(
+                "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging}"
+                " ON CONFLICT DO NOTHING"
+            ).format(table=target, columns=column_list, staging=staging)
+        )
+        return cursor.rowcount
+
+
+def upsert_statement(table: Table, names: list[str]) -> Insert:
+    """Create an ``INSERT ... ON CONFLICT DO UPDATE`` statement for the given columns.
+
+    Existing rows are only updated when a value is changed, so unchanged rows
+    don't produce dead tuples (and the related vacuum and WAL costs).
+    """
+    statement = insert(table)
+    pk_names = [pk_column.name for pk_column in table.primary_key.columns]
+    update_names = [name for name in names if name not in pk_names]
+    if not update_names:
+        return statement.on_conflict_do_nothing(index_elements=pk_names)
+
+    def _comparable(value):
+        # The json type has no equality operator, jsonb does.
+        if isinstance(value.type, JSON) and not isinstance(value.type, JSONB):
+            return cast(value, JSONB)
+        return value
+
+    return statement.on_conflict_do_update(
+        index_elements=pk_names,
+        set_={name: statement.excluded[name] for name in update_names},
+        where=tuple_(*(_comparable(table.c[name]) for name in update_names)).is_distinct_from(
+            tuple_(*(_comparable(statement.excluded[name]) for name in update_names))
+        ),
+    )
+
+
+@dataclasses.dataclass
+class CommitPolicy:
+    """Determine how often the importer commits its transaction.
+
+    By default, every chunk is committed. With ``rows`` and/or ``seconds``, the import
+    commits once enough records are written or enough time has passed.
+    With ``single_transaction``, the whole file is imported in one transaction.
+    """
+
+    rows: int | None = None
+    seconds: float | None = None
+    single_transaction: bool = False
+
+    def should_commit(self, num_uncommitted: int, elapsed: float) -> bool:
+        """Tell whether the records written so far should be committed."""
+        if self.single_transaction:
+            return False
+        if self.rows is None and self.seconds is None:
+            return True  # each chunk
+
+        return (self.rows is not None and num_uncommitted >= self.rows) or (
+            self.seconds is not None and elapsed >= self.seconds
+        )
+
+
+class ImportCheckpoint:
+    """A small JSON file that tracks how many source records of a file are committed.
+
+    When an interrupted import is started again with the same checkpoint,
+    it continues after the last committed record.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def __repr__(self):
+        return f"ImportCheckpoint({str(self.path)!r})"
+
+    def read(self, file_name: Path) -> int:
+        """Tell how many records of the file are already committed."""
+        try:
+            data = orjson.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            return 0
+
+        if data["file"] != str(file_name):
+            # Avoid continuing the import of another file at the wrong position.
+            raise ValueError(
+                f"Checkpoint {self.path} belongs to '{data['file']}', not '{file_name}'"
+            )
+        return data["records"]
+
+    def write(self, file_name: Path, num_committed: int) -> None:
+        """Store the number of committed records."""
+        # Write to a temporary file first, so an interruption never leaves a corrupt checkpoint.
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_bytes(orjson.dumps({"file": str(file_name), "records": num_committed}))
+        tmp_path.replace(self.path)
+
+    def clear(self) -> None:
+        """Remove the checkpoint, once the import is completed."""
+        self.path.unlink(missing_ok=True)
+
+
+@dataclasses.dataclass
+class ImportStats:
+    """Statistics of the last :meth:`BaseImporter.load_file` call."""
+
+    #: Number of imported source records.
+    num_records: int = 0
+    #: Number of database rows that are written, for all tables.
+    num_rows: int = 0
+    #: Number of rows that are skipped, as their primary key already exists.
+    num_duplicates: int = 0
+    #: Number of source records that are rejected by the validation.
+    num_rejected: int = 0
+    #: Time spent on reading and parsing the source (or waiting for the parse workers).
+    parse_seconds: float = 0.0
+    #: Time spent on writing the rows to the database, including the commits.
+    write_seconds: float = 0.0
+
+    @property
+    def total_seconds(self) -> float:
+        return self.parse_seconds + self.write_seconds
+
+    @property
+    def records_per_second(self) -> float:
+        return self.num_records / self.total_seconds if self.total_seconds else 0.0
+
+
 class BaseImporter:
     """Base importer that holds common data."""
 
     def __init__(
-        self, dataset_schema: DatasetSchema, engine: Engine, logger: logging.Logger | None = None
+        self,
+        dataset_schema: DatasetSchema,
+        engine: Engine,
+        logger: logging.Logger | None = None,
+        dedup_backend: str = "memory",
+        metrics_sinks: Iterable[MetricsSink] = (),
     ) -> None:
         """Initializes the BaseImporter.
 
         dataset_schema: The dataset to work with.
         engine: SQLAlchemy database engine.
+        logger: Optional logger, otherwise the progress is written to the console.
+        dedup_backend: How existing primary keys are tracked to skip duplicate records,
+            see :data:`~schematools.importer.dedup.DEDUP_BACKENDS`.
+        metrics_sinks: Receivers of the :attr:`metrics` during the import,
+            see :mod:`schematools.importer.metrics`.
         """
+        try:
+            self.key_index_class = DEDUP_BACKENDS[dedup_backend]
+        except KeyError:
+            raise ValueError(
+                f"Invalid dedup backend '{dedup_backend}', "
+                f"choose from: {', '.join(DEDUP_BACKENDS)}"
+            ) from None
+
         self.engine = engine
         self.dataset_schema = dataset_schema
         self.dataset_table: DatasetTableSchema | None = None
         self.db_table_name: str | None = None
         self.tables: dict[str, Table] = {}
         self.views: dict[str, sql.SQL] = {}
-        self.pk_values_lookup: dict[str, set[Any]] = {}
+        self.pk_values_lookup: dict[str, KeyIndex] = {}
         self.pk_colname_lookup: dict[str, str] = {}
+        self.staged_tables: dict[str, Table] = {}
+        self.deferred_indexes: dict[str, list[Index]] = {}
+        self.stats = ImportStats()
+        self.metrics = ImportMetrics()
+        self.metrics_sinks = list(metrics_sinks)
         self.logger = LogfileLogger(logger) if logger else CliLogger()
 
     def deduplicate(
@@ -152,7 +500,7 @@ class BaseImporter:
             return
 
         # See which values already exist in the database. avoid reimporting them.
-        values_lookup: set[Any] = self.pk_values_lookup.get(table_name, set())
+        values_lookup: KeyIndex = self.pk_values_lookup.get(table_name, set())
 
         for record in table_records:
             value = record[pk_name]
@@ -160,13 +508,22 @@ class BaseImporter:
                 self.logger.log_warning(
                     "Duplicate record for %s, with %s = %s", table_name, pk_name, value
                 )
+                self.stats.num_duplicates += 1
+                self.metrics.duplicates[table_name] += 1
             else:
                 yield record
 
             values_lookup.add(value)
 
-    def create_pk_lookup(self, tables: dict[str, Table]) -> None:
-        """Generate a lookup to avoid primary_key clashes."""
+    def create_pk_lookup(self, tables: dict[str, Table], fetch_existing: bool = True) -> None:
+        """Generate a lookup to avoid primary_key clashes.
+
+        With ``fetch_existing=False``, the existing primary keys are not read from the database.
+        Only duplicates within the imported file will be detected then.
+
+        The existing keys are streamed in batches into the lookup of the ``dedup_backend``,
+        so only the lookup itself takes memory.
+        """
         for table_name, table in tables.items():
             pk_columns = inspect(table).primary_key.columns
             # nm tables do not have a PK
@@ -179,8 +536,14 @@ class BaseImporter:
             if pk_col.autoincrement:
                 continue
 
-            with self.engine.connect() as conn:
-                pks = {r[0] for r in conn.execute(select(pk_col)).fetchall()}
+            pks = self.key_index_class()
+            if fetch_existing and not pks.skips_in_database:
+                with self.engine.connect() as conn:
+                    result = conn.execution_options(yield_per=PK_FETCH_SIZE).execute(
+                        select(pk_col)
+                    )
+                    for rows in result.partitions():
+                        pks.update(row[0] for row in rows)
 
             self.pk_colname_lookup[table_name] = pk_name
             self.pk_values_lookup[table_name] = pks
@@ -206,6 +569,9 @@ class BaseImporter:
         limit_tables_to: set | None = None,
         is_versioned_dataset: bool = False,
         ind_create_pk_lookup: bool = True,
+        ind_fetch_existing_pks: bool = True,
+        swap: bool = False,
+        defer_indexes: bool = False,
     ) -> None:
         """Generate the tablemodels, tables and indexes.
 
@@ -228,9 +594,23 @@ class BaseImporter:
                 :attr:`.BaseImporter.is_versioned_dataset`. The private
                 schema name will be derived from the dataset ID, unless overridden by the
                 ``db_schema_name`` parameter.
+            ind_create_pk_lookup: Indication to create the lookup to skip duplicate records.
+                Defaults to True.
+            ind_fetch_existing_pks: Indication to fill the duplicate lookup with the primary keys
+                that already exist in the database. This can be skipped when an import is
+                resumed from an :class:`ImportCheckpoint`, as the remaining records
+                were not committed yet. Defaults to True.
+            swap: Import into new ``<table>_new`` tables (without indexes) for the table
+                and its nested and through tables. The indexes are created afterwards by
+                :meth:`swap_tables`, which replaces the live tables with the new ones.
+                Defaults to False.
+            defer_indexes: Create the indexes after the import, so these don't need to be
+                updated for every inserted record. Existing indexes are dropped, and
+                are created again by :meth:`create_deferred_indexes`. Defaults to False.
         """
         self.dataset_table = self.dataset_schema.get_table_by_id(table_id)
         table_id = self.dataset_table.id  # get real-cased ID.
+        self.metrics = ImportMetrics(dataset_id=self.dataset_schema.id, table_id=table_id)
 
         # check if the dataset is a view
         if self.dataset_table.is_view:
@@ -289,10 +669,15 @@ class BaseImporter:
             db_table_name = self.dataset_table.db_name
 
         if ind_tables:
-            self.prepare_tables(self.tables, truncate=truncate)
+            if swap:
+                self.prepare_staging_tables()
+            else:
+                self.prepare_tables(self.tables, truncate=truncate)
             if ind_create_pk_lookup:
-                self.create_pk_lookup(self.tables)
-            self.prepare_views()
+                with self._stage("pk_lookup"):
+                    self.create_pk_lookup(self.tables, fetch_existing=ind_fetch_existing_pks)
+            if not swap:
+                self.prepare_views()
 
         if ind_extra_index:
             # Get indexes to create
@@ -302,6 +687,13 @@ class BaseImporter:
                 metadata=metadata,
                 db_table_name=db_table_name,
             )
+            if swap or defer_indexes:
+                # The indexes are created after the import.
+                self.deferred_indexes = indexes
+                if not swap:
+                    self.drop_indexes(indexes)
+                return None
+
             metadata_inspector = inspect(metadata.bind)
             self.prepare_extra_index(
                 indexes,
@@ -328,49 +720,396 @@ class BaseImporter:
         """Generate a view for a schema."""
         raise NotImplementedError
 
-    def load_file(self, file_name: Path, batch_size: int = 100, **kwargs: Any) -> Record | None:
-        """Import a file into the database table, returns the last record, if available."""
+    def load_file(
+        self,
+        file_name: Path,
+        batch_size: int = 100,
+        use_copy: bool = False,
+        commit_policy: CommitPolicy | None = None,
+        checkpoint: ImportCheckpoint | None = None,
+        upsert: bool = False,
+        tombstone_field: str = TOMBSTONE_FIELD,
+        reject_file: Path | None = None,
+        **kwargs: Any,
+    ) -> Record | None:
+        """Import a file into the database table, returns the last record, if available.
+
+        Args:
+            file_name: The file to import, or any other source that :meth:`parse_records`
+                supports (e.g. a stream).
+            batch_size: Number of source records that are written per chunk.
+            use_copy: Write the chunks using ``COPY ... FROM STDIN`` instead of INSERT
+                statements. This is much faster for large imports, especially when
+                combined with a larger ``batch_size``, as each table of a chunk
+                is written as a single COPY stream.
+            commit_policy: When to commit the transaction, defaults to a commit per chunk.
+            checkpoint: Track the number of committed source records, so an interrupted
+                import can continue where it stopped. The checkpoint is removed once
+                the whole file is imported.
+            upsert: Insert new records and update the changed records, instead of skipping
+                existing records. Source records with a true ``tombstone_field`` are deleted.
+                The nested and through rows of the records are replaced. It's best to call
+                ``generate_db_objects()`` with ``ind_create_pk_lookup=False`` for this mode.
+            tombstone_field: The source field that marks a deleted record.
+            reject_file: Validate the records, and write the rejected records to this
+                NDJSON file (with the reason), instead of failing the import.
+                Without this file, rejected records are only logged.
+            kwargs: Any extra arguments for :meth:`parse_records`.
+        """
         if self.dataset_table is None:
             raise ValueError("Import needs to be initialized with table info")
-        data_generator = self.parse_records(
-            file_name,
-            self.dataset_table,
-            **kwargs,
+        if commit_policy is None:
+            commit_policy = CommitPolicy()
+        if upsert:
+            main_table = self.tables[self.dataset_table.id]
+            if main_table.primary_key.columns.values()[0].autoincrement is True:
+                raise ValueError(
+                    f"Table '{self.dataset_table.id}' has no identifier in the records to upsert."
+                )
+
+        num_imported = checkpoint.read(file_name) if checkpoint is not None else 0
+        if num_imported:
+            self.logger.log_info("Resuming import after %d committed records", num_imported)
+
+        if reject_file is not None:
+            kwargs.setdefault("validate", True)
+
+        self.stats = stats = ImportStats()
+        metrics = self.metrics
+        metrics.dataset_id = self.dataset_schema.id
+        metrics.table_id = self.dataset_table.id
+        data_generator = self._timed(
+            self.parse_records(
+                file_name,
+                self.dataset_table,
+                skip=num_imported,
+                **kwargs,
+            )
         )
         self.logger.log_start(file_name, size=batch_size)
 
-        num_imported = 0
-        insert_statements = {table_id: table.insert() for table_id, table in self.tables.items()}
+        insert_statements = {table_id: insert(table) for table_id, table in self.tables.items()}
         skipped_tables = set()
         last_record: Record | None = None
-        for records in chunked(data_generator, size=batch_size):
-            # every record is keyed on tablename + inside there is a list
-            for table_id, table_records in self._group_records(records).items():
-                try:
-                    insert_statement = insert_statements[table_id]
-                except KeyError:
-                    if table_id not in skipped_tables:
-                        # Show proper table db_name instead of confusing users with the internal ID
-                        # If the resolving fails, the generator isn't producing proper table IDs
-                        self.logger.log_info(
-                            "Table '%s' was excluded, skipping!",
-                            self.dataset_schema.get_table_by_id(table_id).db_name,
-                        )
-                        skipped_tables.add(table_id)
-                    continue
+        with ExitStack() as stack:
+            conn = stack.enter_context(self.engine.connect())
+            reject_fh = None
+            if reject_file is not None:
+                # Keep the rejects of the committed records when the import is resumed.
+                reject_fh = stack.enter_context(open(reject_file, "ab" if num_imported else "wb"))
+
+            num_uncommitted = 0
+            last_commit = time.monotonic()
+            parse_seconds = 0.0
+            chunks = chunked(data_generator, size=batch_size)
+            for batch_number, records in enumerate(chunks, start=1):
+                write_started = time.perf_counter()
+                written_before = metrics.rows_written.copy()
+                num_read = len(records)
+                if kwargs.get("validate"):
+                    records = self._reject_records(records, num_imported, reject_fh)
+
+                if upsert:
+                    self._upsert_records(
+                        conn, records, insert_statements, tombstone_field, use_copy=use_copy
+                    )
+                else:
+                    # every record is keyed on tablename + inside there is a list
+                    self._write_tables(
+                        conn,
+                        self._group_records(records),
+                        insert_statements,
+                        skipped_tables,
+                        use_copy=use_copy,
+                    )
+                # The rejected records are also processed, for the checkpoint.
+                num_imported += num_read
+                num_uncommitted += num_read
+                stats.num_records += len(records)
+
+                commit_seconds = 0.0
+                if commit_policy.should_commit(num_uncommitted, time.monotonic() - last_commit):
+                    commit_started = time.perf_counter()
+                    self._commit(conn, file_name, num_imported, checkpoint)
+                    commit_seconds = time.perf_counter() - commit_started
+                    num_uncommitted = 0
+                    last_commit = time.monotonic()
+                self.logger.log_progress(num_imported)
+
+                # Track the last record that's inserted for the main table.
+                if records:
+                    last_record = records[-1][self.dataset_table.id][0]
+                write_seconds = time.perf_counter() - write_started
+                stats.write_seconds += write_seconds
+
+                # The parse time of this batch was spent while chunked() collected it.
+                self._report_batch(
+                    BatchMetrics(
+                        number=batch_number,
+                        num_records=num_read,
+                        rows_written=dict(metrics.rows_written - written_before),
+                        parse_seconds=stats.parse_seconds - parse_seconds,
+                        write_seconds=write_seconds - commit_seconds,
+                        commit_seconds=commit_seconds,
+                    )
+                )
+                parse_seconds = stats.parse_seconds
+
+            write_started = time.perf_counter()
+            self._commit(conn, file_name, num_imported, checkpoint)
+            commit_seconds = time.perf_counter() - write_started
+            stats.write_seconds += commit_seconds
+            metrics.stage_seconds["commit"] += commit_seconds
+            metrics.stage_seconds["parse"] += stats.parse_seconds - parse_seconds
+
+        for sink in self.metrics_sinks:
+            sink.on_done(metrics)
+        if checkpoint is not None:
+            checkpoint.clear()
+        if stats.num_rejected:
+            self.logger.log_warning("Rejected %d invalid records", stats.num_rejected)
+        self.logger.log_done(num_imported)
+        return last_record
 
-                table_records = list(self.deduplicate(table_id, table_records))
-                if table_records:
-                    with self.engine.begin() as conn:
-                        conn.execute(insert_statement, table_records)
-            num_imported += len(records)
-            self.logger.log_progress(num_imported)
+    def _report_batch(self, batch: BatchMetrics) -> None:
+        """Add the metrics of a written batch, and pass these to the sinks."""
+        metrics = self.metrics
+        metrics.num_records += batch.num_records
+        metrics.stage_seconds["parse"] += batch.parse_seconds
+        metrics.stage_seconds["write"] += batch.write_seconds
+        metrics.stage_seconds["commit"] += batch.commit_seconds
+        metrics.batch_seconds["parse"].observe(batch.parse_seconds)
+        metrics.batch_seconds["write"].observe(batch.write_seconds + batch.commit_seconds)
+        for sink in self.metrics_sinks:
+            sink.on_batch(metrics, batch)
+
+    def dry_run(self, file_name: Path, table_id: str, **kwargs: Any) -> ImportStats:
+        """Only parse the file, to tell how fast the records can be produced.
+        This doesn't need a database connection.
 
-            # Track the last record that's inserted for the main table.
-            last_record = records[-1][self.dataset_table.id][0]
+        Args:
+            file_name: The file to parse.
+            table_id: The table the file belongs to.
+            kwargs: Any extra arguments for :meth:`parse_records`.
+        """
+        dataset_table = self.dataset_schema.get_table_by_id(table_id)
+        self.stats = stats = ImportStats()
+        self.metrics = metrics = ImportMetrics(
+            dataset_id=self.dataset_schema.id, table_id=dataset_table.id
+        )
+        for record in self._timed(self.parse_records(file_name, dataset_table, **kwargs)):
+            if isinstance(record, RejectedRecord):
+                stats.num_rejected += 1
+            else:
+                stats.num_records += 1
+                for row_table_id, rows in record.items():
+                    metrics.rows_parsed[row_table_id] += len(rows)
+
+        metrics.num_records = stats.num_records + stats.num_rejected
+        metrics.num_rejected = stats.num_rejected
+        metrics.stage_seconds["parse"] = stats.parse_seconds
+        for sink in self.metrics_sinks:
+            sink.on_done(metrics)
+        return stats
+
+    def _reject_records(
+        self, records: list[dict[str, list[Record]]], offset: int, reject_fh: BinaryIO | None
+    ) -> list[dict[str, list[Record]]]:
+        """Remove the rejected records from a chunk, and report them.
+        Each rejected record is written as a line in the reject file (or logged without one),
+        with the (1-based) position of the record in the source.
+        """
+        valid_records = []
+        for position, record in enumerate(records, start=offset + 1):
+            if not isinstance(record, RejectedRecord):
+                valid_records.append(record)
+                continue
 
-        self.logger.log_done(num_imported)
-        return last_record
+            self.stats.num_rejected += 1
+            self.metrics.num_rejected += 1
+            if reject_fh is not None:
+                rejected = {
+                    "record_number": position,
+                    "reason": record.reason,
+                    "record": record.source,
+                }
+                reject_fh.write(orjson.dumps(rejected, option=orjson.OPT_APPEND_NEWLINE))
+            else:
+                self.logger.log_warning("Rejected record %d: %s", position, record.reason)
+        return valid_records
+
+    def _write_tables(
+        self,
+        conn: Connection,
+        records_by_table: dict[str, list[Record]],
+        insert_statements: dict[str, Insert],
+        skipped_tables: set[str],
+        use_copy: bool = False,
+    ) -> None:
+        """Write the rows of each table, skipping the duplicates and the excluded tables."""
+        for table_id, table_records in records_by_table.items():
+            self.metrics.rows_parsed[table_id] += len(table_records)
+            try:
+                insert_statement = insert_statements[table_id]
+            except KeyError:
+                if table_id not in skipped_tables:
+                    # Show proper table db_name instead of confusing users with the
+                    # internal ID. If the resolving fails, the generator isn't producing
+                    # proper table IDs.
+                    self.logger.log_info(
+                        "Table '%s' was excluded, skipping!",
+                        self.dataset_schema.get_table_by_id(table_id).db_name,
+                    )
+                    skipped_tables.add(table_id)
+                continue
+
+            table_records = list(self.deduplicate(table_id, table_records))
+            if table_records:
+                self._write_records(
+                    conn, table_id, insert_statement, table_records, use_copy=use_copy
+                )
+
+    def _write_records(
+        self,
+        conn: Connection,
+        table_id: str,
+        insert_statement: Insert,
+        records: list[Record],
+        use_copy: bool = False,
+    ) -> None:
+        """Write the records of a single table."""
+        key_index = self.pk_values_lookup.get(table_id)
+        skip_duplicates = key_index is not None and key_index.skips_in_database
+        if use_copy:
+            num_written = copy_records(
+                conn, self.tables[table_id], records, skip_duplicates=skip_duplicates
+            )
+        elif skip_duplicates:
+            num_written = conn.execute(insert_statement.on_conflict_do_nothing(), records).rowcount
+        else:
+            conn.execute(insert_statement, records)
+            num_written = len(records)
+
+        if 0 <= num_written < len(records):
+            self.logger.log_warning(
+                "Skipped %d duplicate records for %s", len(records) - num_written, table_id
+            )
+            self.stats.num_duplicates += len(records) - num_written
+            self.metrics.duplicates[table_id] += len(records) - num_written
+        self.stats.num_rows += num_written
+        self.metrics.rows_written[table_id] += num_written
+
+    def _upsert_records(
+        self,
+        conn: Connection,
+        records: list[dict[str, list[Record]]],
+        insert_statements: dict[str, Insert],
+        tombstone_field: str,
+        use_copy: bool = False,
+    ) -> None:
+        """Insert or update the records of the imported table, and delete the tombstones.
+
+        The nested and through rows of these records are replaced, as their primary key
+        is generated by the database (so the existing rows can't be matched).
+        """
+        if not records:
+            return
+
+        main_table_id = self.dataset_table.id
+        main_table = self.tables[main_table_id]
+        pk_column = main_table.primary_key.columns.values()[0]
+
+        # When a record occurs multiple times, the last version wins. Tombstones become None.
+        latest: dict[Any, dict[str, list[Record]] | None] = {}
+        for record in records:
+            for table_id, rows in record.items():
+                self.metrics.rows_parsed[table_id] += len(rows)
+            main_row = record[main_table_id][0]
+            latest[main_row[pk_column.name]] = (
+                None if main_row.source.get(tombstone_field) else record
+            )
+
+        for table, parent_column in self._get_child_tables().values():
+            # The through tables refer to the (string) value of the identifier.
+            keys = list(map(str, latest)) if table.dataset_table.is_through_table else list(latest)
+            conn.execute(delete(table).where(table.c[parent_column].in_(keys)))
+
+        if deleted_keys := [key for key, record in latest.items() if record is None]:
+            conn.execute(delete(main_table).where(pk_column.in_(deleted_keys)))
+
+        records_by_table = self._group_records(
+            [record for record in latest.values() if record is not None]
+        )
+        if main_rows := records_by_table.pop(main_table_id, None):
+            if use_copy:
+                num_written = copy_records(conn, main_table, main_rows, upsert=True)
+            else:
+                num_written = conn.execute(
+                    upsert_statement(main_table, list(main_rows[0])), main_rows
+                ).rowcount
+            # Unchanged records are not written.
+            self.stats.num_rows += max(num_written, 0)
+            self.metrics.rows_written[main_table_id] += max(num_written, 0)
+
+        for table_id, table_records in records_by_table.items():
+            if table_id in insert_statements and table_records:
+                self._write_records(
+                    conn, table_id, insert_statements[table_id], table_records, use_copy=use_copy
+                )
+
+    def _get_child_tables(self) -> dict[str, tuple[Table, str]]:
+        """Give the nested and through tables that are filled by the imported table.
+        For each table, the column that refers to the parent record is given.
+        """
+        child_tables = {}
+        for table_id, table in self.tables.items():
+            dataset_table = table.dataset_table
+            if dataset_table.parent_table is None or (
+                dataset_table.parent_table.id != self.dataset_table.id
+            ):
+                continue
+
+            if dataset_table.is_nested_table:
+                child_tables[table_id] = (table, "parent_id")
+            elif dataset_table.parent_table_field.nm_relation is not None:
+                # Only the n:m relations are part of the imported records.
+                child_tables[table_id] = (table, dataset_table.through_fields[0].db_name)
+        return child_tables
+
+    def _commit(
+        self,
+        conn: Connection,
+        file_name: Path,
+        num_imported: int,
+        checkpoint: ImportCheckpoint | None,
+    ) -> None:
+        """Commit the written records, and record how far the import got."""
+        conn.commit()
+        if checkpoint is not None:
+            checkpoint.write(file_name, num_imported)
+
+    @contextmanager
+    def _stage(self, stage: str) -> Iterator[None]:
+        """Track the time of a stage outside the batches, and report it to the metrics sinks."""
+        started = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - started
+        self.metrics.stage_seconds[stage] += seconds
+        for sink in self.metrics_sinks:
+            sink.on_stage(self.metrics, stage, seconds)
+
+    def _timed(self, iterator: Iterator[T]) -> Iterator[T]:
+        """Track how much time it takes to produce the items of the iterator."""
+        iterator = iter(iterator)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stats.parse_seconds += time.perf_counter() - started
+            yield item
 
     def _group_records(self, records: list[dict[str, list[Record]]]) -> dict[str, list[Record]]:
         """Combine the records for a single table into a single set"""
@@ -382,7 +1121,7 @@ class BaseImporter:
         return dict(groups)
 
     def parse_records(
-        self, filename: Path, dataset_table: DatasetTableSchema, **kwargs: Any
+        self, filename: Path, dataset_table: DatasetTableSchema, skip: int = 0, **kwargs: Any
     ) -> Iterator[dict[str, list[Record]]]:
         """Yield all records from the filename.
         The expected format of each returned row is::
@@ -391,6 +1130,9 @@ class BaseImporter:
                 "tableId1": [{"db_field1": "value", ...}, ...],
                 "tableId2": [...],
             }
+
+        The first ``skip`` source records should not be returned,
+        as these are already imported by a previous run.
         """
         raise NotImplementedError()
 
@@ -413,6 +1155,202 @@ class BaseImporter:
                 cur.execute(view)
             conn.commit()
 
+    def prepare_staging_tables(self) -> None:
+        """Create empty ``<table>_new`` tables to import into, without any indexes.
+
+        This happens for the imported table and its nested and through tables,
+        these are replaced in :attr:`tables` by the new tables. Any leftover
+        of an earlier import that didn't complete is removed first.
+        """
+        staging_metadata = MetaData()
+        for table_id, table in self.tables.items():
+            dataset_table = table.dataset_table
+            if dataset_table.id != self.dataset_table.id and (
+                dataset_table.parent_table is None
+                or dataset_table.parent_table.id != self.dataset_table.id
+            ):
+                continue
+
+            staging_table = table.to_metadata(
+                staging_metadata, name=staging_table_name(table.name)
+            )
+            staging_table.indexes.clear()
+            staging_table.dataset_table = dataset_table
+            staging_table.drop(self.engine, checkfirst=True)
+            staging_table.create(self.engine)
+            self.logger.log_info("Importing into %s", staging_table.fullname)
+
+            self.staged_tables[table_id] = table
+            self.tables[table_id] = staging_table
+
+    def swap_tables(
+        self,
+        max_workers: int = DEFAULT_INDEX_WORKERS,
+        maintenance_work_mem: str | None = None,
+    ) -> None:
+        """Replace the live tables with the ``<table>_new`` tables that are imported.
+
+        The indexes are created and the new tables are analyzed before the swap.
+        All tables are swapped in a single transaction, so readers either see
+        the old or the new data. The live tables are dropped without ``CASCADE``,
+        hence a view of another dataset that uses a live table blocks the swap.
+
+        Args:
+            max_workers: Number of tables for which the indexes are created concurrently.
+            maintenance_work_mem: Memory to use for building the indexes (e.g. ``"1GB"``).
+        """
+        if not self.staged_tables:
+            raise ValueError("Import needs to be initialized with swap=True")
+
+        swaps = [
+            (self.tables[table_id], live_table)
+            for table_id, live_table in self.staged_tables.items()
+        ]
+        staging_indexes, index_names = self._get_staging_indexes()
+        self.create_indexes(
+            staging_indexes, max_workers=max_workers, maintenance_work_mem=maintenance_work_mem
+        )
+
+        with (
+            self._stage("swap"),
+            closing(self.engine.raw_connection()) as conn,
+            closing(conn.cursor()) as cur,
+        ):
+            for staging_table, _ in swaps:
+                cur.execute(sql.SQL("ANALYZE {}").format(table_identifier(staging_table)))
+            conn.commit()
+
+            for staging_table, live_table in swaps:
+                table = table_identifier(staging_table).as_string(conn.driver_connection)
+                cur.execute(TABLE_DEPENDENCIES_SQL, {"table": table})
+                dependencies = cur.fetchall()
+
+                cur.execute(
+                    sql.SQL("DROP TABLE IF EXISTS {}").format(table_identifier(live_table))
+                )
+                cur.execute(
+                    sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+                        table_identifier(staging_table), sql.Identifier(live_table.name)
+                    )
+                )
+
+                # Give the primary key, indexes and sequences the names of the live table.
+                for relkind, name in dependencies:
+                    if name in index_names:
+                        new_name = index_names[name]
+                    elif name.startswith(staging_table.name):
+                        new_name = live_table.name + name.removeprefix(staging_table.name)
+                    else:
+                        continue
+                    cur.execute(
+                        sql.SQL("ALTER {} {} RENAME TO {}").format(
+                            sql.SQL("INDEX" if relkind == "i" else "SEQUENCE"),
+                            sql.Identifier(live_table.schema, name),
+                            sql.Identifier(new_name),
+                        )
+                    )
+            conn.commit()
+
+        self.logger.log_info(
+            "Swapped tables: %s", ", ".join(live_table.fullname for _, live_table in swaps)
+        )
+        self.tables.update(self.staged_tables)
+        self.staged_tables = {}
+        self.deferred_indexes = {}
+        self.prepare_views()
+
+    def _get_staging_indexes(self) -> tuple[dict[str, list[Index]], dict[str, str]]:
+        """Define the indexes of the live tables on the new tables.
+
+        These receive a temporary name, as the live table still has these indexes.
+        Returns the indexes per table, and the final name for each temporary name.
+        """
+        staging_tables = {
+            live_table.key: self.tables[table_id]
+            for table_id, live_table in self.staged_tables.items()
+        }
+        staging_indexes = defaultdict(list)
+        index_names = {}
+        for index_objects in self.deferred_indexes.values():
+            for index in index_objects:
+                try:
+                    staging_table = staging_tables[index.table.key]
+                except KeyError:
+                    continue
+
+                tmp_name = _format_index_name(f"{index.name}{TMP_TABLE_POSTFIX}")
+                staging_index = Index(
+                    tmp_name,
+                    *(staging_table.c[column.name] for column in index.columns),
+                    **index.dialect_kwargs,
+                )
+                staging_indexes[staging_table.name].append(staging_index)
+                index_names[tmp_name] = index.name
+        return dict(staging_indexes), index_names
+
+    def create_deferred_indexes(
+        self,
+        max_workers: int = DEFAULT_INDEX_WORKERS,
+        maintenance_work_mem: str | None = None,
+    ) -> None:
+        """Create the indexes after an import with ``generate_db_objects(defer_indexes=True)``.
+
+        Args:
+            max_workers: Number of tables for which the indexes are created concurrently.
+            maintenance_work_mem: Memory to use for building the indexes (e.g. ``"1GB"``).
+        """
+        self.create_indexes(
+            self.deferred_indexes,
+            max_workers=max_workers,
+            maintenance_work_mem=maintenance_work_mem,
+        )
+        self.deferred_indexes = {}
+
+    def create_indexes(
+        self,
+        indexes: dict[str, list[Index]],
+        max_workers: int = DEFAULT_INDEX_WORKERS,
+        maintenance_work_mem: str | None = None,
+    ) -> None:
+        """Create the indexes that don't exist yet.
+
+        The indexes of a table are created one after another, but the tables are handled
+        concurrently, each on a separate database connection. A larger
+        ``maintenance_work_mem`` speeds up the index builds, especially for GIST indexes.
+        """
+
+        def _create_table_indexes(index_objects: list[Index]) -> None:
+            with self.engine.connect() as conn:
+                if maintenance_work_mem:
+                    # Only for this transaction, so the pooled connection keeps its defaults.
+                    conn.execute(
+                        text("SELECT set_config('maintenance_work_mem', :value, true)"),
+                        {"value": maintenance_work_mem},
+                    )
+                for index in index_objects:
+                    started = time.monotonic()
+                    index.create(bind=conn, checkfirst=True)
+                    self.logger.log_info(
+                        "Created index %s in %.1fs", index.name, time.monotonic() - started
+                    )
+                conn.commit()
+
+        with self._stage("index"), ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [
+                executor.submit(_create_table_indexes, index_objects)
+                for index_objects in indexes.values()
+                if index_objects
+            ]
+            for future in futures:
+                future.result()
+
+    def drop_indexes(self, indexes: dict[str, list[Index]]) -> None:
+        """Drop the indexes, if these exist."""
+        with self.engine.begin() as conn:
+            for index_objects in indexes.values():
+                for index in index_objects:
+                    index.drop(bind=conn, checkfirst=True)
+
     def prepare_extra_index(
         self,
         indexes: dict[str, list[Index]],
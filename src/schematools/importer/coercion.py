@@ -0,0 +1,125 @@
+"""Validation and conversion of the imported values, based on the field definitions.
+
+The source data is usually JSON, which is not always typed the way the schema
+describes it (e.g. numbers as strings). These values are converted here,
+so invalid values are detected while parsing a record, instead of failing the
+database write of a whole batch.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import date, datetime, time
+from typing import Any
+
+from schematools.types import DatasetFieldSchema
+
+_TRUE_VALUES = {"true", "1"}
+_FALSE_VALUES = {"false", "0"}
+
+
+def get_coercer(field: DatasetFieldSchema) -> Callable[[Any], Any]:
+    """Provide the function that checks a (not null) value of a scalar field.
+    This converts the value to the Python type of the field, or raises ValueError.
+    """
+    if (field_format := field.format) is not None:
+        coercer = FORMAT_COERCERS.get(field_format, _to_string)
+    else:
+        coercer = TYPE_COERCERS.get(field.type, _to_scalar)
+
+    qualified_id = field.qualified_id
+
+    def coerce(value: Any) -> Any:
+        try:
+            return coercer(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid value for '{qualified_id}': {value!r} ({e})") from None
+
+    return coerce
+
+
+def _to_scalar(value: Any) -> Any:
+    if isinstance(value, dict | list):
+        raise TypeError("expected a scalar value")
+    return value
+
+
+def _to_string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    elif isinstance(value, int | float) and not isinstance(value, bool):
+        return str(value)
+    raise TypeError("expected a string")
+
+
+def _to_integer(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError("expected an integer")
+    elif isinstance(value, int):
+        return value
+    elif isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError("expected an integer")
+        return int(value)
+    elif isinstance(value, str):
+        return int(value)
+    raise TypeError("expected an integer")
+
+
+def _to_number(value: Any) -> float | int:
+    if isinstance(value, bool):
+        raise TypeError("expected a number")
+    elif isinstance(value, int | float):
+        return value
+    elif isinstance(value, str):
+        return float(value)
+    raise TypeError("expected a number")
+
+
+def _to_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    elif isinstance(value, int | str):
+        text = str(value).lower()
+        if text in _TRUE_VALUES:
+            return True
+        elif text in _FALSE_VALUES:
+            return False
+    raise ValueError("expected a boolean")
+
+
+def _to_date(value: Any) -> date:
+    if isinstance(value, str):
+        # A date-time value is also accepted, as PostgreSQL would do.
+        return date.fromisoformat(value[:10])
+    raise TypeError("expected an ISO date")
+
+
+def _to_datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        # Python 3.10 doesn't parse the "Z" suffix.
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    raise TypeError("expected an ISO date-time")
+
+
+def _to_time(value: Any) -> time:
+    if isinstance(value, str):
+        return time.fromisoformat(value)
+    raise TypeError("expected an ISO time")
+
+
+#: The conversions for each field type.
+TYPE_COERCERS: dict[str, Callable[[Any], Any]] = {
+    "string": _to_string,
+    "integer": _to_integer,
+    "integer/autoincrement": _to_integer,
+    "number": _to_number,
+    "boolean": _to_boolean,
+}
+
+#: The conversions for each field format, these take precedence over the type.
+FORMAT_COERCERS: dict[str, Callable[[Any], Any]] = {
+    "date": _to_date,
+    "date-time": _to_datetime,
+    "time": _to_time,
+}
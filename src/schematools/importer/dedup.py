@@ -0,0 +1,140 @@
+"""Lookups of the primary keys that are already imported.
+
+The importer skips records with a primary key that already exists,
+as an import is often restarted before it completed. The backends differ
+in how much memory is needed to track those keys:
+
+* ``memory``: a Python ``set`` of all keys (the default).
+* ``digest``: a sorted array of 64-bit digests of the keys (8 bytes per key).
+* ``database``: nothing is tracked in Python, the database skips the duplicates
+  using ``INSERT ... ON CONFLICT DO NOTHING``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from decimal import Decimal
+from fractions import Fraction
+from hashlib import blake2b
+from typing import Any
+
+import numpy as np
+
+
+class MemoryKeyIndex(set):
+    """Track all primary keys in a Python set."""
+
+    #: Whether the database should skip the duplicates instead.
+    skips_in_database = False
+
+
+class DigestKeyIndex:
+    """Track the primary keys as 64-bit digests in a sorted numpy array.
+
+    This needs far less memory than a set of (string) keys. The keys are hashed to
+    64 bits, so the chance that two different keys share a digest is negligible
+    (about 1 in 10,000 for 50 million keys). Such a record would be skipped as duplicate.
+    Keys that compare equal have the same digest, so e.g. ``1``, ``1.0`` and ``Decimal(1)``
+    are the same key, like they are in the ``set`` of :class:`MemoryKeyIndex`.
+    """
+
+    skips_in_database = False
+
+    def __init__(self, min_merge_size: int = 100_000):
+        self.min_merge_size = min_merge_size
+        self._digests = np.empty(0, dtype=np.uint64)
+        self._unsorted: list[np.ndarray] = []
+        self._pending: set[int] = set()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self)} keys>"
+
+    def __len__(self):
+        self._merge()
+        return len(self._digests)
+
+    def __contains__(self, value: Any) -> bool:
+        digest = self._digest(value)
+        if digest in self._pending:
+            return True
+
+        if self._unsorted:
+            self._merge()
+        digest = np.uint64(digest)
+        pos = np.searchsorted(self._digests, digest)
+        return bool(pos < len(self._digests) and self._digests[pos] == digest)
+
+    def add(self, value: Any) -> None:
+        """Add a single key."""
+        self._pending.add(self._digest(value))
+
+        # Merging costs a sort of the whole array, hence this happens less often
+        # when the array grows. This keeps the total costs at O(n log n).
+        if len(self._pending) >= max(self.min_merge_size, len(self._digests) // 16):
+            self._merge()
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Add many keys at once (e.g. a batch of existing keys in the database)."""
+        self._unsorted.append(np.fromiter(map(self._digest, values), dtype=np.uint64))
+
+    def _merge(self) -> None:
+        """Merge all added keys into the sorted array."""
+        if self._pending:
+            self._unsorted.append(np.fromiter(self._pending, dtype=np.uint64))
+            self._pending.clear()
+        if self._unsorted:
+            digests = np.concatenate([self._digests, *self._unsorted])
+            digests.sort()
+            # Remove the repeated values, the sorted array makes these adjacent.
+            keep = np.empty(len(digests), dtype=bool)
+            keep[:1] = True
+            np.not_equal(digests[1:], digests[:-1], out=keep[1:])
+            self._digests = digests[keep]
+            self._unsorted.clear()
+
+    @classmethod
+    def _digest(cls, value: Any) -> int:
+        # Not the builtin hash(), which has collisions by design (e.g. hash(-1) == hash(-2)).
+        # The repr() of the key types (str, int, tuple, date, ...) is exact.
+        encoded = repr(cls._normalize(value)).encode()
+        return int.from_bytes(blake2b(encoded, digest_size=8).digest(), "little")
+
+    @classmethod
+    def _normalize(cls, value: Any) -> Any:
+        """Give the numbers that compare equal the same representation."""
+        if type(value) is int or isinstance(value, str):
+            return value
+        if isinstance(value, tuple):
+            return tuple(map(cls._normalize, value))
+        if isinstance(value, int | float | Decimal):
+            try:
+                ratio = Fraction(value)
+            except (ValueError, OverflowError):
+                return float(value)  # NaN or infinity
+            return ratio.numerator if ratio.denominator == 1 else ratio
+        return value
+
+
+class DatabaseKeyIndex:
+    """Let the database skip duplicate keys, so nothing needs to be tracked in memory.
+    The records are written with ``INSERT ... ON CONFLICT DO NOTHING``.
+    """
+
+    skips_in_database = True
+
+    def __contains__(self, value: Any) -> bool:
+        return False
+
+    def add(self, value: Any) -> None:
+        pass
+
+    def update(self, values: Iterable[Any]) -> None:
+        pass
+
+
+#: The available backends to detect duplicate records.
+DEDUP_BACKENDS: dict[str, type[MemoryKeyIndex | DigestKeyIndex | DatabaseKeyIndex]] = {
+    "memory": MemoryKeyIndex,
+    "digest": DigestKeyIndex,
+    "database": DatabaseKeyIndex,
+}
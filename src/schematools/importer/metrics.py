@@ -0,0 +1,261 @@
+"""Metrics of an import, to see where the import time goes.
+
+The importer collects the metrics in :class:`ImportMetrics`, and passes these
+to the sinks it's created with (``BaseImporter(..., metrics_sinks=[...])``):
+
+* :class:`JSONLinesSink`: writes a line per batch and per stage, to analyze an import afterwards.
+* :class:`PrometheusTextfileSink`: writes the totals in the Prometheus text format,
+  for the textfile collector of the node exporter.
+
+Other sinks can be made by implementing the methods of :class:`MetricsSink`.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Any, BinaryIO
+
+import orjson
+
+#: The upper bounds (in seconds) of the batch latency histograms.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Counts the observed values per bucket, like a Prometheus histogram."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is for +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.count} values>"
+
+    def observe(self, value: float) -> None:
+        """Add a value to the first bucket it fits in."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[tuple[str, int]]:
+        """Tell the number of values up to each bound, as Prometheus reports these."""
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        totals = []
+        total = 0
+        for bound, count in zip(bounds, self.counts, strict=True):
+            total += count
+            totals.append((bound, total))
+        return totals
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"buckets": dict(self.cumulative_counts()), "sum": self.sum, "count": self.count}
+
+
+@dataclasses.dataclass
+class BatchMetrics:
+    """The metrics of a single batch that is written by :meth:`BaseImporter.load_file`."""
+
+    #: Sequence number of the batch, starting at 1.
+    number: int
+    #: Number of source records in the batch, including the rejected records.
+    num_records: int
+    #: Number of written rows per table.
+    rows_written: dict[str, int]
+    parse_seconds: float
+    write_seconds: float
+    commit_seconds: float
+
+
+@dataclasses.dataclass
+class ImportMetrics:
+    """The metrics of an import, from :meth:`BaseImporter.generate_db_objects`
+    until the indexes are created (or the tables are swapped).
+    """
+
+    dataset_id: str = ""
+    table_id: str = ""
+    #: Number of parsed source records, including the rejected records.
+    num_records: int = 0
+    #: Number of source records that are rejected by the validation.
+    num_rejected: int = 0
+    #: Number of (uncompressed) source bytes that are parsed.
+    bytes_read: int = 0
+    #: Number of parsed rows per table.
+    rows_parsed: Counter[str] = dataclasses.field(default_factory=Counter)
+    #: Number of rows per table that are written to the database.
+    rows_written: Counter[str] = dataclasses.field(default_factory=Counter)
+    #: Number of rows per table that are skipped, as their primary key already exists.
+    duplicates: Counter[str] = dataclasses.field(default_factory=Counter)
+    #: Time spent per stage, e.g. ``parse``, ``write``, ``commit`` or ``index``.
+    stage_seconds: Counter[str] = dataclasses.field(default_factory=Counter)
+    #: Histograms of the time it takes to parse and write a batch.
+    batch_seconds: dict[str, Histogram] = dataclasses.field(
+        default_factory=lambda: {"parse": Histogram(), "write": Histogram()}
+    )
+
+    def as_dict(self) -> dict[str, Any]:
+        # Not dataclasses.asdict(), which doesn't copy Counter objects correctly.
+        data = {field.name: getattr(self, field.name) for field in dataclasses.fields(self)}
+        data["batch_seconds"] = {
+            stage: histogram.as_dict() for stage, histogram in self.batch_seconds.items()
+        }
+        return data
+
+
+class MetricsSink:
+    """The callbacks that receive the metrics during an import.
+    These do nothing by default, so a sink only has to implement what it needs.
+    """
+
+    def on_batch(self, metrics: ImportMetrics, batch: BatchMetrics) -> None:
+        """A batch of records is written."""
+
+    def on_stage(self, metrics: ImportMetrics, stage: str, seconds: float) -> None:
+        """A stage outside the batches is completed (e.g. ``pk_lookup``, ``index`` or ``swap``)."""
+
+    def on_done(self, metrics: ImportMetrics) -> None:
+        """All records of the file are written."""
+
+
+class JSONLinesSink(MetricsSink):
+    """Write each event as a line of JSON, to a file or a binary stream.
+    A file is appended to, so it can collect the events of multiple imports.
+    """
+
+    def __init__(self, target: Path | BinaryIO):
+        if isinstance(target, str | os.PathLike):
+            self.fh = open(target, "ab")  # noqa: SIM115
+            self._owns_fh = True
+        else:
+            self.fh = target
+            self._owns_fh = False
+
+    def on_batch(self, metrics: ImportMetrics, batch: BatchMetrics) -> None:
+        self._write({"event": "batch", "table": metrics.table_id, **dataclasses.asdict(batch)})
+
+    def on_stage(self, metrics: ImportMetrics, stage: str, seconds: float) -> None:
+        self._write(
+            {"event": "stage", "table": metrics.table_id, "stage": stage, "seconds": seconds}
+        )
+
+    def on_done(self, metrics: ImportMetrics) -> None:
+        self._write({"event": "done", **metrics.as_dict()})
+
+    def close(self) -> None:
+        if self._owns_fh:
+            self.fh.close()
+
+    def _write(self, event: dict) -> None:
+        event["time"] = time.time()
+        self.fh.write(orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE))
+        self.fh.flush()  # allow following the file during the import
+
+
+class PrometheusTextfileSink(MetricsSink):
+    """Write the metrics in the Prometheus text format, for the node exporter textfile collector.
+
+    The file is replaced atomically, so the collector never reads a partial file.
+    It's written when a stage completes, at the end of the file, and during the import
+    at most once per ``interval`` seconds.
+    """
+
+    prefix = "schematools_import"
+
+    def __init__(self, path: Path, interval: float = 15.0):
+        self.path = Path(path)
+        self.interval = interval
+        self._last_write = 0.0
+
+    def on_batch(self, metrics: ImportMetrics, batch: BatchMetrics) -> None:
+        if time.monotonic() - self._last_write >= self.interval:
+            self.write(metrics)
+
+    def on_stage(self, metrics: ImportMetrics, stage: str, seconds: float) -> None:
+        self.write(metrics)
+
+    def on_done(self, metrics: ImportMetrics) -> None:
+        self.write(metrics)
+
+    def write(self, metrics: ImportMetrics) -> None:
+        """Replace the file with the current metrics."""
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "w") as fh:
+                fh.write(self.format(metrics))
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        self._last_write = time.monotonic()
+
+    def format(self, metrics: ImportMetrics) -> str:
+        """Give the metrics in the Prometheus text exposition format."""
+        labels = {"dataset": metrics.dataset_id, "table": metrics.table_id}
+        histogram_samples = []
+        for stage, histogram in metrics.batch_seconds.items():
+            stage_labels = {**labels, "stage": stage}
+            histogram_samples.extend(
+                ("_bucket", {**stage_labels, "le": bound}, count)
+                for bound, count in histogram.cumulative_counts()
+            )
+            histogram_samples.append(("_sum", stage_labels, histogram.sum))
+            histogram_samples.append(("_count", stage_labels, histogram.count))
+
+        samples = {
+            "records_total": [("", labels, metrics.num_records)],
+            "rejected_total": [("", labels, metrics.num_rejected)],
+            "read_bytes_total": [("", labels, metrics.bytes_read)],
+            "rows_parsed_total": _per_table(labels, metrics.rows_parsed),
+            "rows_written_total": _per_table(labels, metrics.rows_written),
+            "duplicates_total": _per_table(labels, metrics.duplicates),
+            "stage_seconds_total": [
+                ("", {**labels, "stage": stage}, seconds)
+                for stage, seconds in metrics.stage_seconds.items()
+            ],
+            "batch_duration_seconds": histogram_samples,
+        }
+
+        lines = []
+        for name, metric_samples in samples.items():
+            metric_type, description = PROMETHEUS_METRICS[name]
+            lines.append(f"# HELP {self.prefix}_{name} {description}")
+            lines.append(f"# TYPE {self.prefix}_{name} {metric_type}")
+            lines.extend(
+                f"{self.prefix}_{name}{suffix}{_format_labels(sample_labels)} {value!r}"
+                for suffix, sample_labels, value in metric_samples
+            )
+        return "\n".join(lines) + "\n"
+
+
+#: The type and description of each metric in the Prometheus textfile.
+PROMETHEUS_METRICS = {
+    "records_total": ("counter", "Parsed source records."),
+    "rejected_total": ("counter", "Source records that are rejected by the validation."),
+    "read_bytes_total": ("counter", "Parsed (uncompressed) source bytes."),
+    "rows_parsed_total": ("counter", "Parsed rows per table."),
+    "rows_written_total": ("counter", "Rows per table that are written to the database."),
+    "duplicates_total": ("counter", "Rows per table that are skipped as duplicate."),
+    "stage_seconds_total": ("counter", "Time spent per stage of the import."),
+    "batch_duration_seconds": ("histogram", "Time it takes to parse or write a batch."),
+}
+
+
+def _per_table(labels: dict[str, str], counts: Counter[str]) -> list[tuple[str, dict, int]]:
+    return [("", {**labels, "table": table_id}, count) for table_id, count in counts.items()]
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """Format the labels of a sample, escaped as the text format requires."""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
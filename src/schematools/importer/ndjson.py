@@ -1,37 +1,342 @@
 from __future__ import annotations
 
+import bz2
+import gzip
+import io
 import json
-from collections.abc import Iterator
+import multiprocessing
+import operator
+import os
+import sys
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import cached_property, partial
+from itertools import islice
 from pathlib import PosixPath
-from typing import Any
+from typing import Any, BinaryIO
 
 import orjson
+import shapely
+from shapely.errors import ShapelyError
 from shapely.geometry import shape
 
 from schematools.types import DatasetFieldSchema, DatasetTableSchema
 
-from .base import BaseImporter, Provenance, Record
+from .base import BaseImporter, Provenance, Record, RejectedRecord, chunked
+from .coercion import get_coercer
+
+#: Default number of bytes each worker parses at once in the parallel mode.
+DEFAULT_SHARD_SIZE = 1024 * 1024
+
+#: Number of bytes that are read at once from a file or (decompressed) stream.
+READ_BUFFER_SIZE = 1024 * 1024
+
+#: The first bytes of the supported compression formats.
+COMPRESSION_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+#: What can be imported: a file name (``-`` for stdin), binary file object or byte chunks.
+NDJSONSource = PosixPath | str | BinaryIO | Iterable[bytes]
+
+#: Number of lines that are parsed at once, so geometries can be converted in bulk.
+PARSE_BATCH_SIZE = 1000
+
+#: The supported formats for geometry values, see :class:`TableFieldMapper`.
+GEOMETRY_FORMATS = ("ewkt", "ewkb")
+
+#: The errors of an invalid source record, which are rejected when validating the records.
+INVALID_RECORD_ERRORS = (ValueError, TypeError, LookupError, AttributeError, ShapelyError)
+
+#: The field mapper of a worker process, see :func:`_init_worker`.
+_worker_field_mapper: TableFieldMapper | None = None
 
 
 class NDJSONImporter(BaseImporter):
     """Import an NDJSON file into the database."""
 
     def parse_records(
-        self, file_name: PosixPath, dataset_table: DatasetTableSchema, **kwargs: Any
+        self,
+        file_name: NDJSONSource,
+        dataset_table: DatasetTableSchema,
+        skip: int = 0,
+        workers: int = 0,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        geometry_format: str = "ewkt",
+        validate: bool = False,
+        **kwargs: Any,
     ) -> Iterator[dict[str, list[Record]]]:
-        """Provide an iterator the reads the NDJSON records."""
+        """Provide an iterator the reads the NDJSON records.
+
+        With ``workers``, the lines are parsed by a pool of worker processes.
+        Each worker reads and parses a byte range of ``shard_size`` bytes from the file,
+        so the main process only has to write the records to the database.
+        The records are still returned in the order of the file.
+
+        The ``geometry_format`` determines how GeoJSON values are written,
+        and ``validate`` whether invalid records are returned as :class:`RejectedRecord`,
+        see :class:`TableFieldMapper` for details.
+
+        Instead of a file name, a binary file object or an iterable of byte chunks
+        can be given, or ``-`` to read from stdin. Data that is compressed with gzip,
+        bzip2 or zstd is decompressed while reading, see :func:`open_ndjson`.
+        """
         # Initializes the field mapper once for the table
-        field_mapper = TableFieldMapper(dataset_table)
-        with open(file_name, "rb") as fh:
-            for row in fh:
-                if row != b"\n":
-                    records = field_mapper.parse_object(orjson.loads(row))
-                    yield records
+        field_mapper = TableFieldMapper(
+            dataset_table, geometry_format=geometry_format, validate=validate
+        )
+        metrics = self.metrics
+        if workers > 1 and _is_plain_file(file_name):
+            # The workers read their part of the file themselves.
+            tasks = (
+                (_parse_shard, file_name, start, end)
+                for start, end in _iter_shards(file_name, skip, shard_size)
+            )
+            yield from self._parse_parallel(tasks, field_mapper, workers)
+            return
+
+        with open_ndjson(file_name) as fh:
+            if workers > 1:
+                # The stream can only be read here, the workers receive the data.
+                tasks = ((_parse_block, block) for block in _iter_blocks(fh, skip, shard_size))
+                yield from self._parse_parallel(tasks, field_mapper, workers)
+                return
+
+            rows = filter(_is_record_line, fh)
+            if skip:
+                # Lines that are already imported don't need to be parsed.
+                next(islice(rows, skip, skip), None)
+            for batch in chunked(rows, PARSE_BATCH_SIZE):
+                metrics.bytes_read += sum(map(len, batch))
+                yield from field_mapper.parse_lines(batch)
+
+    def _parse_parallel(
+        self,
+        tasks: Iterator[tuple],
+        field_mapper: TableFieldMapper,
+        workers: int,
+    ) -> Iterator[dict[str, list[Record]]]:
+        """Let a pool of processes parse the file, while the records are being written.
+        Each task is a function to call in the worker, followed by its arguments.
+
+        At most 2 tasks per worker are in progress, which keeps the memory usage bounded
+        when the database is slower than the parsing. The schema objects can't be pickled,
+        hence the workers are forked so they inherit the field mapper.
+        """
+        context = multiprocessing.get_context("fork")
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(field_mapper,),
+        )
+        pending: deque[Future] = deque()
+        try:
+            for task in tasks:
+                self.metrics.bytes_read += _task_size(task)
+                pending.append(executor.submit(*task))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Stop quickly when the import failed, or the generator is closed early.
+            executor.shutdown(cancel_futures=True)
+
+
+@contextmanager
+def open_ndjson(source: NDJSONSource) -> Iterator[BinaryIO]:
+    """Open the source for reading, decompressing gzip, bzip2 and zstd data on the fly.
+
+    The source can be a file name (``-`` for stdin), a binary file object
+    or an iterable of byte chunks (e.g. an HTTP response that is streamed).
+    The compression is detected from the first bytes, so this also works for stdin.
+    Data is read in large blocks, and never fully loaded into memory.
+    Given file objects are not closed.
+    """
+    with ExitStack() as stack:
+        if isinstance(source, str | os.PathLike):
+            if str(source) == "-":
+                fh = sys.stdin.buffer
+            else:
+                fh = stack.enter_context(open(source, "rb", buffering=READ_BUFFER_SIZE))
+        elif hasattr(source, "read"):
+            fh = source
+        else:
+            fh = io.BufferedReader(_ChunksReader(source), buffer_size=READ_BUFFER_SIZE)
+
+        if not hasattr(fh, "peek"):
+            # Arbitrary file objects can't tell the first bytes without consuming them.
+            chunks = iter(partial(fh.read, READ_BUFFER_SIZE), b"")
+            fh = io.BufferedReader(_ChunksReader(chunks), buffer_size=READ_BUFFER_SIZE)
+
+        if (compression := _detect_compression(fh.peek(4))) is not None:
+            decompressed = stack.enter_context(_decompress(fh, compression))
+            fh = io.BufferedReader(decompressed, buffer_size=READ_BUFFER_SIZE)
+        yield fh
+
+
+def _detect_compression(head: bytes) -> str | None:
+    """Tell which compression format is used, based on the first bytes of the data."""
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _decompress(fh: BinaryIO, compression: str) -> BinaryIO:
+    """Wrap the stream in a decompressor, which decompresses while it's being read."""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fh, mode="rb")
+    elif compression == "bz2":
+        return bz2.BZ2File(fh, mode="rb")
+
+    try:
+        from compression import zstd  # Python 3.14+
+
+        return zstd.ZstdFile(fh, mode="rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Reading zstd compressed data requires Python 3.14, or the 'zstandard' package."
+        ) from None
+    return zstandard.ZstdDecompressor().stream_reader(
+        fh, read_size=READ_BUFFER_SIZE, read_across_frames=True
+    )
+
+
+class _ChunksReader(io.RawIOBase):
+    """Expose an iterable of byte chunks as a readable stream."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._remainder = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._remainder:
+            try:
+                # A memoryview avoids copying the rest of a large chunk on every read.
+                self._remainder = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0  # EOF
+
+        size = min(len(buffer), len(self._remainder))
+        buffer[:size] = self._remainder[:size]
+        self._remainder = self._remainder[size:]
+        return size
+
+
+def _is_record_line(row: bytes) -> bool:
+    """Tell whether a line holds a record. Blank lines are skipped by all read modes,
+    so the lines are counted the same way when parsing in parallel or resuming an import.
+    """
+    return bool(row) and not row.isspace()
+
+
+def _is_plain_file(source: NDJSONSource) -> bool:
+    """Tell whether the source is an uncompressed file, which can be read in parts."""
+    if not isinstance(source, str | os.PathLike) or str(source) == "-":
+        return False
+    with open(source, "rb") as fh:
+        return _detect_compression(fh.read(4)) is None
+
+
+def _iter_blocks(fh: BinaryIO, skip: int, block_size: int) -> Iterator[bytes]:
+    """Read the stream in blocks of roughly ``block_size`` that end at a line boundary.
+    The first ``skip`` (non-blank) lines are excluded.
+    """
+    while skip:
+        row = fh.readline()
+        if not row:
+            return
+        if _is_record_line(row):
+            skip -= 1
+
+    remainder = b""
+    while block := fh.read(block_size):
+        data = remainder + block
+        end = data.rfind(b"\n") + 1
+        remainder = data[end:]
+        if end:
+            yield data[:end]
+    if remainder:
+        yield remainder
+
+
+def _iter_shards(file_name: PosixPath, skip: int, shard_size: int) -> Iterator[tuple[int, int]]:
+    """Split the file in byte ranges of roughly ``shard_size`` that end at a line boundary.
+    The first ``skip`` (non-blank) lines are excluded.
+    """
+    with open(file_name, "rb") as fh:
+        while skip:
+            row = fh.readline()
+            if not row:
+                return
+            if _is_record_line(row):
+                skip -= 1
+
+        start = fh.tell()
+        file_size = os.fstat(fh.fileno()).st_size
+        while start < file_size:
+            fh.seek(start + shard_size)
+            fh.readline()  # complete the line
+            end = min(fh.tell(), file_size)
+            yield start, end
+            start = end
+
+
+def _init_worker(field_mapper: TableFieldMapper) -> None:
+    """Initialize a worker process for :meth:`NDJSONImporter._parse_parallel`."""
+    global _worker_field_mapper
+    _worker_field_mapper = field_mapper
+
+
+def _parse_shard(file_name: PosixPath, start: int, end: int) -> list[dict[str, list[Record]]]:
+    """Parse the lines in a byte range of the file (this runs in a worker process)."""
+    with open(file_name, "rb") as fh:
+        fh.seek(start)
+        data = fh.read(end - start)
+
+    return _parse_block(data)
+
+
+def _task_size(task: tuple) -> int:
+    """Tell the number of bytes a parse task handles."""
+    if task[0] is _parse_shard:
+        _, _, start, end = task
+        return end - start
+    return len(task[1])
+
+
+def _parse_block(data: bytes) -> list[dict[str, list[Record]]]:
+    """Parse the lines of a block of data (this runs in a worker process)."""
+    return _worker_field_mapper.parse_lines(list(filter(_is_record_line, data.split(b"\n"))))
 
 
 class TableFieldMapper:
     """Conversion of field names during the import.
     The :meth:`parse_object` returns the database records to create for a given NDJson line.
+
+    Geometry values are written as EWKT by default. With ``geometry_format="ewkb"``,
+    the GeoJSON values of a batch are converted into hex-encoded EWKB at once by
+    :meth:`parse_objects`, which is much faster and is parsed faster by PostGIS as well.
+    In that mode, strings (e.g. hex WKB that is already part of the source) are passed as-is.
+
+    With ``validate=True``, the values are checked and converted according to the type,
+    format and required flag of the fields (see :mod:`schematools.importer.coercion`).
+    A source record that can't be parsed is returned as :class:`RejectedRecord`,
+    instead of raising an error that stops the import.
     """
 
     # This is mapping the GOBModel `entity_id` to `Id`
@@ -51,15 +356,31 @@ class TableFieldMapper:
         "neuronId": "Id",
     }
 
-    def __init__(self, dataset_table: DatasetTableSchema):
+    def __init__(
+        self,
+        dataset_table: DatasetTableSchema,
+        geometry_format: str = "ewkt",
+        validate: bool = False,
+    ):
         """Analysis of fields that need special attention during the import."""
+        if geometry_format not in GEOMETRY_FORMATS:
+            raise ValueError(
+                f"Invalid geometry format '{geometry_format}', "
+                f"choose from: {', '.join(GEOMETRY_FORMATS)}"
+            )
+
         self.dataset_table = dataset_table
+        self.geometry_format = geometry_format
+        self.validate = validate
 
         # Create cached provenance objects for all fields that have it.
         # The fields don't return a Provenance object themselves,
         # so provenance can also point to completely different datasource in the future.
+        # The subfields are included, as these are also read by the compiled plan.
         self.cached_provenance: dict[str, Provenance] = {
-            prov: Provenance(prov) for field in dataset_table.fields if (prov := field.provenance)
+            prov: Provenance(prov)
+            for field in dataset_table.get_fields(include_subfields=True)
+            if (prov := field.provenance)
         }
 
         # XXX maybe this is too much of a dirty hack, and it would be better
@@ -83,6 +404,86 @@ class TableFieldMapper:
                     for related_identifier in through_field.related_table.identifier
                 ]
 
+        # The geometry fields that are converted in bulk, with their SRID.
+        self.bulk_geometry_fields: dict[str, int] = (
+            {
+                field.db_name: field.srid
+                for field in dataset_table.get_fields(include_subfields=True)
+                if field.is_geo
+            }
+            if geometry_format == "ewkb"
+            else {}
+        )
+
+        self._plan = self._compile_plan()
+
+    def parse_lines(self, lines: list[bytes]) -> list[dict[str, list[Record]]]:
+        """Parse a batch of NDJSON lines, see :meth:`parse_objects`."""
+        if not self.validate:
+            return self.parse_objects([orjson.loads(line) for line in lines])
+
+        sources = []
+        for line in lines:
+            try:
+                sources.append(orjson.loads(line))
+            except orjson.JSONDecodeError as e:
+                sources.append(RejectedRecord(line.decode(errors="replace"), f"Invalid JSON: {e}"))
+        return self.parse_objects(sources)
+
+    def parse_objects(self, sources: list[dict]) -> list[dict[str, list[Record]]]:
+        """Parse a batch of records, like :meth:`parse_object` does for a single record."""
+        if self.validate:
+            records = [self._parse_or_reject(source) for source in sources]
+        else:
+            records = [self.parse_object(source) for source in sources]
+
+        if self.bulk_geometry_fields:
+            positions = [i for i, record in enumerate(records) if record]
+            invalid = self._format_geometries(
+                [records[i][self.dataset_table.id][0] for i in positions]
+            )
+            for index, reason in invalid.items():
+                position = positions[index]
+                records[position] = RejectedRecord(sources[position], reason)
+        return records
+
+    def _parse_or_reject(self, source: dict | RejectedRecord) -> dict[str, list[Record]]:
+        """Parse the record, or tell why it's rejected."""
+        if isinstance(source, RejectedRecord):
+            return source
+        try:
+            return self.parse_object(source)
+        except INVALID_RECORD_ERRORS as e:
+            # The ValueError messages of the validation already describe the field.
+            reason = str(e) if isinstance(e, ValueError) else f"{e.__class__.__name__}: {e}"
+            return RejectedRecord(source, reason)
+
+    def _format_geometries(self, rows: list[Record]) -> dict[int, str]:
+        """Convert the GeoJSON values of the rows into hex EWKB, with a single call per field.
+        Shapely converts the whole array at once, which avoids creating a Python geometry
+        object for each value (and the WKT formatting that PostGIS would parse again).
+
+        When validating, the positions of the rows with an invalid geometry are returned
+        (with the reason), otherwise an error is raised.
+        """
+        invalid = {}
+        for db_name, srid in self.bulk_geometry_fields.items():
+            geo_positions = [i for i, row in enumerate(rows) if isinstance(row.get(db_name), dict)]
+            if not geo_positions:
+                continue
+
+            geometries = shapely.from_geojson(
+                [orjson.dumps(rows[i][db_name]) for i in geo_positions],
+                on_invalid="ignore" if self.validate else "raise",
+            )
+            geometries = shapely.set_srid(geometries, srid)
+            ewkb_values = shapely.to_wkb(geometries, hex=True, include_srid=True)
+            for i, ewkb in zip(geo_positions, ewkb_values, strict=True):
+                if ewkb is None:
+                    invalid[i] = f"Invalid GeoJSON geometry for '{db_name}'"
+                rows[i][db_name] = ewkb
+        return invalid
+
     def parse_object(self, source: dict) -> dict[str, list[Record]]:
         """Parse the record, convert field names.
         Returns all database records to create, grouped by SQL table name.
@@ -91,59 +492,147 @@ class TableFieldMapper:
         sub_rows = {}
 
         self._fix_through_fields(source)
-        composite_key_filled = self._fill_composite_pk(source, main_row)
+        self._fill_composite_pk(source, main_row)
 
         # Fill all standard fields from the source.
+        for step in self._plan:
+            step(source, main_row, sub_rows)
+
+        return {
+            self.dataset_table.id: [main_row],
+            **sub_rows,
+        }
+
+    def _compile_plan(self) -> list[Callable[[dict, Record, dict], None]]:
+        """Analyse the table fields once, to generate the steps that fill each database record.
+        This avoids walking the schema definition for every imported row.
+        The steps are executed in the order of the fields,
+        so the main identifier is always filled before the nested rows are generated.
+        """
+        plan = []
         for field in self.dataset_table.get_fields(include_subfields=True):
             if field.id == "schema" and field.type.startswith("https://"):
                 continue
-            if field.id == "id" and composite_key_filled:
+            if field.id == "id" and self._has_composite_pk:
                 # The composite key is already inserted in main_row
                 # skip processing "id" field again
                 continue
 
-            # Read the value from the record. As subfields are also part of the main loop,
-            # extra care is needed to make sure the correct dictionary is checked for the value.
-            try:
-                field_source = source[field.parent_field.id] if field.is_subfield else source
-                value = self._get_value(field, field_source)
-            except LookupError:
-                if field.is_identifier_part:
-                    # Avoid overriding the identifier we've just generated with None.
-                    continue
-                # Some missing fields still need to be mentioned in the insert statement.
-                value = None
+            plan.append(self._compile_field(field))
+        return plan
+
+    def _compile_field(self, field: DatasetFieldSchema) -> Callable[[dict, Record, dict], None]:
+        """Generate the step that fills the record (or sub records) for a single field."""
+        get_value = self._compile_getter(field)
+        skip_missing = field.is_identifier_part  # avoid overriding the generated identifier
+        validate = self.validate
 
-            if field.is_nested_table:
-                # Nested object
+        if field.is_nested_table:
+            # Nested object
+            nested_table_id = field.nested_table.id
+
+            def handle_value(value, row: Record, sub_rows: dict, source: dict):
                 if value:
-                    sub_rows[field.nested_table.id] = self._format_nested_rows(
-                        field, value, main_row
-                    )
-            elif field.nm_relation is not None:
-                # M2M through table
+                    sub_rows[nested_table_id] = self._format_nested_rows(field, value, row)
+
+        elif field.nm_relation is not None:
+            # M2M through table
+            through_table_id = field.through_table.id
+
+            def handle_value(value, row: Record, sub_rows: dict, source: dict):
                 if value:
-                    sub_rows[field.through_table.id] = self._format_through_rows(
-                        field, value, source
-                    )
-            elif field.relation is not None and field.is_object and isinstance(value, dict):
-                # Foreign key to temporal (composite) key
-                self._fill_composite_fk(field, value, main_row)
+                    sub_rows[through_table_id] = self._format_through_rows(field, value, source)
+
+        else:
+            db_name = field.db_name
+            format_value = self._get_formatter(field)
+            if validate and field.required:
+                format_value = self._get_required_formatter(field, format_value)
+
+            if field.relation is not None and field.is_object:
+
+                def handle_value(value, row: Record, sub_rows: dict, source: dict):
+                    if isinstance(value, dict):
+                        # Foreign key to temporal (composite) key
+                        self._fill_composite_fk(field, value, row)
+                    else:
+                        row[db_name] = format_value(value)
+
             else:
-                # Any other field.
-                main_row[field.db_name] = self._format_db_value(field, value)
+                # Any other field, which is the most common case. This avoids an extra call.
+                def step(source: dict, row: Record, sub_rows: dict):
+                    try:
+                        value = get_value(source)
+                    except LookupError:
+                        if skip_missing:
+                            if validate:
+                                raise
+                            return
+                        # Some missing fields still need to be mentioned in the insert statement.
+                        value = None
+                    row[db_name] = format_value(value)
+
+                return step
+
+        def step(source: dict, row: Record, sub_rows: dict):
+            try:
+                value = get_value(source)
+            except LookupError:
+                if skip_missing:
+                    if validate:
+                        raise
+                    return
+                value = None
+            handle_value(value, row, sub_rows, source)
 
-        return {
-            self.dataset_table.id: [main_row],
-            **sub_rows,
-        }
+        return step
+
+    def _compile_getter(self, field: DatasetFieldSchema) -> Callable[[dict], Any]:
+        """Generate the function that reads the field value from the source object.
+        The function raises LookupError when the value does not exist in the source.
+        As subfields are also part of the main plan, the getter of a subfield
+        reads the value from the dictionary of the parent field.
+        """
+        if field.provenance:
+            # JSONPath or alias.
+            get_value = self.cached_provenance[field.provenance].getter
+        elif field.db_name == field.id:
+            get_value = operator.itemgetter(field.id)
+        else:
+            db_name = field.db_name
+            field_id = field.id
+
+            def get_value(source: dict) -> Any:
+                if db_name in source:
+                    return source[db_name]
+
+                # camelCase name
+                return source[field_id]
+
+        if not field.is_subfield:
+            return get_value
+
+        parent_id = field.parent_field.id
+        field_id = field.id
+
+        def get_subfield_value(source: dict) -> Any:
+            field_source = source[parent_id]
+            if field_source is None:
+                raise LookupError(field_id)
+            return get_value(field_source)
+
+        return get_subfield_value
+
+    @cached_property
+    def _has_composite_pk(self) -> bool:
+        """Tell whether the table is temporal, and needs a generated composite key."""
+        return not self.dataset_table.is_autoincrement and self.dataset_table.has_composite_key
 
     def _fill_composite_pk(self, source: dict, row: Record) -> bool:
         """Adds a composite key 'id' for temporal tables.
         Return value indicates whether this was done.
         """
-        temporal = not self.dataset_table.is_autoincrement and self.dataset_table.has_composite_key
-        if not temporal:
+        if not self._has_composite_pk:
             return False
 
         row["id"] = self._get_composite_id(source)
@@ -168,33 +657,72 @@ class TableFieldMapper:
             # camelCase name
             return source[field.id]
 
-    def _format_db_value(self, field: DatasetFieldSchema, value) -> Any:
-        """Adjust the value for database format."""
-        if value is None:
-            return None
+    def _get_formatter(self, field: DatasetFieldSchema) -> Callable[[Any], Any]:
+        """Provide the function that adjusts a value of the field for the database format."""
+        if field.is_geo and self.geometry_format == "ewkb":
+
+            def format_value(value):
+                # GeoJSON objects are converted per batch in _format_geometries(),
+                # strings are assumed to be in a format PostGIS accepts (e.g. hex EWKB).
+                return value.hex() if isinstance(value, bytes) else value
+
         elif field.is_geo:
             # Format geometry fields
-            wkt = shape(value).wkt
-            return f"SRID={field.srid};{wkt}"
+            srid = field.srid
+
+            def format_value(value):
+                if value is None:
+                    return None
+                return f"SRID={srid};{shape(value).wkt}"
+
         elif field.id in self.inactive_relation_info:
-            # Convert nested object to JSON string
-            return json.dumps(value)
+
+            def format_value(value):
+                # Convert nested object to JSON string
+                return None if value is None else json.dumps(value)
+
         elif field.is_json_object:
-            return value
-        elif field.type == "array":
-            if value is None:
-                return None
 
-            if isinstance(value, list):
+            def format_value(value):
                 return value
 
-            return [value]
-        elif isinstance(value, (dict, list)):
-            raise ValueError(
-                f"Value of '{field.qualified_id}' should resolve to a scalar, not: {value!r}"
-            )
+        elif field.type == "array":
+
+            def format_value(value):
+                if value is None or isinstance(value, list):
+                    return value
+                return [value]
+
+        elif self.validate:
+            coerce = get_coercer(field)
+
+            def format_value(value):
+                return None if value is None else coerce(value)
+
         else:
-            return value
+            qualified_id = field.qualified_id
+
+            def format_value(value):
+                if isinstance(value, (dict, list)):
+                    raise ValueError(
+                        f"Value of '{qualified_id}' should resolve to a scalar, not: {value!r}"
+                    )
+                return value
+
+        return format_value
+
+    def _get_required_formatter(
+        self, field: DatasetFieldSchema, format_value: Callable[[Any], Any]
+    ) -> Callable[[Any], Any]:
+        """Wrap the formatter of a required field, so a missing value is rejected."""
+        qualified_id = field.qualified_id
+
+        def format_required_value(value):
+            if value is None:
+                raise ValueError(f"Missing value for required field '{qualified_id}'")
+            return format_value(value)
+
+        return format_required_value
 
     def _get_composite_id(self, row: dict) -> str:
         """Concat identifier fields for a single composite field value"""
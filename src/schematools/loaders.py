@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import base64
+import binascii
 import contextlib
+import hashlib
 import json
 import os
-from collections.abc import Callable
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
 from pathlib import Path
 from urllib.parse import urlparse
 
+import orjson
 import requests
 from more_ds.network.url import URL
+from requests.adapters import HTTPAdapter
 
 from schematools import (
     DEFAULT_PROFILE_URL,
@@ -34,10 +41,20 @@ from schematools.types import (
     Scope,
 )
 
+# The number of documents that the URL loaders fetch at the same time.
+DEFAULT_MAX_WORKERS = 8
+
+# The maximum number of bytes that the HTTPDocumentCache keeps on disk.
+DEFAULT_HTTP_CACHE_SIZE = 200 * 1024 * 1024
+
+_NOT_FETCHED = object()
+
 __all__ = (
     "get_schema_loader",
     "CachedSchemaLoader",
     "FileSystemSchemaLoader",
+    "HTTPDocumentCache",
+    "SchemaFileCache",
     "URLSchemaLoader",
     "SchemaLoader",
 )
@@ -235,6 +252,9 @@ class _FileBasedSchemaLoader(CachedSchemaLoader):
     def _read_table(self, dataset_id: str, table_ref: str) -> Json:
         raise NotImplementedError
 
+    def _read_json_path(self, path: Path) -> Json:
+        return read_json_path(path)
+
     def _get_dataset(self, dataset_id: str, prefetch_related: bool = False) -> DatasetSchema:
         """Gets a dataset from the filesystem for dataset_id."""
         schema_json = self._read_dataset(dataset_id)
@@ -297,9 +317,8 @@ class _FileBasedSchemaLoader(CachedSchemaLoader):
         return datasets
 
     def _get_publisher(self, publisher_id: str) -> Publisher:
-        return Publisher.from_dict(
-            read_json_path((self.root.parent / PUBLISHER_DIR / publisher_id).with_suffix(".json"))
-        )
+        path = (self.root.parent / PUBLISHER_DIR / publisher_id).with_suffix(".json")
+        return Publisher.from_dict(self._read_json_path(path))
 
     def _get_all_publishers(self) -> dict[str, Publisher]:
         result = {}
@@ -307,19 +326,19 @@ class _FileBasedSchemaLoader(CachedSchemaLoader):
             if path.name in PUBLISHER_EXCLUDE_FILES:
                 continue
 
-            publisher = Publisher.from_dict(read_json_path(path))
+            publisher = Publisher.from_dict(self._read_json_path(path))
             result[publisher.id] = publisher
 
         return result
 
     def _get_scope(self, ref: str) -> Scope:
-        return Scope.from_dict(read_json_path(self.root.parent / f"{ref}.json"))
+        return Scope.from_dict(self._read_json_path(self.root.parent / f"{ref}.json"))
 
     def _get_all_scopes(self) -> dict[str, Scope]:
         result = {}
         for subdir in (self.root.parent / SCOPE_DIR).iterdir():
             for file in subdir.glob("*.json"):
-                scope = Scope.from_dict(read_json_path(file))
+                scope = Scope.from_dict(self._read_json_path(file))
                 id = scope.db_name
                 if id in result:
                     raise DuplicateScopeId(f'Scope ID "{id}" is already used in another scope')
@@ -335,10 +354,15 @@ class FileSystemSchemaLoader(_FileBasedSchemaLoader):
         schema_url: Path | str,
         *,
         loaded_callback: Callable[[DatasetSchema], None] | None = None,
+        cache_dir: Path | str | None = None,
     ):
         """Initialize the loader with a folder where it needs to search for datasets.
         For the convenience of importing a selected subset, it's possible
         to point to a subfolder of the datasets repository.
+
+        With ``cache_dir`` (or the ``SCHEMA_CACHE_DIR`` environment variable),
+        the parsed JSON files are kept in a :class:`SchemaFileCache` in that folder,
+        so the next process only reads the files that have changed.
         """
         schema_url = Path(schema_url) if isinstance(schema_url, str) else schema_url
         if not schema_url.exists():
@@ -359,6 +383,10 @@ class FileSystemSchemaLoader(_FileBasedSchemaLoader):
             # assume the given folder should be treated as the root folder.
             self.root = schema_url
 
+        cache_dir = cache_dir or os.environ.get("SCHEMA_CACHE_DIR")
+        self._file_cache = SchemaFileCache(cache_dir, self.root) if cache_dir else None
+        self._cache_depth = 0
+
     @classmethod
     def from_file(cls, dataset_file: Path | str, **kwargs):
         """Helper function to support old patterns of loading random files as schema."""
@@ -431,39 +459,139 @@ class FileSystemSchemaLoader(_FileBasedSchemaLoader):
         view_sql = _read_sql_path(dataset_file)
         return self._as_dataset(schema_json, view_sql, prefetch_related=prefetch_related)
 
+    @contextlib.contextmanager
+    def _saving_file_cache(self):
+        """Save the file cache once the outermost retrieval is finished.
+        All methods that read files use this, so the files are cached on any code path.
+        """
+        self._cache_depth += 1
+        try:
+            yield
+        finally:
+            self._cache_depth -= 1
+            if self._file_cache is not None and not self._cache_depth:
+                self._file_cache.save()
+
+    def _read_json_path(self, path: Path) -> Json:
+        if self._file_cache is None:
+            return read_json_path(path)
+        return self._file_cache.read_json(path)
+
+    def _get_dataset(self, dataset_id: str, prefetch_related: bool = False) -> DatasetSchema:
+        with self._saving_file_cache():
+            return super()._get_dataset(dataset_id, prefetch_related=prefetch_related)
+
+    def _get_table(self, dataset: DatasetSchema, table_ref: str) -> DatasetTableSchema:
+        with self._saving_file_cache():
+            return super()._get_table(dataset, table_ref)
+
+    def _get_all_datasets(self) -> dict[str, DatasetSchema]:
+        with self._saving_file_cache():
+            return super()._get_all_datasets()
+
+    def _get_all_publishers(self) -> dict[str, Publisher]:
+        with self._saving_file_cache():
+            return super()._get_all_publishers()
+
+    def _get_all_scopes(self) -> dict[str, Scope]:
+        with self._saving_file_cache():
+            return super()._get_all_scopes()
+
     def _read_index(self) -> dict[str, str]:
         """A mapping of dataset ID to path."""
         # The index determines which datasets will be found.
         # For historical reasons, the filesystem loader can be initialized to work in a subfolder.
         # In that case, it will find fewer datasets, but still resolve them from the true root.
         id_to_path = {}
-        for path in self.schema_url.glob("**/dataset.json"):
-            file_json = read_json_path(path)
-            if not isinstance(file_json, dict) or file_json.get("type") != "dataset":
-                continue
-
-            id_ = file_json.get("id")
-            if id_ in id_to_path:
-                raise RuntimeError(
-                    f"Schema root '{self.root}' contains multiple datasets that named '{id_}', "
-                    f"this will break relating datasets!"
-                )
-            id_to_path[id_] = str(path.parent.resolve().relative_to(self.root))
+        with self._saving_file_cache():
+            for path in self.schema_url.glob("**/dataset.json"):
+                file_json = self._read_json_path(path)
+                if not isinstance(file_json, dict) or file_json.get("type") != "dataset":
+                    continue
+
+                id_ = file_json.get("id")
+                if id_ in id_to_path:
+                    raise RuntimeError(
+                        f"Schema root '{self.root}' contains multiple datasets that named "
+                        f"'{id_}', this will break relating datasets!"
+                    )
+                id_to_path[id_] = str(path.parent.resolve().relative_to(self.root))
         return id_to_path
 
     def _read_dataset(self, dataset_id):
-        dataset_path = self.get_dataset_path(dataset_id)
-        return read_json_path(self.root / dataset_path / "dataset.json")
+        with self._saving_file_cache():
+            dataset_path = self.get_dataset_path(dataset_id)
+            return self._read_json_path(self.root / dataset_path / "dataset.json")
 
     def _read_table(self, dataset_id: str, table_ref: str) -> Json:
-        dataset_path = self.get_dataset_path(dataset_id)
-        return read_json_path(self.root / dataset_path / f"{table_ref}.json")
+        with self._saving_file_cache():
+            dataset_path = self.get_dataset_path(dataset_id)
+            return self._read_json_path(self.root / dataset_path / f"{table_ref}.json")
 
     def _read_view(self, dataset_id: str) -> str:
         dataset_path = self.get_dataset_path(dataset_id)
         return _read_sql_path(self.root / dataset_path / "dataset.sql")
 
 
+class SchemaFileCache:
+    """A persistent cache of the parsed JSON files of a schema repository.
+
+    The files are kept in a single JSON file in the ``cache_dir``, together with
+    their modification time and size. A file is only parsed again from the repository
+    when these have changed, so loading an unchanged repository only reads the cache file.
+    Each read gives a new copy, as the loaded schemas may alter the JSON data.
+    """
+
+    def __init__(self, cache_dir: Path | str, root: Path):
+        root_hash = hashlib.sha256(str(Path(root).resolve()).encode()).hexdigest()[:16]
+        self.path = Path(cache_dir) / f"schemas-{root_hash}.json"
+        self._entries: dict[str, list] | None = None
+        self._changed = False
+
+    @property
+    def entries(self) -> dict[str, list]:
+        """The [modification time, size, JSON text] per file path."""
+        if self._entries is None:
+            try:
+                entries = orjson.loads(self.path.read_bytes())
+            except (OSError, orjson.JSONDecodeError):
+                entries = None
+            # No cache yet, or a cache that can't be read; it's rebuilt on save().
+            self._entries = entries if isinstance(entries, dict) else {}
+        return self._entries
+
+    def read_json(self, path: Path) -> Json:
+        """Load JSON from a path, parsing the file only when it changed."""
+        try:
+            stat = path.stat()
+        except FileNotFoundError as e:
+            raise SchemaObjectNotFound(str(path)) from e
+
+        key = str(path)
+        entry = self.entries.get(key)
+        if (
+            isinstance(entry, list)
+            and len(entry) == 3
+            and entry[:2] == [stat.st_mtime_ns, stat.st_size]
+        ):
+            return orjson.loads(entry[2])
+
+        data = read_json_path(path)
+        self.entries[key] = [stat.st_mtime_ns, stat.st_size, orjson.dumps(data).decode()]
+        self._changed = True
+        return data
+
+    def save(self) -> None:
+        """Write the cache when files were parsed; concurrent processes may each write it."""
+        if not self._changed:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(orjson.dumps(self.entries))
+        tmp_path.replace(self.path)
+        self._changed = False
+
+
 def read_json_path(dataset_file: Path | str) -> Json:
     """Load JSON from a path."""
     dataset_file = Path(dataset_file)  # Path can take both string and Path
@@ -487,25 +615,121 @@ def _read_sql_path(dataset_file: Path) -> str:
         return None
 
 
-def _read_sql_url(url: URL) -> str:
-    """Load view SQL from an URL"""
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code != 200:
-            # Normalize the exception type for "not found" errors.
+class HTTPDocumentCache:
+    """A persistent cache of the documents that the URL loaders fetch.
+
+    A document is stored with its ``ETag`` and ``Last-Modified`` headers, and fetched again
+    using a conditional request. When the server answers ``304 Not Modified``,
+    the stored document is used. When the stored documents exceed ``max_size`` bytes,
+    the least recently used documents are removed.
+    Each document is stored as a JSON file, with the body encoded as base64.
+    """
+
+    def __init__(self, cache_dir: Path | str, max_size: int = DEFAULT_HTTP_CACHE_SIZE):
+        self.folder = Path(cache_dir) / "http"
+        self.max_size = max_size
+        self._size: int | None = None  # the total size of the stored documents
+        self._lock = threading.Lock()
+
+    def get(self, session: requests.Session | None, url: URL, timeout: int) -> requests.Response:
+        """GET the URL, and give the stored document when it didn't change."""
+        path = self._get_path(url)
+        entry = self._load(path)
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = (session or requests).get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            response.status_code = 200
+            response._content = entry["content"]
+            response.encoding = entry["encoding"]
+            with contextlib.suppress(OSError):
+                os.utime(path)  # mark as recently used
+        elif response.status_code == 200 and (
+            response.headers.get("ETag") or response.headers.get("Last-Modified")
+        ):
+            self._store(
+                path,
+                {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "content": response.content,
+                    "encoding": response.encoding,
+                },
+            )
+        return response
+
+    def _get_path(self, url: URL) -> Path:
+        return self.folder / f"{hashlib.sha256(str(url).encode()).hexdigest()}.json"
+
+    def _load(self, path: Path) -> dict | None:
+        """Read a stored document, ignoring a file that can't be read."""
+        try:
+            entry = orjson.loads(path.read_bytes())
+            return {
+                "etag": entry["etag"],
+                "last_modified": entry["last_modified"],
+                "content": base64.b64decode(entry["content"], validate=True),
+                "encoding": entry["encoding"],
+            }
+        except (OSError, orjson.JSONDecodeError, binascii.Error, KeyError, TypeError):
             return None
-        response.raise_for_status()  # All extend from OSError
-        return response.text
-    except requests.exceptions.ConnectionError:
-        return None
+
+    def _store(self, path: Path, entry: dict) -> None:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(
+            orjson.dumps({**entry, "content": base64.b64encode(entry["content"]).decode()})
+        )
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(file.stat().st_size for file in self.folder.glob("*.json"))
+            with contextlib.suppress(FileNotFoundError):
+                self._size -= path.stat().st_size
+            self._size += tmp_path.stat().st_size
+            tmp_path.replace(path)
+            if self._size > self.max_size:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used documents, until the cache fits in ``max_size``."""
+        files = []
+        for file in self.folder.glob("*.json"):
+            with contextlib.suppress(FileNotFoundError):
+                files.append((file.stat(), file))
+        files.sort(key=lambda item: item[0].st_mtime)
+        self._size = sum(stat.st_size for stat, _ in files)
+        for stat, file in files:
+            if self._size <= self.max_size:
+                break
+            file.unlink(missing_ok=True)
+            self._size -= stat.st_size
 
 
 class _SharedConnectionMixin:
-    """Internal mixin for connection sharing."""
+    """Internal mixin for connection sharing.
 
-    def __init__(self, *args, **kwargs):
+    The documents can be fetched by ``max_workers`` threads at the same time,
+    these share the session and keep their connections alive.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_workers: int = 1,
+        cache_dir: Path | str | None = None,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self._connection = None  # can be shared between methods
+        self.max_workers = max(1, max_workers)
+        cache_dir = cache_dir or os.environ.get("SCHEMA_CACHE_DIR")
+        self._http_cache = HTTPDocumentCache(cache_dir) if cache_dir else None
 
     @contextlib.contextmanager
     def _persistent_connection(self):
@@ -515,38 +739,137 @@ class _SharedConnectionMixin:
             yield
         else:
             self._connection = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+            self._connection.mount("http://", adapter)
+            self._connection.mount("https://", adapter)
             with self._connection:  # calls .close() on exit
                 yield
             self._connection = None
 
+    def _map_concurrent(self, func: Callable, items: Iterable) -> list:
+        """Apply the function to all items, using at most ``max_workers`` threads."""
+        items = list(items)
+        if self.max_workers == 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        with (
+            self._persistent_connection(),
+            ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool,
+        ):
+            return list(pool.map(func, items))
+
+    def _read_json_urls(self, urls: Iterable[URL]) -> list[Json]:
+        """Load JSON from many URLs, concurrently when ``max_workers`` allows this."""
+        return self._map_concurrent(self._read_json_url, urls)
+
+    def _get_url(self, url: URL, timeout: int) -> requests.Response:
+        """GET the URL, using the HTTP cache when there is one."""
+        if self._http_cache is None:
+            return (self._connection or requests).get(url, timeout=timeout)
+        return self._http_cache.get(self._connection, url, timeout=timeout)
+
     def _read_json_url(self, url) -> Json:
         """Load JSON from an URL"""
-        response = (self._connection or requests).get(url, timeout=60)
+        response = self._get_url(url, timeout=60)
         if response.status_code == 404:
             # Normalize the exception type for "not found" errors.
             raise SchemaObjectNotFound(url)
         response.raise_for_status()  # All extend from OSError
         return response.json()
 
+    def _read_sql_url(self, url: URL) -> str:
+        """Load view SQL from an URL"""
+        try:
+            response = self._get_url(url, timeout=10)
+            if response.status_code != 200:
+                # Normalize the exception type for "not found" errors.
+                return None
+            response.raise_for_status()  # All extend from OSError
+            return response.text
+        except requests.exceptions.ConnectionError:
+            return None
+
 
 class URLSchemaLoader(_SharedConnectionMixin, _FileBasedSchemaLoader):
-    """Loader that loads dataset schemas from an URL."""
+    """Loader that loads dataset schemas from an URL.
+
+    When loading all datasets, publishers or scopes, the documents are fetched
+    by ``max_workers`` threads at the same time.
+    With ``cache_dir`` (or the ``SCHEMA_CACHE_DIR`` environment variable), the documents
+    are kept in a :class:`HTTPDocumentCache`, and only downloaded again when changed.
+    """
 
     def __init__(
         self,
         schema_url: URL | str | None = None,
         *,
         loaded_callback: Callable[[DatasetSchema], None] | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        cache_dir: Path | str | None = None,
     ):
         super().__init__(
             URL(schema_url or os.environ.get("SCHEMA_URL") or DEFAULT_SCHEMA_URL),
             loaded_callback=loaded_callback,
+            max_workers=max_workers,
+            cache_dir=cache_dir,
         )
+        # The documents that were fetched ahead, by URL.
+        self._prefetched: dict[str, Json | str | None] = {}
 
     def _get_all_datasets(self) -> dict[str, DatasetSchema]:
         """Gets all datasets from a web url based on the `self.schema_url` path."""
         with self._persistent_connection():
-            return super()._get_all_datasets()
+            if self.max_workers > 1:
+                self._prefetch_datasets()
+            try:
+                return super()._get_all_datasets()
+            finally:
+                self._prefetched.clear()
+
+    def _prefetch_datasets(self) -> None:
+        """Fetch the documents of all datasets and their tables concurrently.
+
+        The datasets are still created one by one from these documents. A document that
+        can't be fetched here is fetched again when it's needed, which reports the error.
+        """
+        dataset_paths = list(self._dataset_paths.values())
+        datasets = self._prefetch(
+            self._read_json_url, [self.schema_url / path / "dataset" for path in dataset_paths]
+        )
+        self._prefetch(
+            self._read_sql_url,
+            [self.schema_url / path / "dataset.sql" for path in dataset_paths],
+        )
+        self._prefetch(
+            self._read_json_url,
+            [
+                self.schema_url / path / table_json["$ref"]
+                for path, dataset_json in zip(dataset_paths, datasets, strict=True)
+                if isinstance(dataset_json, dict)
+                for version in dataset_json.get("versions", {}).values()
+                for table_json in version.get("tables", [])
+                if "$ref" in table_json
+            ],
+        )
+
+    def _prefetch(self, reader: Callable, urls: list[URL]) -> list:
+        def _fetch(url: URL):
+            try:
+                return reader(url)
+            except Exception:  # noqa: BLE001
+                return _NOT_FETCHED
+
+        results = self._map_concurrent(_fetch, urls)
+        for url, result in zip(urls, results, strict=True):
+            if result is not _NOT_FETCHED:
+                self._prefetched[str(url)] = result
+        return results
+
+    def _read_prefetched(self, url: URL, reader: Callable):
+        """Take the document when it was fetched ahead, or fetch it now."""
+        try:
+            return self._prefetched.pop(str(url))
+        except KeyError:
+            return reader(url)
 
     def _get_dataset(self, dataset_id: str, prefetch_related: bool = True) -> DatasetSchema:
         """Retrieve a dataset and its contents with a single connection."""
@@ -558,15 +881,18 @@ class URLSchemaLoader(_SharedConnectionMixin, _FileBasedSchemaLoader):
 
     def _read_dataset(self, dataset_id: str) -> Json:
         dataset_path = self.get_dataset_path(dataset_id)
-        return self._read_json_url(self.schema_url / dataset_path / "dataset")
+        url = self.schema_url / dataset_path / "dataset"
+        return self._read_prefetched(url, self._read_json_url)
 
     def _read_view(self, dataset_id: str) -> str:
         dataset_path = self.get_dataset_path(dataset_id)
-        return _read_sql_url(self.schema_url / dataset_path / "dataset.sql")
+        url = self.schema_url / dataset_path / "dataset.sql"
+        return self._read_prefetched(url, self._read_sql_url)
 
     def _read_table(self, dataset_id: str, table_ref: str) -> Json:
         dataset_path = self.get_dataset_path(dataset_id)
-        return self._read_json_url(self.schema_url / dataset_path / table_ref)
+        url = self.schema_url / dataset_path / table_ref
+        return self._read_prefetched(url, self._read_json_url)
 
     def _get_publisher_url(self) -> URL:
         return URL(self.schema_url.rpartition("/datasets")[0]) / "publishers"
@@ -580,12 +906,12 @@ class URLSchemaLoader(_SharedConnectionMixin, _FileBasedSchemaLoader):
 
     def _get_all_publishers(self) -> dict[str, Publisher]:
         url = self._get_publisher_url()
-        index = self._read_json_url(url / "index")
-        result = {}
-        for id_ in index:
-            result[id_] = Publisher.from_dict(self._read_json_url(url / id_))
-
-        return result
+        with self._persistent_connection():
+            index = list(self._read_json_url(url / "index"))
+            publishers = self._read_json_urls(url / id_ for id_ in index)
+        return {
+            id_: Publisher.from_dict(data) for id_, data in zip(index, publishers, strict=True)
+        }
 
     def _get_scope(self, ref: str) -> Scope:
         base_url = URL(self.schema_url.rpartition("/datasets")[0])
@@ -593,14 +919,18 @@ class URLSchemaLoader(_SharedConnectionMixin, _FileBasedSchemaLoader):
 
     def _get_all_scopes(self) -> dict[str, Scope]:
         url = self._get_scopes_url()
-        index: dict[str, list[str]] = self._read_json_url(url / "index")
-        result = {}
-        for datateam, scope_list in index.items():
-            for id_ in scope_list:
-                if id_ in result:
+        with self._persistent_connection():
+            index: dict[str, list[str]] = self._read_json_url(url / "index")
+            refs = [(team, id_) for team, scope_list in index.items() for id_ in scope_list]
+            ids = set()
+            for _, id_ in refs:
+                if id_ in ids:
                     raise DuplicateScopeId(f'Scope ID "{id_}" is already used in another scope')
-                result[id_] = Scope.from_dict(self._read_json_url(url / datateam / id_))
-        return result
+                ids.add(id_)
+            scopes = self._read_json_urls(url / team / id_ for team, id_ in refs)
+        return {
+            id_: Scope.from_dict(data) for (_, id_), data in zip(refs, scopes, strict=True)
+        }
 
 
 class FileSystemProfileLoader(ProfileLoader):
@@ -633,15 +963,16 @@ class FileSystemProfileLoader(ProfileLoader):
 
 
 class URLProfileLoader(_SharedConnectionMixin, ProfileLoader):
-    """Loading profiles from a URL"""
+    """Loading profiles from a URL, optionally using a :class:`HTTPDocumentCache`."""
 
     def __init__(
         self,
         profiles_url: URL | str | None = None,
         *,
         loaded_callback: Callable[[ProfileSchema], None] | None = None,
+        cache_dir: Path | str | None = None,
     ):
-        super().__init__()
+        super().__init__(cache_dir=cache_dir)
         self.profiles_url = URL(
             profiles_url or os.environ.get("PROFILES_URL", DEFAULT_PROFILE_URL)
         )
@@ -1030,7 +1030,11 @@ class DatasetVersionSchema(SchemaType):
         return sorted(exports, key=lambda e: (e.filetype, len(e.tables)))
 
 
-ExportFileType = Literal["csv", "jsonl", "gpkg", "geojson"]
+ExportFileType = Literal["csv", "jsonl", "gpkg", "geojson", "parquet"]
+
+
+class BlobProperties(Protocol):
+    metadata: dict[str, str]
 
 
 class BlobClient(Protocol):
@@ -1038,6 +1042,8 @@ class BlobClient(Protocol):
         self, data: BufferedReader, overwrite: bool, metadata: dict[str, Any] | None
     ): ...
 
+    def get_blob_properties(self) -> BlobProperties: ...
+
 
 class ContainerClient(Protocol):
     def get_blob_client(self, blob_name: str) -> BlobClient: ...
@@ -1056,6 +1062,10 @@ class ExportContext:
     client: StorageClient | None
     size: int | None = None
     temporal_date: datetime.datetime | None = None
+    # Let the database write the file using COPY TO STDOUT (not for geopackage and parquet).
+    use_copy: bool = False
+    # Export the tables in slices of this number of rows, to retry only a failed slice.
+    slice_size: int | None = None
 
 
 @dataclasses.dataclass(frozen=True)
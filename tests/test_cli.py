@@ -454,3 +454,60 @@ def test_ingest_does_not_write_dataset_without_uc_provenance(tmp_path: Path, mon
     assert result.exit_code == 0
     assert dataset_file.read_text(encoding="utf-8") == f"{original_content}\n"
     assert not (dataset_dir / "cafes").exists()
+
+
+def test_import_ndjson_dry_run(here: Path, monkeypatch, meetbouten_schema) -> None:
+    monkeypatch.setattr(
+        "schematools.cli._get_dataset_schema", lambda *_a, **_kw: meetbouten_schema
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(
+        schema,
+        [
+            "import",
+            "ndjson",
+            "--db-url",
+            "postgresql://unused",
+            "--dry-run",
+            "meetbouten",
+            "metingen",
+            str(here / "files" / "data" / "metingen.ndjson"),
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Imported 4 records (0 rows)" in result.output
+    assert "duplicates skipped: 0" in result.output
+
+
+def test_import_ndjson_dry_run_validate(
+    here: Path, tmp_path: Path, monkeypatch, meetbouten_schema
+) -> None:
+    monkeypatch.setattr(
+        "schematools.cli._get_dataset_schema", lambda *_a, **_kw: meetbouten_schema
+    )
+    ndjson_path = tmp_path / "meetbouten.ndjson"
+    ndjson_path.write_bytes(
+        (here / "files" / "data" / "meetbouten.ndjson").read_bytes() + b'{"identificatie": "x"}\n'
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(
+        schema,
+        [
+            "import",
+            "ndjson",
+            "--db-url",
+            "postgresql://unused",
+            "--dry-run",
+            "--validate",
+            "meetbouten",
+            "meetbouten",
+            str(ndjson_path),
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Imported 1 records (0 rows)" in result.output
+    assert "invalid records rejected: 1" in result.output
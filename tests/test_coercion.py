@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import datetime
+
+import pytest
+
+from schematools.importer.coercion import get_coercer
+from schematools.types import DatasetFieldSchema
+
+
+def _field(type: str, format: str | None = None) -> DatasetFieldSchema:
+    data = {"type": type} if format is None else {"type": type, "format": format}
+    return DatasetFieldSchema(id="value", _parent_table=None, **data)
+
+
+@pytest.mark.parametrize(
+    "field,value,expected",
+    [
+        (_field("integer"), "12", 12),
+        (_field("integer"), 12.0, 12),
+        (_field("number"), "1.5", 1.5),
+        (_field("string"), 12, "12"),
+        (_field("boolean"), "false", False),
+        (_field("string", "date"), "2020-01-31T10:00:00", datetime.date(2020, 1, 31)),
+        (
+            _field("string", "date-time"),
+            "2020-01-31T10:00:00Z",
+            datetime.datetime(2020, 1, 31, 10, tzinfo=datetime.timezone.utc),
+        ),
+        (_field("string", "time"), "10:30", datetime.time(10, 30)),
+        (_field("string", "uri"), "https://example.com/", "https://example.com/"),
+    ],
+)
+def test_coercer_converts(field, value, expected):
+    """Prove that the values are converted to the type of the field."""
+    assert get_coercer(field)(value) == expected
+
+
+@pytest.mark.parametrize(
+    "field,value",
+    [
+        (_field("integer"), "twelve"),
+        (_field("integer"), 1.5),
+        (_field("integer"), True),
+        (_field("string"), {"a": 1}),
+        (_field("boolean"), "yes"),
+        (_field("string", "date"), 20200131),
+    ],
+)
+def test_coercer_rejects(field, value):
+    with pytest.raises(ValueError, match="Invalid value for 'value'"):
+        get_coercer(field)(value)
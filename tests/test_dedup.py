@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from schematools.importer.dedup import DatabaseKeyIndex, DigestKeyIndex, MemoryKeyIndex
+
+
+@pytest.mark.parametrize("key_index_class", [MemoryKeyIndex, DigestKeyIndex])
+def test_key_index(key_index_class):
+    """Prove that the lookups detect existing and newly added keys."""
+    key_index = key_index_class()
+    key_index.update(["A.1", "A.2", 3])
+    key_index.add("B.1")
+
+    assert "A.1" in key_index
+    assert "B.1" in key_index
+    assert 3 in key_index
+    assert "3" not in key_index  # type is part of the key, like a set
+    assert "C.1" not in key_index
+    assert len(key_index) == 4
+
+
+def test_digest_key_index_merges():
+    """Prove that pending keys are merged into the sorted array."""
+    key_index = DigestKeyIndex(min_merge_size=10)
+    for i in range(25):
+        key_index.add(i)
+
+    assert len(key_index._pending) < 10
+    assert all(i in key_index for i in range(25))
+    assert 25 not in key_index
+
+
+def test_digest_key_index_distinct_keys():
+    """Prove that keys with an equal builtin hash are kept apart."""
+    key_index = DigestKeyIndex()
+    key_index.add(-1)
+    key_index.add(1)
+
+    assert -2 not in key_index  # hash(-1) == hash(-2)
+    assert (1, "A") not in key_index
+    key_index.update([-2, (1, "A")])
+    assert -2 in key_index
+    assert (1, "A") in key_index
+    assert len(key_index) == 4
+
+
+@pytest.mark.parametrize("key_index_class", [MemoryKeyIndex, DigestKeyIndex])
+def test_key_index_equal_numbers(key_index_class):
+    """Prove that numbers that compare equal are the same key, like in a set."""
+    key_index = key_index_class()
+    key_index.update([1, 0.5, (2, "A")])
+
+    assert 1.0 in key_index
+    assert Decimal(1) in key_index
+    assert True in key_index
+    assert Decimal("0.5") in key_index
+    assert (2.0, "A") in key_index
+    assert 1.5 not in key_index
+    assert Decimal("0.1") not in key_index
+    assert len(key_index) == 3
+
+
+def test_database_key_index():
+    """Prove that this lookup leaves the work to the database."""
+    key_index = DatabaseKeyIndex()
+    key_index.update(["A.1"])
+    key_index.add("A.1")
+    assert "A.1" not in key_index
+    assert key_index.skips_in_database
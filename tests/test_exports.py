@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import dataclasses
 import logging
 import shlex
 import sqlite3
+import time
+import zipfile
 from contextlib import closing
+from functools import partialmethod
 from pathlib import Path
 from typing import Any
 
@@ -16,10 +20,13 @@ from sqlalchemy.sql import text
 
 from schematools.cli import export as export_cli
 from schematools.exports import export, logger
+from schematools.exports.base import BaseExporter, ExportPlanCache
 from schematools.exports.csv import CsvExporter
 from schematools.exports.geojson import GeoJsonExporter
 from schematools.exports.geopackage import GeopackageExporter
 from schematools.exports.jsonlines import JsonLinesExporter
+from schematools.exports.parquet import ParquetExporter
+from schematools.exports.streaming import LocalStorageClient
 from schematools.importer.ndjson import NDJSONImporter
 from schematools.types import Export, ExportContext
 
@@ -103,6 +110,18 @@ class TestExports:
         importer.generate_db_objects("fietspaaltjes", truncate=True, ind_extra_index=False)
         importer.load_file(ndjson_path)
 
+    @pytest.fixture
+    def fietspaaltjes_rows(self, here, engine, fietspaaltjes_export_schema, tmp_path):
+        """Five fietspaaltjes, to export in slices."""
+        record = orjson.loads((here / "files" / "data" / "fietspaaltjes.ndjson").read_bytes())
+        ndjson_path = tmp_path / "fietspaaltjes.ndjson"
+        ndjson_path.write_bytes(
+            b"\n".join(orjson.dumps({**record, "id": f"paaltje {i}"}) for i in range(5))
+        )
+        importer = NDJSONImporter(fietspaaltjes_export_schema, engine)
+        importer.generate_db_objects("fietspaaltjes", truncate=True, ind_extra_index=False)
+        importer.load_file(ndjson_path)
+
     @pytest.fixture
     def tmp_folder(self):
         """Creates a temporary folder for exports and cleans it up after the test."""
@@ -117,14 +136,14 @@ class TestExports:
     def create_context(self, engine, storage_client, tmp_folder):
         """Factory fixture to create ExportContext objects for testing."""
 
-        def create(dataset, export):
+        def create(dataset, export, **kwargs):
             return ExportContext(
                 engine=engine,
                 client=storage_client,
                 dataset=dataset,
                 export=export,
                 folder=tmp_folder,
-                size=1,
+                **{"size": 1, **kwargs},
             )
 
         return create
@@ -238,6 +257,43 @@ class TestExports:
                 "1,10180001.1,12,De meetbout,SRID=28992;POINT(119434 487091.6),,\n"
             )
 
+    def test_export_plan_cache(
+        self, meetbouten_export_schema, meetbouten_content, create_context, monkeypatch
+    ):
+        """Prove that exporters sharing a plan cache only build the tables and plans once."""
+        export_definition = meetbouten_export_schema.versions["v1"].exports[0]
+        context = create_context(meetbouten_export_schema, export_definition)
+        plans = ExportPlanCache()
+        exporter = CsvExporter(context, plans=plans)
+        assert CsvExporter(context, plans=plans).sa_tables is exporter.sa_tables
+
+        built = []
+        build_table_plan = CsvExporter._build_table_plan
+        monkeypatch.setattr(
+            CsvExporter,
+            "_build_table_plan",
+            lambda self, table: built.append(table.id) or build_table_plan(self, table),
+        )
+        exporter.export_tables()
+        CsvExporter(context, plans=plans).export_tables()
+        JsonLinesExporter(context, plans=plans).get_table_plan(export_definition.tables[0])
+        assert built == ["meetbouten"]
+        plan = exporter.get_table_plan(export_definition.tables[0])
+        assert [column.name for column in plan.columns][0] == "identificatie"
+
+    def test_csv_export_use_copy(
+        self, meetbouten_export_schema, meetbouten_content, create_context
+    ):
+        """Prove that COPY TO STDOUT writes the same csv content."""
+        export_definition = meetbouten_export_schema.versions["v1"].exports[0]
+        context = create_context(meetbouten_export_schema, export_definition, use_copy=True)
+        CsvExporter(context).export_tables()
+        with open(context.folder / "meet_bouten_v1_meetbouten_openbaar.csv") as out_file:
+            assert out_file.read() == (
+                "Identificatie,Ligtinbuurtid,Merkcode,Merkomschrijving,Geometrie,Genesteinfonaam,Genesteinfonummer\n"
+                "1,10180001.1,12,De meetbout,SRID=28992;POINT(119434 487091.6),,\n"
+            )
+
     def test_export_failure_skips_publish_and_returns_failures(
         self,
         engine,
@@ -354,6 +410,301 @@ class TestExports:
         assert "csv" not in storage_client.uploaded_blobs
         assert list(storage_client.uploaded_blobs["jsonlines"].keys()) == [jsonl_export.filename]
 
+    def test_export_stream(
+        self,
+        engine,
+        export_schema_loader,
+        fietspaaltjes_export_schema,
+        fietspaaltjes_content,
+        tmp_folder,
+        tmp_path,
+        monkeypatch,
+    ):
+        """Prove that a streamed export gives the same zip file, without local files."""
+        monkeypatch.setattr(
+            export_schema_loader,
+            "get_all_datasets",
+            lambda: {"fietspaaltjes": fietspaaltjes_export_schema},
+        )
+        storage_client = LocalStorageClient(tmp_path)
+
+        failures = export(
+            engine,
+            storage_client,
+            output_path=str(tmp_folder),
+            stream=True,
+            loader=export_schema_loader,
+            cleanup=False,
+        )
+
+        assert failures == []
+        assert list(tmp_folder.iterdir()) == []
+        blob_name = "bulk-data/csv/fietspaaltjes_v1_all_openbaar.csv.zip"
+        with zipfile.ZipFile(tmp_path / blob_name) as zipf:
+            assert zipf.namelist() == ["fietspaaltjes_v1_fietspaaltjes_openbaar.csv"]
+            lines = zipf.read("fietspaaltjes_v1_fietspaaltjes_openbaar.csv").splitlines()
+        assert len(lines) > 1
+        assert storage_client.metadata[blob_name]["table_ids"] == "fietspaaltjes"
+
+    def test_export_stream_failure_aborts_upload(
+        self,
+        engine,
+        export_schema_loader,
+        fietspaaltjes_export_schema,
+        fietspaaltjes_content,
+        tmp_folder,
+        tmp_path,
+        monkeypatch,
+    ):
+        """Prove that a failed table doesn't publish a partial zip file."""
+        monkeypatch.setattr(
+            export_schema_loader,
+            "get_all_datasets",
+            lambda: {"fietspaaltjes": fietspaaltjes_export_schema},
+        )
+
+        def _fail_halfway(self, file_handle, *_args):
+            file_handle.write("partial,data\n" * 100_000)
+            raise RuntimeError("forced exporter failure")
+
+        monkeypatch.setattr(CsvExporter, "write_rows", _fail_halfway)
+
+        failures = export(
+            engine,
+            LocalStorageClient(tmp_path),
+            output_path=str(tmp_folder),
+            stream=True,
+            loader=export_schema_loader,
+        )
+
+        assert [(f.table_id, f.error_message) for f in failures] == [
+            ("fietspaaltjes", "forced exporter failure")
+        ]
+        assert list(tmp_path.rglob("*.zip*")) == []
+
+    def test_export_incremental(
+        self,
+        here,
+        engine,
+        export_schema_loader,
+        fietspaaltjes_export_schema,
+        fietspaaltjes_content,
+        tmp_folder,
+        tmp_path,
+        monkeypatch,
+        caplog,
+    ):
+        """Prove that exports are skipped until the data of their tables changes."""
+        caplog.set_level(logging.INFO)
+        monkeypatch.setattr(
+            export_schema_loader,
+            "get_all_datasets",
+            lambda: {"fietspaaltjes": fietspaaltjes_export_schema},
+        )
+        storage_client = LocalStorageClient(tmp_path)
+        blob_name = "bulk-data/csv/fietspaaltjes_v1_all_openbaar.csv.zip"
+
+        def _export():
+            caplog.clear()
+            return export(
+                engine,
+                storage_client,
+                output_path=str(tmp_folder),
+                incremental=True,
+                loader=export_schema_loader,
+            )
+
+        assert _export() == []
+        fingerprint = storage_client.metadata[blob_name]["fingerprint"]
+        assert "is unchanged" not in caplog.text
+
+        assert _export() == []
+        assert "is unchanged; skipping." in caplog.text
+        assert "Uploaded fietspaaltjes_v1_all_openbaar.csv.zip" not in caplog.text
+
+        # Reloading the table (truncate + insert) changes the fingerprint.
+        importer = NDJSONImporter(fietspaaltjes_export_schema, engine)
+        importer.generate_db_objects("fietspaaltjes", truncate=True, ind_extra_index=False)
+        importer.load_file(here / "files" / "data" / "fietspaaltjes.ndjson")
+
+        assert _export() == []
+        assert "Uploaded fietspaaltjes_v1_all_openbaar.csv.zip" in caplog.text
+        assert storage_client.metadata[blob_name]["fingerprint"] != fingerprint
+
+        # A failing fingerprint query exports the data, without a fingerprint.
+        def _fail(self):
+            raise RuntimeError("forced fingerprint failure")
+
+        monkeypatch.setattr(BaseExporter, "fingerprint", _fail)
+        assert _export() == []
+        assert "Can't determine the fingerprint" in caplog.text
+        assert "Uploaded fietspaaltjes_v1_all_openbaar.csv.zip" in caplog.text
+        assert "fingerprint" not in storage_client.metadata[blob_name]
+
+    def test_export_table_in_slices_resumes(
+        self, fietspaaltjes_export_schema, fietspaaltjes_rows, create_context, monkeypatch
+    ):
+        """Prove that a failed slice is retried by itself, and the slices are merged."""
+        export_definition = fietspaaltjes_export_schema.versions["v1"].exports[0]
+        table = export_definition.tables[0]
+        context = create_context(fietspaaltjes_export_schema, export_definition, size=None)
+        CsvExporter(context).export_tables()
+        path = context.folder / export_definition.table_filename(table.id)
+        expected = path.read_text().splitlines()
+        path.unlink()
+
+        write_rows = CsvExporter.write_rows
+        calls = []
+
+        def _fail_second_call(self, *args):
+            calls.append(args[3])
+            if len(calls) == 2:
+                raise RuntimeError("forced exporter failure")
+            write_rows(self, *args)
+
+        monkeypatch.setattr(CsvExporter, "write_rows", _fail_second_call)
+        context.slice_size = 2
+
+        failures = CsvExporter(context).export_tables(max_attempts=1)
+        assert [f.error_message for f in failures] == ["forced exporter failure"]
+        assert not path.exists()
+        assert sorted(p.name.rsplit(".", 1)[1] for p in context.folder.iterdir()) == [
+            "json",  # the slices checkpoint
+            "part00000",
+        ]
+
+        assert CsvExporter(context).export_tables(max_attempts=1) == []
+        assert len(calls) == 4  # the first slice is not exported again
+        lines = path.read_text().splitlines()
+        assert lines[0] == expected[0]
+        assert sorted(lines[1:]) == sorted(expected[1:])
+        assert len(lines) == 6
+        assert [p.name for p in context.folder.iterdir()] == [path.name]
+
+    def test_export_table_slices_failure(
+        self,
+        engine,
+        export_schema_loader,
+        fietspaaltjes_export_schema,
+        fietspaaltjes_rows,
+        tmp_folder,
+        tmp_path,
+        monkeypatch,
+    ):
+        """Prove that a failure to plan the slices is reported as a table failure."""
+
+        def _fail(self, table):
+            raise RuntimeError("forced slices failure")
+
+        monkeypatch.setattr(BaseExporter, "table_slices", _fail)
+        monkeypatch.setattr(
+            export_schema_loader,
+            "get_all_datasets",
+            lambda: {"fietspaaltjes": fietspaaltjes_export_schema},
+        )
+
+        failures = export(
+            engine,
+            LocalStorageClient(tmp_path / "storage"),
+            output_path=str(tmp_folder),
+            workers=2,
+            slice_size=2,
+            loader=export_schema_loader,
+        )
+        assert failures
+        assert {f.error_message for f in failures} == {"forced slices failure"}
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_export_slices_in_parallel(
+        self,
+        engine,
+        export_schema_loader,
+        fietspaaltjes_export_schema,
+        fietspaaltjes_rows,
+        tmp_folder,
+        tmp_path,
+        monkeypatch,
+        executor,
+    ):
+        """Prove that the slices of a table are exported by different workers."""
+        monkeypatch.setattr(
+            export_schema_loader,
+            "get_all_datasets",
+            lambda: {"fietspaaltjes": fietspaaltjes_export_schema},
+        )
+        storage_path = tmp_path / "storage"
+
+        failures = export(
+            engine,
+            LocalStorageClient(storage_path),
+            output_path=str(tmp_folder),
+            workers=3,
+            executor=executor,
+            slice_size=2,
+            loader=export_schema_loader,
+        )
+
+        assert failures == []
+        assert list(tmp_folder.iterdir()) == []
+        zip_path = storage_path / "bulk-data/csv/fietspaaltjes_v1_all_openbaar.csv.zip"
+        with zipfile.ZipFile(zip_path) as zipf:
+            lines = zipf.read("fietspaaltjes_v1_fietspaaltjes_openbaar.csv").splitlines()
+        assert len(lines) == 6
+        assert sorted(line.split(b",")[0] for line in lines[1:]) == [
+            f"paaltje {i}".encode() for i in range(5)
+        ]
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_export_parallel_reports_failures_in_order(
+        self,
+        engine,
+        storage_client,
+        export_schema_loader,
+        gebieden_export_schema,
+        tmp_folder,
+        monkeypatch,
+        executor,
+    ):
+        """The tables are exported concurrently, but the failures keep the table order."""
+        monkeypatch.setattr(
+            export_schema_loader, "get_all_datasets", lambda: {"gebieden": gebieden_export_schema}
+        )
+        importer = NDJSONImporter(gebieden_export_schema, engine)
+        for table in gebieden_export_schema.tables:
+            importer.generate_db_objects(table.id, truncate=False, ind_extra_index=False)
+
+        def _reversed_failures(self, file_handle, table, *_args):
+            # Let the first tables fail last.
+            time.sleep(0.1 * (len(self.tables) - self.tables.index(table)))
+            raise RuntimeError(f"failed {table.id}")
+
+        monkeypatch.setattr(CsvExporter, "write_rows", _reversed_failures)
+        monkeypatch.setattr(
+            BaseExporter, "export_table", partialmethod(BaseExporter.export_table, max_attempts=1)
+        )
+
+        failures = export(
+            engine,
+            storage_client,
+            output_path=str(tmp_folder),
+            workers=4,
+            executor=executor,
+            max_db_queries=4,
+            loader=export_schema_loader,
+        )
+
+        expected = [
+            (export.filename_without_zip, table_id)
+            for version in gebieden_export_schema.versions.values()
+            for export in version.exports
+            if export.filetype == "csv"
+            for table_id in export.table_ids
+        ]
+        assert [(f.filename, f.table_id) for f in failures] == expected
+        assert [f.error_message for f in failures] == [f"failed {t}" for _, t in expected]
+        assert "csv" not in storage_client.uploaded_blobs
+        assert set(storage_client.uploaded_blobs) == {"geojson", "geopackage", "jsonlines"}
+
     def test_base_exporter_retries_and_writes_atomically(
         self,
         gebieden_export_schema,
@@ -488,14 +839,17 @@ class TestExports:
             assert len(lines) == 2  # includes the headerline
             assert lines[1].split(",")[0] == "2"  # volgnummer == 2
 
-    def test_jsonlines_export(self, meetbouten_export_schema, meetbouten_content, create_context):
+    @pytest.mark.parametrize("use_copy", [False, True])
+    def test_jsonlines_export(
+        self, meetbouten_export_schema, meetbouten_content, create_context, use_copy
+    ):
         """Prove that jsonlines export contains the correct content."""
         export_definition = next(
             exp
             for exp in meetbouten_export_schema.versions["v1"].exports
             if exp.filetype == "jsonl"
         )
-        context = create_context(meetbouten_export_schema, export_definition)
+        context = create_context(meetbouten_export_schema, export_definition, use_copy=use_copy)
         JsonLinesExporter(context).export_tables()
         with open(context.folder / "meet_bouten_v1_meetbouten_openbaar.jsonl") as out_file:
             result = orjson.loads(out_file.read())
@@ -559,14 +913,17 @@ class TestExports:
                 "wijken_v1",
             ]
 
-    def test_geojson_export(self, meetbouten_export_schema, meetbouten_content, create_context):
+    @pytest.mark.parametrize("use_copy", [False, True])
+    def test_geojson_export(
+        self, meetbouten_export_schema, meetbouten_content, create_context, use_copy
+    ):
         """Prove that geojson export contains the correct content."""
         export_definition = next(
             exp
             for exp in meetbouten_export_schema.versions["v1"].exports
             if exp.filetype == "geojson"
         )
-        context = create_context(meetbouten_export_schema, export_definition)
+        context = create_context(meetbouten_export_schema, export_definition, use_copy=use_copy)
         GeoJsonExporter(context).export_tables()
         with open(context.folder / "meet_bouten_v1_meetbouten_openbaar.geojson") as out_file:
             result = orjson.loads(out_file.read())
@@ -586,6 +943,35 @@ class TestExports:
                 "geometry": {"type": "Point", "coordinates": [4.86497, 52.37055]},
             }
 
+    def test_parquet_export(self, meetbouten_export_schema, meetbouten_content, create_context):
+        """Prove that parquet export contains the correct content and GeoParquet metadata."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        shapely = pytest.importorskip("shapely")
+        export_definition = dataclasses.replace(
+            meetbouten_export_schema.versions["v1"].exports[0], filetype="parquet"
+        )
+        context = create_context(meetbouten_export_schema, export_definition)
+        ParquetExporter(context).export_tables()
+        parquet_path = context.folder / "meet_bouten_v1_meetbouten_openbaar.parquet"
+        parquet_file = pq.ParquetFile(parquet_path)
+        assert parquet_file.metadata.row_group(0).column(0).compression == "ZSTD"
+        geo_metadata = orjson.loads(parquet_file.schema_arrow.metadata[b"geo"])
+        assert geo_metadata["primary_column"] == "geometrie"
+        assert geo_metadata["columns"]["geometrie"]["crs"]["id"]["code"] == 28992
+
+        rows = parquet_file.read().to_pylist()
+        assert shapely.from_wkb(rows[0].pop("geometrie")).wkt == "POINT (119434 487091.6)"
+        assert rows == [
+            {
+                "identificatie": 1,
+                "ligtInBuurtId": "10180001.1",
+                "merkCode": "12",
+                "merkOmschrijving": "De meetbout",
+                "genesteInfoNaam": None,
+                "genesteInfoNummer": None,
+            }
+        ]
+
     def test_export_cli(self, engine, meetbouten_content):
         """Test the export CLI command."""
         runner = CliRunner()
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import re
+import shutil
+from pathlib import Path
 
 import pytest
+import requests_mock
 
 from schematools.exceptions import DuplicateScopeId
-from schematools.loaders import URLSchemaLoader
+from schematools.loaders import FileSystemSchemaLoader, HTTPDocumentCache, URLSchemaLoader
 from schematools.types import Scope
 
 
@@ -120,3 +126,121 @@ def test_load_all_scopes_url_loader():
     assert openbaar.accessPackages != {}
     assert openbaar.productionPackage != ""
     assert openbaar.nonProductionPackage != ""
+
+
+def test_file_loader_cache_dir(here, tmp_path, monkeypatch):
+    """Prove that the parsed files are cached on disk, and read again when changed."""
+    root = tmp_path / "datasets"
+    shutil.copytree(here / "files/exports", root)
+    cache_dir = tmp_path / "cache"
+    datasets = FileSystemSchemaLoader(root, cache_dir=cache_dir).get_all_datasets()
+    assert list(cache_dir.glob("schemas-*.json"))
+
+    # A new loader (e.g. in the next process) doesn't need to parse the files.
+    json_load = json.load
+    monkeypatch.setattr(json, "load", lambda *args, **kwargs: pytest.fail("parsed a file"))
+    loader = FileSystemSchemaLoader(root, cache_dir=cache_dir)
+    assert loader.get_all_datasets().keys() == datasets.keys()
+    assert loader.get_dataset("meet_bouten").json_data() == datasets["meet_bouten"].json_data()
+
+    # A changed file is parsed again.
+    dataset_file = root / "meetbouten/dataset.json"
+    dataset_json = json.loads(dataset_file.read_text())
+    dataset_json["publisher"] = "changed publisher"
+    dataset_file.write_text(json.dumps(dataset_json))
+    monkeypatch.setattr(json, "load", json_load)
+    loader = FileSystemSchemaLoader(root, cache_dir=cache_dir)
+    assert loader.get_dataset("meet_bouten").data["publisher"] == "changed publisher"
+
+
+def test_file_loader_cache_dir_index(here, tmp_path, monkeypatch):
+    """Prove that the files are also cached when only the index of datasets is read."""
+    root = tmp_path / "datasets"
+    shutil.copytree(here / "files/exports", root)
+    cache_dir = tmp_path / "cache"
+    dataset_path = FileSystemSchemaLoader(root, cache_dir=cache_dir).get_dataset_path("meet_bouten")
+    assert list(cache_dir.glob("schemas-*.json"))
+
+    monkeypatch.setattr(json, "load", lambda *args, **kwargs: pytest.fail("parsed a file"))
+    loader = FileSystemSchemaLoader(root, cache_dir=cache_dir)
+    assert loader.get_dataset_path("meet_bouten") == dataset_path
+
+
+def _serve_schema_files(files: Path):
+    """Let requests-mock serve the test files like the schema server, without .json suffix.
+
+    The documents have an ETag, so a conditional request for an unchanged document gets a 304.
+    """
+    mocker = requests_mock.Mocker(case_sensitive=True)
+
+    def _respond(request, context):
+        path = files / request.path.strip("/")
+        if path.name == "index" and path.parent.name == "datasets":
+            body = json.dumps({"status": "status", "production_version": "production_version"})
+        elif path.name == "index" and path.parent.name == "publishers":
+            body = json.dumps(["GLEBZ", "HARRY"])
+        elif (path := path.with_name(f"{path.name}.json")).exists():
+            body = path.read_text()
+        else:
+            context.status_code = 404
+            return ""
+        context.headers["ETag"] = f'"{hashlib.sha256(body.encode()).hexdigest()}"'
+        if request.headers.get("If-None-Match") == context.headers["ETag"]:
+            context.status_code = 304
+            return ""
+        return body
+
+    mocker.get(re.compile("https://schemas.example.com/"), text=_respond)
+    return mocker
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_url_loader_concurrent(here, max_workers):
+    """Prove that concurrent fetching gives the same datasets, fetching each document once."""
+    with _serve_schema_files(here / "files") as mocker:
+        loader = URLSchemaLoader("https://schemas.example.com/datasets/", max_workers=max_workers)
+        datasets = loader.get_all_datasets()
+        publishers = loader.get_all_publishers()
+
+    assert sorted(datasets) == ["production_version", "status"]
+    assert [table.id for table in datasets["status"].get_tables()] == ["productiontable"]
+    assert sorted(publishers) == ["GLEBZ", "HARRY"]
+    urls = [request.url for request in mocker.request_history if "/datasets/" in request.url]
+    assert len(urls) == len(set(urls))
+    assert "https://schemas.example.com/datasets/status/tables/v1" in urls
+
+
+def test_url_loader_http_cache(here, tmp_path):
+    """Prove that the unchanged documents are taken from the cache after a 304 response."""
+    schema_url = "https://schemas.example.com/datasets/"
+    with _serve_schema_files(here / "files"):
+        datasets = URLSchemaLoader(schema_url, cache_dir=tmp_path).get_all_datasets()
+
+    with _serve_schema_files(here / "files") as mocker:
+        cached_datasets = URLSchemaLoader(schema_url, cache_dir=tmp_path).get_all_datasets()
+
+    assert cached_datasets["status"].json_data() == datasets["status"].json_data()
+    document_requests = [r for r in mocker.request_history if not r.url.endswith(".sql")]
+    assert document_requests
+    assert all("If-None-Match" in request.headers for request in document_requests)
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path):
+    """Prove that the cache removes the least recently used documents when it's full."""
+    cache = HTTPDocumentCache(tmp_path, max_size=3500)
+    urls = [f"https://schemas.example.com/{name}" for name in "abc"]
+    with requests_mock.Mocker() as mocker:
+        for url in urls:
+            mocker.get(url, text="x" * 1000, headers={"ETag": '"1"'})
+        cache.get(None, urls[0], timeout=10)
+        cache.get(None, urls[1], timeout=10)
+        os.utime(cache._get_path(urls[0]), (1000, 1000))
+        os.utime(cache._get_path(urls[1]), (2000, 2000))
+
+        mocker.get(urls[0], status_code=304)
+        assert cache.get(None, urls[0], timeout=10).text == "x" * 1000  # marks it as used
+        cache.get(None, urls[2], timeout=10)
+
+    assert cache._get_path(urls[0]).exists()
+    assert not cache._get_path(urls[1]).exists()
+    assert cache._get_path(urls[2]).exists()
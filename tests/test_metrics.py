@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import io
+
+import orjson
+
+from schematools.importer.metrics import (
+    BatchMetrics,
+    Histogram,
+    ImportMetrics,
+    JSONLinesSink,
+    PrometheusTextfileSink,
+)
+
+
+def _metrics() -> ImportMetrics:
+    metrics = ImportMetrics(dataset_id="meetbouten", table_id="metingen", num_records=4)
+    metrics.rows_written.update({"metingen": 4, "metingen_refereertaanreferentiepunten": 2})
+    metrics.stage_seconds["write"] = 0.5
+    metrics.batch_seconds["write"].observe(0.02)
+    return metrics
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative_counts() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.sum == 3.65
+
+
+def test_prometheus_textfile_sink(tmp_path):
+    """Prove that the textfile has the counters per table and the histogram buckets."""
+    path = tmp_path / "import.prom"
+    PrometheusTextfileSink(path).on_done(_metrics())
+
+    lines = path.read_text().splitlines()
+    assert "# TYPE schematools_import_records_total counter" in lines
+    assert 'schematools_import_records_total{dataset="meetbouten",table="metingen"} 4' in lines
+    assert (
+        "schematools_import_rows_written_total"
+        '{dataset="meetbouten",table="metingen_refereertaanreferentiepunten"} 2'
+    ) in lines
+    assert (
+        "schematools_import_batch_duration_seconds_bucket"
+        '{dataset="meetbouten",table="metingen",stage="write",le="0.025"} 1'
+    ) in lines
+    assert (
+        "schematools_import_batch_duration_seconds_count"
+        '{dataset="meetbouten",table="metingen",stage="parse"} 0'
+    ) in lines
+    assert list(tmp_path.iterdir()) == [path]  # no temporary files are left
+
+
+def test_jsonlines_sink():
+    fh = io.BytesIO()
+    sink = JSONLinesSink(fh)
+    metrics = _metrics()
+    sink.on_batch(
+        metrics,
+        BatchMetrics(
+            number=1,
+            num_records=4,
+            rows_written={"metingen": 4},
+            parse_seconds=0.1,
+            write_seconds=0.2,
+            commit_seconds=0.0,
+        ),
+    )
+    sink.on_stage(metrics, "index", 1.5)
+    sink.on_done(metrics)
+
+    events = [orjson.loads(line) for line in fh.getvalue().splitlines()]
+    assert [event["event"] for event in events] == ["batch", "stage", "done"]
+    assert events[0]["rows_written"] == {"metingen": 4}
+    assert events[1]["stage"] == "index"
+    assert events[2]["rows_written"]["metingen"] == 4
+    assert events[2]["batch_seconds"]["write"]["count"] == 1
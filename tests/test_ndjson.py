@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import bz2
 import datetime
+import gzip
+import io
 
+import orjson
+import pytest
 from sqlalchemy import text
 
-from schematools.importer.ndjson import NDJSONImporter
+from schematools.importer.base import CommitPolicy, ImportCheckpoint, RejectedRecord
+from schematools.importer.metrics import MetricsSink
+from schematools.importer.ndjson import NDJSONImporter, TableFieldMapper
+from schematools.types import DatasetSchema
 
 
 def test_ndjson_import_nm(here, engine, meetbouten_schema, gebieden_schema, dbsession):
@@ -589,3 +597,567 @@ def test_provenance_for_schema_field_ids_equal_to_ndjson_keys(
             "heeft_dossier_id": None,
         },
     ]
+
+
+def test_ndjson_import_copy(here, engine, meetbouten_schema, gebieden_schema, dbsession):
+    """Prove that the COPY path writes the same rows as the INSERT path, including through tables."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen", truncate=True, ind_extra_index=False)
+    importer.load_file(ndjson_path, use_copy=True)
+    with engine.begin() as conn:
+        records = (
+            conn.execute(text("SELECT * from meetbouten_metingen_v1 order by identificatie"))
+            .mappings()
+            .all()
+        )
+        through_records = (
+            conn.execute(
+                text(
+                    "SELECT * from meetbouten_metingen_refereertaanreferentiepunten_v1 order by id"
+                )
+            )
+            .mappings()
+            .all()
+        )
+    assert len(records) == 4
+    assert records[0] == {"identificatie": "173", "hoortbijmeetbout_id": "13881032"}
+    # The serial id is still generated by the database.
+    assert through_records[0] == {
+        "id": 1,
+        "metingen_id": "191",
+        "refereertaanreferentiepunten_id": "10180001",
+    }
+
+
+def test_ndjson_import_copy_nested_tables(here, engine, verblijfsobjecten_schema, dbsession):
+    ndjson_path = here / "files" / "data" / "verblijfsobjecten.ndjson"
+    importer = NDJSONImporter(verblijfsobjecten_schema, engine)
+    importer.generate_db_objects("verblijfsobjecten", truncate=True, ind_extra_index=False)
+    importer.load_file(ndjson_path, use_copy=True)
+    with engine.begin() as conn:
+        records = (
+            conn.execute(
+                text(
+                    "SELECT code, omschrijving, parent_id"
+                    " FROM verblijfsobjecten_verblijfsobjecten_gebruiksdoel_v1"
+                )
+            )
+            .mappings()
+            .all()
+        )
+    assert records == [
+        {"code": "1", "omschrijving": "doel 1", "parent_id": "VB.1"},
+        {"code": "2", "omschrijving": "doel 2", "parent_id": "VB.1"},
+    ]
+
+
+@pytest.mark.parametrize(
+    "commit_policy",
+    [CommitPolicy(single_transaction=True), CommitPolicy(rows=2), CommitPolicy(seconds=60)],
+)
+def test_ndjson_import_commit_policy(here, engine, meetbouten_schema, dbsession, commit_policy):
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen", truncate=True, ind_extra_index=False)
+    importer.load_file(ndjson_path, batch_size=1, commit_policy=commit_policy)
+    with engine.begin() as conn:
+        count = conn.execute(text("SELECT COUNT(*) from meetbouten_metingen_v1")).scalar()
+    assert count == 4
+
+
+def test_ndjson_import_resume_checkpoint(here, tmp_path, engine, meetbouten_schema, dbsession):
+    """Prove that an import continues after the records that were already committed."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    checkpoint = ImportCheckpoint(tmp_path / "metingen.checkpoint")
+    checkpoint.write(ndjson_path, 3)
+
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects(
+        "metingen", truncate=True, ind_extra_index=False, ind_fetch_existing_pks=False
+    )
+    importer.load_file(ndjson_path, checkpoint=checkpoint)
+    with engine.begin() as conn:
+        records = conn.execute(text("SELECT * from meetbouten_metingen_v1")).mappings().all()
+
+    assert len(records) == 1
+    assert not checkpoint.path.exists()
+
+
+def test_commit_policy():
+    assert CommitPolicy().should_commit(1, 0.0)
+    assert not CommitPolicy(single_transaction=True).should_commit(10_000, 3600.0)
+    assert not CommitPolicy(rows=1000).should_commit(999, 3600.0)
+    assert CommitPolicy(rows=1000).should_commit(1000, 0.0)
+    assert CommitPolicy(rows=1000, seconds=10).should_commit(1, 10.0)
+
+
+def test_import_checkpoint(tmp_path):
+    checkpoint = ImportCheckpoint(tmp_path / "import.checkpoint")
+    assert checkpoint.read("data.ndjson") == 0
+
+    checkpoint.write("data.ndjson", 500)
+    assert checkpoint.read("data.ndjson") == 500
+    with pytest.raises(ValueError, match="belongs to 'data.ndjson'"):
+        checkpoint.read("other.ndjson")
+
+    checkpoint.clear()
+    assert checkpoint.read("data.ndjson") == 0
+
+
+@pytest.mark.parametrize("skip", [0, 2])
+@pytest.mark.parametrize("shard_size", [1, 100, 1024 * 1024])
+def test_ndjson_parse_records_parallel(here, meetbouten_schema, skip, shard_size):
+    """Prove that the worker processes produce the same records, in the same order."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    importer = NDJSONImporter(meetbouten_schema, engine=None)
+    dataset_table = meetbouten_schema.get_table_by_id("metingen")
+
+    expected = list(importer.parse_records(ndjson_path, dataset_table, skip=skip))
+    records = list(
+        importer.parse_records(
+            ndjson_path, dataset_table, skip=skip, workers=2, shard_size=shard_size
+        )
+    )
+    assert records == expected
+    assert len(records) == 4 - skip
+
+
+@pytest.mark.parametrize("skip", [0, 2])
+def test_ndjson_parse_records_blank_lines(here, tmp_path, meetbouten_schema, skip):
+    """Prove that blank lines are skipped the same way by the sequential and parallel mode."""
+    lines = (here / "files" / "data" / "metingen.ndjson").read_bytes().splitlines()
+    ndjson_path = tmp_path / "metingen.ndjson"
+    ndjson_path.write_bytes(
+        b"\r\n".join([b"", lines[0], b"  ", lines[1], b"\t", *lines[2:], b""]) + b"\n \n"
+    )
+    importer = NDJSONImporter(meetbouten_schema, engine=None)
+    dataset_table = meetbouten_schema.get_table_by_id("metingen")
+
+    expected = list(importer.parse_records(ndjson_path, dataset_table, skip=skip))
+    assert len(expected) == 4 - skip
+    for source in (ndjson_path, io.BytesIO(ndjson_path.read_bytes())):
+        records = list(
+            importer.parse_records(source, dataset_table, skip=skip, workers=2, shard_size=10)
+        )
+        assert records == expected
+
+
+@pytest.mark.parametrize(
+    "compress,workers",
+    [(gzip.compress, 0), (bz2.compress, 0), (gzip.compress, 2)],
+)
+def test_ndjson_parse_records_compressed(here, tmp_path, meetbouten_schema, compress, workers):
+    """Prove that compressed files are decompressed while being read."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    compressed_path = tmp_path / "metingen.ndjson.compressed"
+    compressed_path.write_bytes(compress(ndjson_path.read_bytes()))
+    importer = NDJSONImporter(meetbouten_schema, engine=None)
+    dataset_table = meetbouten_schema.get_table_by_id("metingen")
+
+    expected = list(importer.parse_records(ndjson_path, dataset_table))
+    result = list(
+        importer.parse_records(compressed_path, dataset_table, workers=workers, shard_size=100)
+    )
+    assert result == expected
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_ndjson_parse_records_streams(here, monkeypatch, meetbouten_schema, workers):
+    """Prove that file objects, byte chunks and stdin can be imported."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    data = ndjson_path.read_bytes()
+    importer = NDJSONImporter(meetbouten_schema, engine=None)
+    dataset_table = meetbouten_schema.get_table_by_id("metingen")
+    expected = list(importer.parse_records(ndjson_path, dataset_table, skip=1))
+
+    monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(gzip.compress(data))))
+    for source in (
+        io.BytesIO(data),
+        [data[i : i + 10] for i in range(0, len(data), 10)],
+        "-",
+    ):
+        result = list(
+            importer.parse_records(source, dataset_table, skip=1, workers=workers, shard_size=50)
+        )
+        assert result == expected
+
+
+def test_ndjson_parse_records_zstd(here, tmp_path, meetbouten_schema):
+    zstandard = pytest.importorskip("zstandard")
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    compressed_path = tmp_path / "metingen.ndjson.zst"
+    compressed_path.write_bytes(zstandard.ZstdCompressor().compress(ndjson_path.read_bytes()))
+    importer = NDJSONImporter(meetbouten_schema, engine=None)
+    dataset_table = meetbouten_schema.get_table_by_id("metingen")
+
+    expected = list(importer.parse_records(ndjson_path, dataset_table))
+    assert list(importer.parse_records(compressed_path, dataset_table)) == expected
+
+
+def test_ndjson_import_parallel(here, engine, meetbouten_schema, gebieden_schema, dbsession):
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen", truncate=True, ind_extra_index=False)
+    importer.load_file(ndjson_path, workers=2, shard_size=100)
+    with engine.begin() as conn:
+        records = (
+            conn.execute(text("SELECT * from meetbouten_metingen_v1 order by identificatie"))
+            .mappings()
+            .all()
+        )
+    assert len(records) == 4
+    assert records[0] == {"identificatie": "173", "hoortbijmeetbout_id": "13881032"}
+
+
+class RecordingSink(MetricsSink):
+    def __init__(self):
+        self.events = []
+
+    def on_batch(self, metrics, batch):
+        self.events.append(("batch", batch))
+
+    def on_stage(self, metrics, stage, seconds):
+        self.events.append(("stage", stage))
+
+    def on_done(self, metrics):
+        self.events.append(("done", metrics))
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_ndjson_dry_run_metrics(here, meetbouten_schema, workers):
+    """Prove that the parsed bytes and rows are reported to the metrics sinks."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    sink = RecordingSink()
+    importer = NDJSONImporter(meetbouten_schema, engine=None, metrics_sinks=[sink])
+    stats = importer.dry_run(ndjson_path, "metingen", workers=workers)
+
+    assert stats.num_records == 4
+    assert sink.events == [("done", importer.metrics)]
+    assert importer.metrics.bytes_read == ndjson_path.stat().st_size
+    assert importer.metrics.rows_parsed == {
+        "metingen": 4,
+        "metingen_refereertaanreferentiepunten": 8,
+    }
+
+
+def test_ndjson_import_metrics(here, engine, meetbouten_schema, gebieden_schema, dbsession):
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    sink = RecordingSink()
+    importer = NDJSONImporter(meetbouten_schema, engine, metrics_sinks=[sink])
+    importer.generate_db_objects("metingen", truncate=True, defer_indexes=True)
+    importer.load_file(ndjson_path, batch_size=3)
+    importer.create_deferred_indexes()
+
+    metrics = importer.metrics
+    assert [event for event, _ in sink.events] == ["stage", "batch", "batch", "done", "stage"]
+    assert sink.events[0][1] == "pk_lookup"
+    assert [batch.num_records for _, batch in sink.events[1:3]] == [3, 1]
+    assert metrics.num_records == 4
+    assert metrics.rows_written == metrics.rows_parsed
+    assert metrics.rows_written["metingen"] == 4
+    assert metrics.batch_seconds["write"].count == 2
+    assert set(metrics.stage_seconds) == {"pk_lookup", "parse", "write", "commit", "index"}
+
+
+def test_table_field_mapper_parse_object(meetbouten_schema):
+    """Prove that the compiled field plan fills the main record and the relation fields."""
+    mapper = TableFieldMapper(meetbouten_schema.get_table_by_id("meetbouten"))
+    records = mapper.parse_object(
+        {
+            "identificatie": 1,
+            "ligtInBuurt": {"identificatie": "10180001", "volgnummer": 1},
+            "merk": {"code": "12", "omschrijving": "De meetbout"},
+            "geometrie": {"type": "Point", "coordinates": [119434.0, 487091.6]},
+        }
+    )
+    assert records == {
+        "meetbouten": [
+            {
+                "identificatie": 1,
+                "ligt_in_buurt_identificatie": "10180001",
+                "ligt_in_buurt_volgnummer": 1,
+                "ligt_in_buurt_id": "10180001.1",
+                "merk_code": "12",
+                "merk_omschrijving": "De meetbout",
+                "geometrie": "SRID=28992;POINT (119434 487091.6)",
+            }
+        ]
+    }
+
+
+def test_table_field_mapper_subfield_provenance():
+    """Prove that the provenance of a subfield is read from the object of the parent field."""
+    schema = DatasetSchema.from_dict(
+        {
+            "type": "dataset",
+            "id": "objecten",
+            "status": "beschikbaar",
+            "crs": "EPSG:28992",
+            "defaultVersion": "v1",
+            "versions": {
+                "v1": {
+                    "lifecycleStatus": "stable",
+                    "version": "1.0.0",
+                    "tables": [
+                        {
+                            "id": "objecten",
+                            "type": "table",
+                            "version": "1.0.0",
+                            "schema": {
+                                "$schema": "http://json-schema.org/draft-07/schema#",
+                                "type": "object",
+                                "additionalProperties": False,
+                                "identifier": "id",
+                                "required": ["schema", "id"],
+                                "display": "id",
+                                "properties": {
+                                    "schema": {
+                                        "$ref": "https://schemas.data.amsterdam.nl/schema@v3.1.0#/definitions/schema"  # noqa: E501
+                                    },
+                                    "id": {"type": "integer"},
+                                    "obj": {
+                                        "type": "object",
+                                        "properties": {
+                                            "a": {"type": "string", "provenance": "$.x.y"}
+                                        },
+                                    },
+                                },
+                            },
+                        }
+                    ],
+                }
+            },
+        }
+    )
+    mapper = TableFieldMapper(schema.get_table_by_id("objecten"))
+    assert mapper.parse_object({"id": 1, "obj": {"x": {"y": "z"}}}) == {
+        "objecten": [{"id": 1, "obj_a": "z"}]
+    }
+    assert mapper.parse_object({"id": 2, "obj": {"x": {}}}) == {
+        "objecten": [{"id": 2, "obj_a": None}]
+    }
+
+
+def test_table_field_mapper_ewkb_geometries(meetbouten_schema):
+    """Prove that geometries are converted in bulk to hex EWKB, and encoded values are kept."""
+    mapper = TableFieldMapper(
+        meetbouten_schema.get_table_by_id("meetbouten"), geometry_format="ewkb"
+    )
+    records = mapper.parse_objects(
+        [
+            {
+                "identificatie": 1,
+                "geometrie": {"type": "Point", "coordinates": [119434.0, 487091.6]},
+            },
+            {
+                "identificatie": 2,
+                "geometrie": "01010000204071000000000000A028FD4066666666CEBA1D41",
+            },
+            {"identificatie": 3, "geometrie": None},
+        ]
+    )
+    geometries = [record["meetbouten"][0]["geometrie"] for record in records]
+    assert geometries == [
+        "01010000204071000000000000A028FD4066666666CEBA1D41",
+        "01010000204071000000000000A028FD4066666666CEBA1D41",
+        None,
+    ]
+
+
+@pytest.mark.parametrize("geometry_format", ["ewkt", "ewkb"])
+def test_table_field_mapper_validate(meetbouten_schema, geometry_format):
+    """Prove that values are converted, and invalid records are rejected instead of raising."""
+    mapper = TableFieldMapper(
+        meetbouten_schema.get_table_by_id("meetbouten"),
+        geometry_format=geometry_format,
+        validate=True,
+    )
+    records = mapper.parse_lines(
+        [
+            b'{"identificatie": "1", "merk": {"code": 12}}',
+            b'{"identificatie": "x"}',
+            b"{not json",
+            b'{"merk": {"code": "12"}}',
+            b'{"identificatie": 5, "geometrie": {"type": "Point"}}',
+        ]
+    )
+    assert records[0]["meetbouten"][0]["identificatie"] == 1
+    assert records[0]["meetbouten"][0]["merk_code"] == "12"
+    assert all(isinstance(record, RejectedRecord) for record in records[1:])
+    assert not any(records[1:])
+    assert "Invalid value for 'meetbouten.meetbouten.v1.identificatie'" in records[1].reason
+    assert records[2].source == "{not json"
+    assert records[2].reason.startswith("Invalid JSON")
+    assert records[3].source == {"merk": {"code": "12"}}
+
+
+def test_ndjson_import_reject_file(here, tmp_path, engine, meetbouten_schema, dbsession):
+    ndjson_path = tmp_path / "meetbouten.ndjson"
+    ndjson_path.write_bytes(
+        (here / "files" / "data" / "meetbouten.ndjson").read_bytes()
+        + b'{"identificatie": "x"}\n{"identificatie": 2}\n'
+    )
+    reject_path = tmp_path / "rejected.ndjson"
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("meetbouten", truncate=True, ind_extra_index=False)
+    last_record = importer.load_file(ndjson_path, reject_file=reject_path)
+    assert last_record["identificatie"] == 2
+    assert importer.stats.num_records == 2
+    assert importer.stats.num_rejected == 1
+
+    with engine.begin() as conn:
+        records = conn.execute(text("SELECT identificatie from meetbouten_meetbouten_v1"))
+        assert sorted(records.scalars()) == [1, 2]
+    rejected = [orjson.loads(line) for line in reject_path.read_bytes().splitlines()]
+    assert rejected == [
+        {
+            "record_number": 2,
+            "reason": rejected[0]["reason"],
+            "record": {"identificatie": "x"},
+        }
+    ]
+
+
+def test_table_field_mapper_invalid_geometry_format(meetbouten_schema):
+    with pytest.raises(ValueError, match="Invalid geometry format"):
+        TableFieldMapper(meetbouten_schema.get_table_by_id("meetbouten"), geometry_format="wkt")
+
+
+@pytest.mark.parametrize("use_copy", [False, True])
+def test_ndjson_import_ewkb_geometries(here, engine, meetbouten_schema, dbsession, use_copy):
+    ndjson_path = here / "files" / "data" / "meetbouten.ndjson"
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("meetbouten", truncate=True, ind_extra_index=False)
+    importer.load_file(ndjson_path, use_copy=use_copy, geometry_format="ewkb")
+    with engine.begin() as conn:
+        records = conn.execute(text("SELECT * from meetbouten_meetbouten_v1")).mappings().all()
+    assert records[0]["geometrie"] == "01010000204071000000000000A028FD4066666666CEBA1D41"
+
+
+@pytest.mark.parametrize("dedup_backend", ["memory", "digest", "database"])
+@pytest.mark.parametrize("use_copy", [False, True])
+def test_ndjson_import_dedup_backends(
+    here, engine, meetbouten_schema, dbsession, dedup_backend, use_copy
+):
+    """Prove that re-importing a file skips the existing records with each backend."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    for _ in range(2):
+        importer = NDJSONImporter(meetbouten_schema, engine, dedup_backend=dedup_backend)
+        importer.generate_db_objects(
+            "metingen", truncate=False, ind_extra_index=False, limit_tables_to={"metingen"}
+        )
+        importer.load_file(ndjson_path, use_copy=use_copy)
+
+    with engine.begin() as conn:
+        count = conn.execute(text("SELECT COUNT(*) from meetbouten_metingen_v1")).scalar()
+    assert count == 4
+
+
+def test_ndjson_import_invalid_dedup_backend(meetbouten_schema):
+    with pytest.raises(ValueError, match="Invalid dedup backend"):
+        NDJSONImporter(meetbouten_schema, engine=None, dedup_backend="redis")
+
+
+def test_ndjson_import_swap(here, engine, meetbouten_schema, gebieden_schema, dbsession):
+    """Prove that the swap mode replaces the live tables, including the through tables."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO meetbouten_metingen_v1 (identificatie) VALUES ('old')"))
+
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen", swap=True)
+    assert importer.tables["metingen"].name == "meetbouten_metingen_v1_new"
+    importer.load_file(ndjson_path)
+    importer.swap_tables()
+    assert importer.tables["metingen"].name == "meetbouten_metingen_v1"
+
+    with engine.begin() as conn:
+        ids = conn.execute(
+            text("SELECT identificatie from meetbouten_metingen_v1 order by identificatie")
+        ).scalars()
+        num_through = conn.scalar(
+            text("SELECT count(*) FROM meetbouten_metingen_refereertaanreferentiepunten_v1")
+        )
+        relnames = set(
+            conn.execute(
+                text("SELECT relname FROM pg_class WHERE relname LIKE 'meetbouten_metingen%'")
+            ).scalars()
+        )
+    assert list(ids) == ["173", "183", "187", "191"]
+    assert num_through > 0
+    assert "meetbouten_metingen_v1_new" not in relnames
+    assert {
+        "meetbouten_metingen_v1_pkey",
+        "meetbouten_metingen_v1_identifier_idx",
+        "meetbouten_metingen_v1_hoortbijmeetbout_id_idx",
+        "meetbouten_metingen_refereertaanreferentiepunten_v1_id_seq",
+    } <= relnames
+
+
+def test_ndjson_swap_tables_not_initialized(meetbouten_schema):
+    importer = NDJSONImporter(meetbouten_schema, engine=None)
+    with pytest.raises(ValueError, match="swap=True"):
+        importer.swap_tables()
+
+
+def test_ndjson_import_defer_indexes(here, engine, meetbouten_schema, gebieden_schema, dbsession):
+    """Prove that the indexes are dropped during the import, and created afterwards."""
+    ndjson_path = here / "files" / "data" / "metingen.ndjson"
+    index_sql = text("SELECT indexname FROM pg_indexes WHERE tablename = 'meetbouten_metingen_v1'")
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen")
+    with engine.begin() as conn:
+        assert "meetbouten_metingen_v1_identifier_idx" in set(conn.execute(index_sql).scalars())
+
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen", truncate=True, defer_indexes=True)
+    with engine.begin() as conn:
+        assert set(conn.execute(index_sql).scalars()) == {"meetbouten_metingen_v1_pkey"}
+
+    importer.load_file(ndjson_path)
+    importer.create_deferred_indexes(max_workers=2, maintenance_work_mem="64MB")
+    with engine.begin() as conn:
+        assert set(conn.execute(index_sql).scalars()) == {
+            "meetbouten_metingen_v1_pkey",
+            "meetbouten_metingen_v1_identifier_idx",
+            "meetbouten_metingen_v1_hoortbijmeetbout_id_idx",
+        }
+        assert conn.scalar(text("SELECT count(*) FROM meetbouten_metingen_v1")) == 4
+
+
+@pytest.mark.parametrize("use_copy", [False, True])
+def test_ndjson_import_upsert(
+    here, tmp_path, engine, meetbouten_schema, gebieden_schema, dbsession, use_copy
+):
+    """Prove that upserts update records, replace the through rows and apply tombstones."""
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen", truncate=True, ind_extra_index=False)
+    importer.load_file(here / "files" / "data" / "metingen.ndjson")
+
+    changes_path = tmp_path / "metingen.ndjson"
+    changes_path.write_text(
+        '{"identificatie": "191", "refereertaanreferentiepunten": [{"identificatie": "1"}],'
+        ' "hoortbijmeetbout": "1"}\n'
+        '{"identificatie": "183", "_deleted": true}\n'
+        '{"identificatie": "200", "hoortbijmeetbout": "2"}\n'
+    )
+    importer = NDJSONImporter(meetbouten_schema, engine)
+    importer.generate_db_objects("metingen", ind_extra_index=False, ind_create_pk_lookup=False)
+    importer.load_file(changes_path, upsert=True, use_copy=use_copy)
+
+    with engine.begin() as conn:
+        records = conn.execute(
+            text("SELECT * FROM meetbouten_metingen_v1 ORDER BY identificatie")
+        ).all()
+        through_records = conn.execute(
+            text(
+                "SELECT refereertaanreferentiepunten_id"
+                " FROM meetbouten_metingen_refereertaanreferentiepunten_v1"
+                " WHERE metingen_id = '191'"
+            )
+        ).all()
+    assert records == [("173", "13881032"), ("187", "13881032"), ("191", "1"), ("200", "2")]
+    assert through_records == [("1",)]
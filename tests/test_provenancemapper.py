@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from schematools.importer.base import Provenance
+import jsonpath_rw
+import pytest
+
+from schematools.importer.base import Provenance, compile_json_path
 
 
 def test_row_plain():
@@ -13,3 +16,48 @@ def test_row_with_jsonpath_provenance():
     """Prove that a provenance based on json path works."""
     value = Provenance("$.colname2.sub").resolve({"colname1": 12, "colname2": {"sub": "test"}})
     assert value == "test"
+
+
+@pytest.mark.parametrize(
+    "provenance,value",
+    [
+        ("$.colname2.sub", "test"),
+        ("$.colname3[1].sub", "second"),
+        ("$.colname1", 12),
+        ("$.colname4", None),
+    ],
+)
+def test_row_with_compiled_jsonpath_provenance(provenance, value):
+    """Prove that simple JSONPath expressions don't need jsonpath_rw."""
+    row = {
+        "colname1": 12,
+        "colname2": {"sub": "test"},
+        "colname3": [{"sub": "first"}, {"sub": "second"}],
+        "colname4": None,
+    }
+    provenance = Provenance(provenance)
+    assert provenance._json_path is None
+    assert provenance.resolve(row) == value
+
+
+@pytest.mark.parametrize("provenance", ["$.missing", "$.colname1.sub", "$.colname2[0]", "$.a[5]"])
+def test_row_with_compiled_jsonpath_provenance_missing(provenance):
+    """Prove that missing values raise LookupError, like a JSONPath without matches."""
+    with pytest.raises(LookupError):
+        Provenance(provenance).resolve({"colname1": 12, "colname2": {"sub": "test"}, "a": [1]})
+
+
+@pytest.mark.parametrize("element", [0, "", None, [], {}, False])
+def test_row_with_compiled_jsonpath_provenance_falsy_element(element):
+    """Prove that falsy array elements are returned as value, the same as jsonpath_rw does."""
+    row = {"a": [1, element]}
+    assert [match.value for match in jsonpath_rw.parse("$.a[1]").find(row)] == [element]
+    assert Provenance("$.a[1]").resolve(row) == element
+    assert type(Provenance("$.a[1]").resolve(row)) is type(element)
+
+
+def test_row_with_jsonpath_provenance_fallback():
+    """Prove that other JSONPath syntax is still resolved by jsonpath_rw."""
+    provenance = Provenance("$.colname2[*].sub")
+    assert compile_json_path(provenance.provenance) is None
+    assert provenance.resolve({"colname2": [{"sub": "test"}]}) == "test"